@@ -0,0 +1,28 @@
+"""
+The io asked for by the algorithms of :class:`~asimov.node.BaseNode`.
+
+An algorithm is a generator yielding these effects and getting their results back by ``send``, a failed effect
+is thrown into the generator. The same steps run with blocking calls in :class:`~asimov.node.Node`
+and as coroutines in :class:`~asimov.async_node.AsyncNode`, which only do the io.
+"""
+from collections import namedtuple
+
+
+# post ``data`` to the rpc server ``provider``, the result is the (status code, body, decode function) of the
+# response, a connection failure or timeout raises :class:`~asimov.error.NetWorkError`
+Http = namedtuple("Http", ["provider", "data"])
+
+# wait for ``seconds``
+Sleep = namedtuple("Sleep", ["seconds"])
+
+# run the ``steps`` holding the lock of the UTXO selection, the result is theirs
+Locked = namedtuple("Locked", ["steps"])
+
+# run a list of ``steps`` with at most ``limit`` of them at the same time, the result is the list of theirs
+Gather = namedtuple("Gather", ["steps", "limit"])
+
+# start the ``steps`` in the background, the result is a handle with a ``cancel`` method
+Spawn = namedtuple("Spawn", ["steps"])
+
+# wait for the steps of a ``handle`` to finish, the result is theirs
+Join = namedtuple("Join", ["handle"])
@@ -2,14 +2,38 @@ import json
 import functools
 
 from web3.utils.contracts import encode_transaction_data as __encode_transaction_data
-from web3.utils.abi import filter_by_name, filter_by_type
+from web3.utils.abi import (
+    filter_by_name,
+    filter_by_type,
+    get_abi_input_types,
+    map_abi_data,
+    check_if_arguments_can_be_encoded,
+)
+from web3.utils.normalizers import (
+    abi_ens_resolver,
+    abi_address_to_hex,
+    abi_bytes_to_bytes,
+    abi_string_to_text,
+)
 from eth_abi import encode_abi
+from eth_abi.encoding import TupleEncoder
+from eth_abi.exceptions import EncodingError
+from eth_abi.registry import registry
+from eth_utils import function_abi_to_4byte_selector
 
 from asimov.data_type import Account
 
 
 encode_transaction_data = functools.partial(__encode_transaction_data, None)
 
+# the argument normalizers applied by web3 before encoding, there is no web3 object to resolve ens names
+_normalizers = [
+    abi_ens_resolver(None),
+    abi_address_to_hex,
+    abi_bytes_to_bytes,
+    abi_string_to_text,
+]
+
 
 class AsimovJsonEncoder(json.JSONEncoder):
     def default(self, o):
@@ -72,3 +96,88 @@ def encode_params(contract_abi, fn_name, fn_type, args: list) -> str:
     args = package_contract_func_args(contract_abi, fn_name, fn_type, args)
     types = [e['type'] for e in abi['inputs']]
     return encode_abi(types, args).hex()
+
+
+class FunctionEncoder:
+    """
+    call data encoder of a contract function, the selector and the argument encoders are built once
+    """
+    def __init__(self, fn_abi: dict):
+        self.abi = fn_abi
+        self.name = fn_abi['name']
+        self.types = get_abi_input_types(fn_abi)
+        self.signature = f"{self.name}({','.join(self.types)})"
+        self.selector: bytes = function_abi_to_4byte_selector(fn_abi)
+        self._encoder = TupleEncoder(encoders=[registry.get_encoder(_type) for _type in self.types])
+        # only address, bytes and string arguments are changed by the normalizers,
+        # the positions of such arguments if all of them are plain values, or None to walk the data tree like web3
+        normalized = [_type.startswith(('address', 'bytes', 'string')) or '(' in _type for _type in self.types]
+        if any('[' in _type or '(' in _type for _type in self.types):
+            self._normalize_positions = None
+        else:
+            self._normalize_positions = [idx for idx, need in enumerate(normalized) if need]
+
+    def is_encodable(self, args: tuple) -> bool:
+        return len(args) == len(self.types) and check_if_arguments_can_be_encoded(self.abi, args, {})
+
+    def encode(self, args=None) -> str:
+        """
+        :param args: function arguments
+        :return: the call data in hex string format with 0x prefix, the same as web3 encodes
+        """
+        args = tuple(args) if args else ()
+        if len(args) != len(self.types):
+            raise TypeError(f"{self.signature} takes {len(self.types)} arguments, got {len(args)}")
+        if self._normalize_positions is None:
+            args = map_abi_data(_normalizers, self.types, args)
+        elif self._normalize_positions:
+            args = list(args)
+            for idx in self._normalize_positions:
+                _type, arg = self.types[idx], args[idx]
+                for normalizer in _normalizers:
+                    _type, arg = normalizer(_type, arg)
+                args[idx] = arg
+        try:
+            encoded = self._encoder(args)
+        except EncodingError as e:
+            raise TypeError(f"One or more arguments could not be encoded to the necessary ABI type: {e}")
+        return '0x' + (self.selector + encoded).hex()
+
+
+class FunctionEncoderTable:
+    """
+    :class:`FunctionEncoder` of all the functions in a contract abi, looked up by name or by signature
+    such as ``transfer(address,uint256)``
+    """
+    def __init__(self, contract_abi: list):
+        self.by_name = {}
+        self.by_signature = {}
+        for fn_abi in filter_by_type('function', contract_abi):
+            encoder = FunctionEncoder(fn_abi)
+            self.by_name.setdefault(encoder.name, []).append(encoder)
+            self.by_signature[encoder.signature] = encoder
+
+    def get(self, fn_identifier: str, args=None) -> FunctionEncoder:
+        """
+        :param fn_identifier: function name or signature
+        :param args: function arguments, used to choose among overloaded functions
+        :return: the :class:`FunctionEncoder` object
+        """
+        encoder = self.by_signature.get(fn_identifier)
+        if encoder is not None:
+            return encoder
+        encoders = self.by_name.get(fn_identifier, [])
+        if len(encoders) == 1:
+            return encoders[0]
+        args = tuple(args) if args else ()
+        encoders = [encoder for encoder in encoders if encoder.is_encodable(args)]
+        if len(encoders) != 1:
+            raise ValueError(f"Could not identify the intended function with name `{fn_identifier}` "
+                             f"and args {args}, {len(encoders)} functions match")
+        return encoders[0]
+
+    def encode(self, fn_identifier: str, args=None) -> str:
+        """
+        :return: the call data of the function in hex string format with 0x prefix
+        """
+        return self.get(fn_identifier, args).encode(args)
@@ -1,6 +1,8 @@
+import os
+import math
 import secrets
 import hashlib
-import codecs
+from concurrent.futures import Executor, ProcessPoolExecutor
 
 from fastecdsa import (
     keys,
@@ -12,11 +14,51 @@ from eth_utils import (
 )
 from web3 import Web3
 from bitcointx.core import script
+from bitcointx.core.key import CKey
 
 from .data_type import Account
 from .constant import AddressType, AsimovOpCode
 
 
+# the first byte of the address of a public key hash
+_PUBKEY_HASH_ADDRESS_ID = b'\x66'
+
+
+def _key_bytes(private_key: str) -> bytes:
+    """the 32 bytes of a hex private key, which may have the 0x prefix and may be shorter than 64 hex digits"""
+    return int(private_key, 16).to_bytes(32, 'big')
+
+
+def _derive(private_key: bytes) -> tuple:
+    """
+    derive the compressed public key and the address of a private key, in bytes.
+    The point multiplication runs in libsecp256k1, several times faster than fastecdsa
+
+    :param private_key: the 32 bytes private key
+    :return: (33 bytes compressed public key, 21 bytes address)
+    """
+    public_key = bytes(CKey(private_key, compressed=True).pub)
+    digest = hashlib.new('ripemd160', hashlib.sha256(public_key).digest()).digest()
+    return public_key, _PUBKEY_HASH_ADDRESS_ID + digest
+
+
+def _derive_many(private_keys: list) -> list:
+    """:func:`_derive` of many private keys, run in a worker process"""
+    return [_derive(private_key) for private_key in private_keys]
+
+
+def _map_derive(private_keys: list, parallel=False, executor: Executor = None) -> list:
+    if not parallel:
+        return _derive_many(private_keys)
+    if executor is None:
+        with ProcessPoolExecutor() as pool:
+            return _map_derive(private_keys, parallel, pool)
+    # a few large chunks, the keys and the results are pickled once per chunk
+    chunk_size = math.ceil(len(private_keys) / ((os.cpu_count() or 1) * 4)) or 1
+    chunks = [private_keys[i:i + chunk_size] for i in range(0, len(private_keys), chunk_size)]
+    return [derived for rst in executor.map(_derive_many, chunks) for derived in rst]
+
+
 class PrivateKeyFactory:
     """Private key generator"""
 
@@ -38,11 +80,14 @@ class PrivateKeyFactory:
 
             # note that the key generated above is a random value, it will be different in your try
         """
+        return cls._generate_bytes().hex()
+
+    @classmethod
+    def _generate_bytes(cls) -> bytes:
         big_int = secrets.randbits(cls._KEY_BYTES * 8)
         big_int %= cls._CURVE_ORDER - 1
         big_int += 1
-        key = hex(big_int)[2:].zfill(cls._KEY_BYTES * 2)
-        return key
+        return big_int.to_bytes(cls._KEY_BYTES, 'big')
 
 
 class AccountFactory:
@@ -66,9 +111,28 @@ class AccountFactory:
             >>> AccountFactory.generate_address("bba692e559fda550d0157669b101bafddb23e7f57aeeb5cef5494e7a41a1f056")
             '66c17b951f0c85b860c9f7f0d811c77ea78f2d2e3a'
         """
-        public_key = cls.private2compressed_public(remove_0x_prefix(private_key))
-        address = cls.__public2address(public_key)
-        return address
+        _, address = _derive(_key_bytes(private_key))
+        return address.hex()
+
+    @classmethod
+    def generate_addresses(cls, private_keys: list, parallel=False, executor: Executor = None) -> list:
+        """
+        create the asimov addresses of many private keys
+
+        :param private_keys: the private keys
+        :param parallel: derive the addresses in worker processes
+        :param executor: the executor to derive in parallel, e.g. a ``ProcessPoolExecutor`` kept by the caller,
+            a temporary ``ProcessPoolExecutor`` is used if not given
+        :return: the hex addresses without 0x prefix, in the order of the private keys
+
+        .. code-block:: python
+
+            >>> from asimov import AccountFactory
+            >>> AccountFactory.generate_addresses(["bba692e559fda550d0157669b101bafddb23e7f57aeeb5cef5494e7a41a1f056"])
+            ['66c17b951f0c85b860c9f7f0d811c77ea78f2d2e3a']
+        """
+        keys_bytes = [_key_bytes(private_key) for private_key in private_keys]
+        return [address.hex() for _, address in _map_derive(keys_bytes, parallel, executor)]
 
     @classmethod
     def private2account(cls, private_key: str) -> Account:
@@ -90,9 +154,8 @@ class AccountFactory:
             >>> account.public_key
             b'023a68576342553357f042c6ede12bd3ed01cb61ad39848908883cab93f66c7601'
         """
-        public_key = cls.private2compressed_public(remove_0x_prefix(private_key))
-        address = cls.__public2address(public_key)
-        return Account(add_0x_prefix(private_key), add_0x_prefix(address), public_key)
+        public_key, address = _derive(_key_bytes(private_key))
+        return Account(add_0x_prefix(private_key), '0x' + address.hex(), public_key.hex().encode())
 
     @classmethod
     def __private2public(cls, private_key: str) -> bytes:
@@ -138,34 +201,8 @@ class AccountFactory:
                 "0xbba692e559fda550d0157669b101bafddb23e7f57aeeb5cef5494e7a41a1f056")
             >>> b'023a68576342553357f042c6ede12bd3ed01cb61ad39848908883cab93f66c7601'
         """
-        key_hex = cls.__private2public(private_key)
-        # get x from key (first half)
-        key_string = str(key_hex, 'utf8')
-        key_half = key_hex[:(len(key_hex) // 2)]
-        # Add bitcoin byte: 0x02 if the last digit is even, 0x03 if the last digit is odd
-        last_byte = int(key_string[-1], 16)
-        btc_byte = b'02' if last_byte % 2 == 0 else b'03'
-        public_key = btc_byte + key_half
-        return public_key
-
-    @classmethod
-    def __public2address(cls, public_key: bytes) -> str:
-        publick_key_bytes = codecs.decode(public_key, 'hex')
-        # Run SHA256 for the public key
-        sha256_bpk_digest = hashlib.sha256(publick_key_bytes).digest()
-        # Run ripemd160 for the SHA256
-        ripemd160_bpk = hashlib.new('ripemd160')
-        ripemd160_bpk.update(sha256_bpk_digest)
-        ripemd160_bpk_digest = ripemd160_bpk.digest()
-
-        # asimov logic
-        public_key_hash_addr_id = b'f'
-        address_length = 21
-        digest_length = len(ripemd160_bpk_digest)
-        if digest_length > address_length - 1:
-            ripemd160_bpk_digest = ripemd160_bpk_digest[digest_length + 1 - address_length:]
-        ripemd160_bpk_digest = public_key_hash_addr_id + ripemd160_bpk_digest
-        return str(codecs.encode(ripemd160_bpk_digest, 'hex'), 'utf8')
+        public_key, _ = _derive(_key_bytes(private_key))
+        return public_key.hex().encode()
 
     @classmethod
     def new(cls, private_key=None) -> Account:
@@ -190,8 +227,32 @@ class AccountFactory:
             private_key = PrivateKeyFactory.generate_key()
         return cls.private2account(private_key)
 
+    @classmethod
+    def new_many(cls, n: int, parallel=False, executor: Executor = None) -> list:
+        """
+        create many new accounts with random private keys
+
+        :param n: count of accounts
+        :param parallel: derive the public keys and addresses in worker processes
+        :param executor: the executor to derive in parallel, e.g. a ``ProcessPoolExecutor`` kept by the caller,
+            a temporary ``ProcessPoolExecutor`` is used if not given
+        :return: list of :class:`~asimov.data_type.Account` objects
+
+        .. code-block:: python
+
+            >>> from asimov import AccountFactory
+            >>> accounts = AccountFactory.new_many(100000, parallel=True)
+        """
+        private_keys = [PrivateKeyFactory._generate_bytes() for _ in range(n)]
+        return [
+            Account('0x' + private_key.hex(), '0x' + address.hex(), public_key.hex().encode())
+            for private_key, (public_key, address) in zip(private_keys, _map_derive(private_keys, parallel, executor))
+        ]
+
 
 class Address:
+    __slots__ = ("address",)
+
     def __init__(self, address: str):
         self.address = address
 
@@ -0,0 +1,311 @@
+import json
+import asyncio
+import functools
+from typing import Union
+
+import aiohttp
+
+from .data_type import AsyncTx, ContractTemplate
+from . import error
+from . import constant
+from .node import BaseNode
+from .bulk import _BlockQuery, _BlockWindow
+from .utxo import UtxoCache
+from .coin_selection import CoinSelector
+from .template_cache import TemplateCache
+from ._utils.effects import Http, Sleep, Locked, Gather, Spawn
+
+
+class AsyncNode(BaseNode):
+    """
+    The asyncio version of :class:`~asimov.node.Node`, every method talking to the rpc server is a coroutine.
+
+    It requires the optional ``aiohttp`` dependency, install it with ``pip install py-asimov[async]``.
+
+    .. code-block:: python
+
+        >>> from asimov.async_node import AsyncNode
+        >>> async with AsyncNode("http://seed.asimov.tech", private_key) as node:
+        ...     tx = await node.send("0x663bc0936166c07431ed04d7dc207eb7694e223ec4", 10)
+        ...     await tx.check()
+
+    The options are the same as :class:`~asimov.node.Node`, ``pool_size`` is the connection limit of the session.
+    """
+    _tx_class = AsyncTx
+
+    def __init__(self, provider: Union[str, list] = None, private_key: str = None, utxo_cache: UtxoCache = None,
+                 coin_selector: CoinSelector = None, template_cache: TemplateCache = None, pool_size: int = 100,
+                 connect_timeout: float = 10, read_timeout: float = 60, retries: int = 3, backoff: float = 0.5,
+                 hooks: list = None):
+        super().__init__(provider, private_key, utxo_cache, coin_selector, template_cache, pool_size,
+                         connect_timeout, read_timeout, retries, backoff, hooks)
+        self._session: aiohttp.ClientSession = None
+        self._select_lock: asyncio.Lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        close the underlying http connection pool
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        the http session, created in the running event loop on first use
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.options.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.options.connect_timeout,
+                                              sock_read=self.options.read_timeout),
+                headers={"Content-type": "application/json"}
+            )
+        return self._session
+
+    def _selection_lock(self) -> asyncio.Lock:
+        """the coroutines of the node select one by one, the UTXO are reserved before the next one selects"""
+        if self._select_lock is None:
+            self._select_lock = asyncio.Lock()
+        return self._select_lock
+
+    async def _run(self, steps):
+        """run the steps of an algorithm in the event loop"""
+        effect, rst = self._resume(steps)
+        while effect is not None:
+            try:
+                value = await self._do(effect)
+            except BaseException as e:  # pylint: disable=broad-except
+                effect, rst = self._resume(steps, failure=e)
+            else:
+                effect, rst = self._resume(steps, value)
+        return rst
+
+    async def _do(self, effect):
+        if isinstance(effect, Http):
+            return await self._http(effect.provider, effect.data)
+        if isinstance(effect, Sleep):
+            return await asyncio.sleep(effect.seconds)
+        if isinstance(effect, Locked):
+            async with self._selection_lock():
+                return await self._run(effect.steps)
+        if isinstance(effect, Gather):
+            return await self._gather(effect.steps, effect.limit)
+        if isinstance(effect, Spawn):
+            return asyncio.ensure_future(self._run(effect.steps))
+        return await effect.handle
+
+    async def _http(self, provider: str, data: str) -> tuple:
+        try:
+            response = await self.session.post(provider, data=data)
+            try:
+                content = await response.read()
+            finally:
+                response.release()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise error.NetWorkError(f"{provider}: {e!r}")
+        return response.status, content, functools.partial(json.loads, content)
+
+    async def _gather(self, steps: list, limit: int) -> list:
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(item):
+            async with semaphore:
+                return await self._run(item)
+
+        return list(await asyncio.gather(*[run(item) for item in steps]))
+
+    async def call(self, method: str, args: list = None):
+        """
+        call asimov rpc service
+
+        :param method: rpc function name
+        :param args: rpc function arguments
+        :return: the return value of the rpc function
+        """
+        return await self._run(self._call_steps(method, args))
+
+    async def batch(self, calls: list) -> list:
+        """
+        call multiple asimov rpc services in one JSON-RPC 2.0 batch request
+
+        :param calls: list of (method, args) pairs
+        :return: the return values in the same order as ``calls``,
+            a failed call is returned as an :class:`~asimov.error.RPCError` object instead of raising
+        """
+        return await self._run(self._batch_steps(calls))
+
+    async def balance(self, address: str = None, asset=constant.ASCOIN) -> Union[int, dict]:
+        """
+        get the balance of specific address by given asset type
+
+        :param address: specific address, default is current node account address
+        :param asset: asset type, will return balance for all asset types if none is given
+        :return: balance of given asset type, or balance for all asset types
+        """
+        return await self._run(self._balance_steps(address, asset))
+
+    async def balances(self, addresses, assets=None, batch_size=200, workers=4) -> dict:
+        """
+        get the balances of many addresses, see :meth:`~asimov.bulk.BulkMixin.balances`
+
+        :param addresses: the addresses
+        :param assets: asset types, will return the balances of all asset types held if none is given
+        :param batch_size: count of addresses in a batch request
+        :param workers: count of batch requests sent at the same time
+        :return: the balance by address and asset type, the given asset types not held by an address are 0
+        """
+        return await self._run(self._balances_steps(addresses, assets, batch_size, workers))
+
+    async def _get_tx_receipt(self, tx_id: str):
+        return await self.call("getTransactionReceipt", [tx_id])
+
+    async def check(self, tx_id: str) -> int:
+        """
+        wait for the transaction to be confirmed on chain and return the contract execution status
+
+        :param tx_id: transaction id
+        :return: return 1 if the transaction is confirmed on chain and the execution result is success.
+        """
+        return await self._run(self._check_steps(tx_id))
+
+    async def _tx_status(self, tx: AsyncTx) -> int:
+        return await self._run(self._tx_status_steps(tx))
+
+    async def _broadcast(self, tx: AsyncTx) -> AsyncTx:
+        return await self._run(self._broadcast_steps(tx))
+
+    async def wait_for_confirmation(self, tx_id, confirm_num=1, timeout=60) -> bool:
+        """
+        wait for the transaction to be confirmed on chain
+
+        :param tx_id: transaction id
+        :param confirm_num: confirmed block count, default is 1
+        :param timeout: time out length, default is 60 seconds
+        :return: true if confirmed, false otherwise
+        """
+        return await self._run(self._wait_for_confirmation_steps(tx_id, confirm_num, timeout))
+
+    async def current_height(self) -> int:
+        """
+        get the current height of chain
+        """
+        return await self._run(self._current_height_steps())
+
+    def iter_blocks(self, start: int, end: int = None, prefetch=8, follow=False, poll_interval=1,
+                    checkpoint=None, verbose_tx=True):
+        """
+        iterate the blocks in height order with ``async for``,
+        parameters are the same as :meth:`~asimov.bulk.BulkMixin.iter_blocks`
+
+        :return: an asynchronous generator of the blocks
+        """
+        window = self._block_window(start, _BlockQuery(end, prefetch, follow, poll_interval, checkpoint, verbose_tx))
+        return self._iter_blocks(window)
+
+    async def _iter_blocks(self, window: _BlockWindow):
+        try:
+            block = await self._run(self._next_block_steps(window))
+            while block is not None:
+                yield block
+                block = await self._run(self._next_block_steps(window))
+        finally:
+            window.cancel()
+
+    async def _calc_contract_address(self, inputs: list, outputs: list):
+        return await self._run(self._calc_contract_address_steps(inputs, outputs))
+
+    async def get_contract_template(self, address: str = None, key: str = None,
+                                    name: str = None) -> ContractTemplate:
+        """
+        get contract template object according to address, key or name
+
+        :param address: contract address
+        :param key: template key (template id)
+        :param name: template name
+        :return: the :class:`~asimov.data_type.ContractTemplate` object
+        """
+        return await self._run(self._get_contract_template_steps(address, key, name))
+
+    async def _call_readonly_function(self, contract_address: str, data: str, func_name: str,
+                                      abi: str, caller_address: str = None):
+        return await self._run(
+            self._call_readonly_function_steps(contract_address, data, func_name, abi, caller_address))
+
+    async def send(self, address, asset_value: int, asset_type=constant.ASCOIN,
+                   tx_fee_type=constant.ASCOIN, coin_selector: CoinSelector = None) -> AsyncTx:
+        """
+        send a normal transaction on asimov chain and return the transaction object :class:`~asimov.data_type.AsyncTx`
+
+        :param address: target address
+        :param asset_value: asset value to send
+        :param asset_type: asset type to send
+        :param tx_fee_type: transaction fee type
+        :param coin_selector: the coin selection strategy of this transaction, default is the one of the node
+        :return: the :class:`~asimov.data_type.AsyncTx` object
+        """
+        return await self._run(self._transfer_steps(address, asset_value, asset_type, tx_fee_type, coin_selector))
+
+    async def send_many(self, payments: list, tx_fee_type=constant.ASCOIN, coin_selector: CoinSelector = None,
+                        max_size: int = 100000, max_gas: int = None) -> list:
+        """
+        pay to many addresses with as few transactions as possible,
+        parameters are the same as :meth:`~asimov.bulk.BulkMixin.send_many`
+
+        :return: list of the :class:`~asimov.data_type.AsyncTx` objects
+        """
+        return await self._run(self._send_many_steps(payments, tx_fee_type, coin_selector, max_size, max_gas))
+
+    async def consolidate(self, asset=constant.ASCOIN, max_inputs: int = 100, max_amount: int = None,
+                          tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE,
+                          coin_selector: CoinSelector = None, dry_run=False) -> list:
+        """
+        merge the small UTXO of an asset type, parameters are the same as :meth:`~asimov.bulk.BulkMixin.consolidate`
+
+        :return: list of the :class:`~asimov.data_type.TxSummary` objects
+        """
+        return await self._run(self._consolidate_steps(
+            asset, max_inputs, max_amount, tx_fee_type, gas_price, coin_selector, dry_run))
+
+    async def fan_out(self, asset, n: int, amount: int, tx_fee_type=constant.ASCOIN,
+                      coin_selector: CoinSelector = None, max_size: int = 100000, dry_run=False) -> list:
+        """
+        split the balance of an asset type into ``n`` UTXO of ``amount`` each,
+        parameters are the same as :meth:`~asimov.bulk.BulkMixin.fan_out`
+
+        :return: list of the :class:`~asimov.data_type.TxSummary` objects
+        """
+        return await self._run(self._fan_out_steps(asset, n, amount, tx_fee_type, coin_selector, max_size, dry_run))
+
+    async def call_write_function(
+            self, func_name: str = None, params: tuple = None, abi=None, contract_address: str = constant.NullAddress,
+            contract_tx_data=None, call_type=constant.TxType.CALL, asset_value=0, asset_type=constant.ASCOIN,
+            tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE, corrected_gas=50000,
+            coin_selector: CoinSelector = None, select_rst: dict = None
+    ) -> AsyncTx:
+        """
+        build a transaction to execute a method in the contract,
+        parameters are the same as :meth:`~asimov.node.Node.call_write_function`
+
+        :return: the :class:`~asimov.data_type.AsyncTx` object, not broadcast yet
+        """
+        return await self._run(self._call_write_function_steps(
+            func_name, params, abi, contract_address, contract_tx_data, call_type, asset_value, asset_type,
+            tx_fee_type, gas_price, corrected_gas, coin_selector, select_rst))
+
+    async def estimate_gas(self, tx_hex: str, inputs: list, corrected_value=50000):
+        """
+        estimate transaction execution gas cost
+        :param tx_hex: transaction in hex format
+        :param inputs: UTXO used in transaction
+        :param corrected_value: corrected gas value
+        :return:
+        """
+        return await self._run(self._estimate_gas_steps(tx_hex, inputs, corrected_value))
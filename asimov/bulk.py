@@ -0,0 +1,431 @@
+import math
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from . import error
+from . import constant
+from .data_type import Tx, TxSummary
+from ._utils.common import dict_add
+from ._utils.effects import Sleep, Locked, Gather, Spawn, Join
+from .transactions import Transaction, TxOutput
+from .utxo import UtxoIndex
+from .coin_selection import CoinSelector
+
+
+# the parameters of an iteration over the blocks
+_BlockQuery = collections.namedtuple(
+    "_BlockQuery", ["end", "prefetch", "follow", "poll_interval", "checkpoint", "verbose_tx"])
+
+
+class _BlockWindow:
+    """the blocks of :meth:`BulkMixin.iter_blocks` being fetched ahead, in height order"""
+    __slots__ = ("query", "fetches", "height", "head", "last")
+
+    def __init__(self, query: _BlockQuery, start: int):
+        self.query = query
+        self.fetches = collections.deque()
+        # height of the next block to fetch
+        self.height = start
+        self.head = None
+        # the block returned last, checkpointed when the next one is asked for
+        self.last = None
+
+    def cancel(self):
+        for fetch in self.fetches:
+            fetch.cancel()
+
+
+class BulkStepsMixin:
+    """
+    The steps of the bulk queries and payouts of :class:`~asimov.node.BaseNode`,
+    see :class:`BulkMixin` for the methods running them
+    """
+    @staticmethod
+    def _balance_row(rst: list, assets) -> dict:
+        """the balance of an address by asset, the given ``assets`` only and 0 for the ones it does not hold"""
+        row = dict.fromkeys(assets, 0) if assets is not None else {}
+        for v in rst or []:
+            if assets is None or v['asset'] in row:
+                row[v['asset']] = row.get(v['asset'], 0) + int(v['value'])
+        return row
+
+    @staticmethod
+    def _balance_chunks(addresses, batch_size: int) -> list:
+        addresses = list(dict.fromkeys(addresses))
+        return [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
+
+    @staticmethod
+    def _normalize_payments(payments: list) -> list:
+        """(address, amount) or (address, amount, asset type) pairs to (address, amount, asset type)"""
+        rst = []
+        for payment in payments:
+            address, amount, asset_type = (tuple(payment) + (constant.ASCOIN,))[:3]
+            if amount < 1:
+                raise error.InvalidParams(f"value should be larger than 1, got {amount} to {address}")
+            rst.append((address, amount, asset_type))
+        if not rst:
+            raise error.InvalidParams("no payment")
+        return rst
+
+    @classmethod
+    def _chunk_payments(cls, payments: list, max_size: int) -> list:
+        """
+        split the payments so the outputs of a chunk take at most half of ``max_size``, the rest is left for inputs
+        """
+        chunks, chunk, size = [], [], 0
+        for payment in payments:
+            output_size = TxOutput(cls.create_tx_output(*payment)).serialize_size()
+            if chunk and size + output_size > max_size // 2:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append(payment)
+            size += output_size
+        chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _exceeds(transaction: Transaction, max_size: int, max_gas: int = None) -> bool:
+        return transaction.serialize_size(estimate_signature=True) > max_size or (
+            max_gas is not None and transaction.gas_limit > max_gas)
+
+    @staticmethod
+    def _consolidation_batches(index: UtxoIndex, max_inputs: int, max_amount: int = None) -> list:
+        """
+        the UTXO not larger than ``max_amount`` from the smallest one in batches of ``max_inputs``,
+        a batch of one UTXO is left as it is
+        """
+        utxos = [utxo for utxo in index if max_amount is None or utxo['amount'] <= max_amount]
+        batches = [utxos[i:i + max_inputs] for i in range(0, len(utxos), max_inputs)]
+        return [batch for batch in batches if len(batch) > 1]
+
+    def _consolidation_select(self, batch: list, asset: str, tx_fee_type: str, gas_price) -> tuple:
+        """
+        the UTXO selected for merging the batch and the fee still to be selected if the batch can not pay it,
+        room for two more inputs paying the fee is left in the estimation
+        """
+        for utxo in batch:
+            utxo['signed_key'] = self.account
+        select_rst = {asset: sum(utxo['amount'] for utxo in batch), 'utxos': list(batch)}
+        outputs = [self.create_tx_output(self.address, 1, asset), self.create_tx_output(self.address, 1, tx_fee_type)]
+        fee = math.ceil(self._calc_transfer_gas(Transaction(batch + batch[:2], outputs)) * gas_price)
+        return select_rst, 0 if self._covers_fee(select_rst, 0, asset, fee, tx_fee_type) else fee
+
+    @staticmethod
+    def _merge_selection(select_rst: dict, fee_rst: dict) -> dict:
+        utxos = select_rst.pop('utxos') + fee_rst.pop('utxos')
+        merged = dict_add(select_rst, fee_rst)
+        merged['utxos'] = utxos
+        return merged
+
+    def _check_consolidation(self, transaction: Transaction, batch: list, asset: str):
+        """the builder selects other UTXO when the batch and the fee UTXO selected for it can not pay the fee"""
+        spent = {(vin['txid'], vin['vout']) for vin in transaction.vin}
+        if not all((utxo['txid'], utxo['vout']) in spent for utxo in batch):
+            self._release(transaction.vin)
+            raise error.NotEnoughMoney(f"can not pay the fee of merging {len(batch)} UTXO of {asset}")
+
+    @staticmethod
+    def _summarize(transaction: Transaction, tx: Tx, tx_fee_type: str) -> TxSummary:
+        fee = sum(vin['amount'] for vin in transaction.vin if vin['assets'] == tx_fee_type) - sum(
+            vout['amount'] for vout in transaction.vout if vout['assets'] == tx_fee_type)
+        return TxSummary(
+            tx=tx,
+            inputs=len(transaction.vin),
+            outputs=len(transaction.vout),
+            size=transaction.serialize_size(estimate_signature=True),
+            gas_limit=transaction.gas_limit,
+            fee=fee,
+        )
+
+    def _balances_steps(self, addresses, assets, batch_size: int, workers: int):
+        chunks = self._balance_chunks(addresses, batch_size)
+        results = yield Gather([self._balance_batch_steps(chunk) for chunk in chunks], workers)
+        assets = tuple(assets) if assets is not None else None
+        return {address: self._balance_row(rst, assets)
+                for chunk, chunk_rst in zip(chunks, results) for address, rst in zip(chunk, chunk_rst)}
+
+    def _balance_batch_steps(self, chunk: list):
+        rst = yield from self._batch_steps([("getBalance", [address]) for address in chunk])
+        for e in rst:
+            if isinstance(e, error.RPCError):
+                raise e
+        return rst
+
+    def _block_steps(self, height: int, verbose_tx=True):
+        """get the block of a height, with the transactions in detail if ``verbose_tx``"""
+        block_hash = yield from self._call_steps("getBlockHash", [height])
+        return (yield from self._call_steps("getBlock", [block_hash, True, verbose_tx]))
+
+    @staticmethod
+    def _block_window(start: int, query: _BlockQuery) -> _BlockWindow:
+        if query.prefetch < 1:
+            raise error.InvalidParams(f"prefetch should be at least 1, got {query.prefetch}")
+        return _BlockWindow(query, start)
+
+    def _next_block_steps(self, window: _BlockWindow):
+        """
+        the next block of :meth:`BulkMixin.iter_blocks`, None after the last one,
+        the block before is checkpointed and the window is filled up first
+        """
+        query = window.query
+        if window.last is not None and query.checkpoint is not None:
+            query.checkpoint(window.last['height'])
+        if window.head is None:
+            window.head = yield from self._current_height_steps()
+        yield from self._fill_window_steps(window)
+        if not window.fetches:
+            return None
+        window.last = yield Join(window.fetches.popleft())
+        return window.last
+
+    def _fill_window_steps(self, window: _BlockWindow):
+        """
+        fetch the blocks up to ``prefetch`` ahead, the chain head is checked again only once the window is empty,
+        it is left empty at the chain head unless following it
+        """
+        query = window.query
+        while len(window.fetches) < query.prefetch and (query.end is None or window.height <= query.end):
+            if window.height <= window.head:
+                window.fetches.append((yield Spawn(self._block_steps(window.height, query.verbose_tx))))
+                window.height += 1
+                continue
+            if window.fetches:
+                return
+            window.head = yield from self._current_height_steps()
+            if window.height > window.head:
+                if not query.follow:
+                    return
+                yield Sleep(query.poll_interval)
+
+    def _send_many_steps(self, payments: list, tx_fee_type, coin_selector: CoinSelector,
+                         max_size: int, max_gas: int = None):
+        rst = yield from self._payout_in_chunks_steps(payments, tx_fee_type, coin_selector, max_size, max_gas)
+        return [tx for _, tx in rst]
+
+    def _payout_in_chunks_steps(self, payments: list, tx_fee_type, coin_selector: CoinSelector,
+                                max_size: int, max_gas: int = None, dry_run=False):
+        """
+        build the payments in as few transactions as the limits allow and broadcast them one by one,
+        the transactions of a dry run are released instead
+
+        :return: list of (transaction, :class:`~asimov.data_type.Tx` object or None) pairs
+        """
+        pending = self._chunk_payments(self._normalize_payments(payments), max_size)[::-1]
+        rst = []
+        try:
+            while pending:
+                chunk = pending.pop()
+                transaction = yield from self._build_payout_steps(chunk, tx_fee_type, coin_selector=coin_selector)
+                if self._exceeds(transaction, max_size, max_gas):
+                    self._release(transaction.vin)
+                    if len(chunk) == 1:
+                        raise error.InvalidParams(
+                            f"the transaction paying {chunk[0][1]} to {chunk[0][0]} exceeds max_size or max_gas")
+                    # too many inputs are needed, try again with the halves
+                    half = len(chunk) // 2
+                    pending.extend([chunk[half:], chunk[:half]])
+                    continue
+                tx = None
+                if not dry_run:
+                    tx = yield from self._broadcast_steps(self._tx_class(self, transaction))
+                rst.append((transaction, tx))
+        finally:
+            if dry_run:
+                for transaction, _ in rst:
+                    self._release(transaction.vin)
+        return rst
+
+    def _consolidate_steps(self, asset, max_inputs: int, max_amount: int, tx_fee_type, gas_price,
+                           coin_selector: CoinSelector, dry_run: bool):
+        if max_inputs < 2:
+            raise error.InvalidParams(f"max_inputs should be at least 2, got {max_inputs}")
+        batches = yield Locked(self._reserve_batches_steps(asset, max_inputs, max_amount))
+        batches.reverse()
+        summaries = []
+        built = []
+        try:
+            while batches:
+                batch = batches.pop()
+                select_rst, fee = self._consolidation_select(batch, asset, tx_fee_type, gas_price)
+                if fee:
+                    try:
+                        select_rst = self._merge_selection(
+                            select_rst, (yield from self._select_utxo_steps({tx_fee_type: fee}, coin_selector)))
+                    except BaseException:
+                        self._release(batch)
+                        raise
+                transaction = yield from self._build_payout_steps(
+                    [], tx_fee_type, gas_price, coin_selector, select_rst=select_rst)
+                self._check_consolidation(transaction, batch, asset)
+                if dry_run:
+                    built.append(transaction)
+                    summaries.append(self._summarize(transaction, None, tx_fee_type))
+                else:
+                    tx = yield from self._broadcast_steps(self._tx_class(self, transaction))
+                    summaries.append(self._summarize(transaction, tx, tx_fee_type))
+        finally:
+            for batch in batches:
+                self._release(batch)
+            for transaction in built:
+                self._release(transaction.vin)
+        return summaries
+
+    def _reserve_batches_steps(self, asset: str, max_inputs: int, max_amount: int = None):
+        """the batches of UTXO to merge, reserved before the lock of the selection is released"""
+        index = yield from self._load_utxo_index_steps(self.address, asset)
+        batches = self._consolidation_batches(index, max_inputs, max_amount)
+        for batch in batches:
+            self._reserve(batch)
+        return batches
+
+    def _fan_out_steps(self, asset, n: int, amount: int, tx_fee_type, coin_selector: CoinSelector,
+                       max_size: int, dry_run: bool):
+        if n < 1:
+            raise error.InvalidParams(f"n should be at least 1, got {n}")
+        rst = yield from self._payout_in_chunks_steps(
+            [(self.address, amount, asset)] * n, tx_fee_type, coin_selector, max_size, dry_run=dry_run)
+        return [self._summarize(transaction, tx, tx_fee_type) for transaction, tx in rst]
+
+
+class BulkMixin:
+    """
+    The bulk queries and payouts of :class:`~asimov.node.Node`, reading many addresses or blocks
+    and paying many outputs in as few requests and transactions as possible
+    """
+    def balances(self, addresses, assets=None, batch_size=200, workers=4) -> dict:
+        """
+        get the balances of many addresses, ``batch_size`` addresses are queried in one batch request
+        and at most ``workers`` batch requests are sent at the same time
+
+        :param addresses: the addresses
+        :param assets: asset types, will return the balances of all asset types held if none is given
+        :param batch_size: count of addresses in a batch request
+        :param workers: count of batch requests sent at the same time
+        :return: the balance by address and asset type, the given asset types not held by an address are 0
+
+        .. code-block:: python
+
+            >>> from asimov import Node, constant
+            >>> node = Node("http://seed.asimov.tech", pool_size=4)
+            >>> node.balances(["0x663bc0936166c07431ed04d7dc207eb7694e223ec4", "0x66..."], [constant.ASCOIN])
+            {'0x663bc0936166c07431ed04d7dc207eb7694e223ec4': {'000000000000000000000000': 100000000}, '0x66...': {...}}
+        """
+        return self._run(self._balances_steps(addresses, assets, batch_size, workers))
+
+    def iter_blocks(self, start: int, end: int = None, prefetch=8, follow=False, poll_interval=1,
+                    checkpoint=None, verbose_tx=True):
+        """
+        iterate the blocks from ``start`` to ``end`` in height order. The next ``prefetch`` blocks are fetched
+        in parallel while a block is processed, at most ``prefetch`` blocks are kept in memory.
+        It stops at the chain head, even if ``end`` is beyond it, or waits for the new blocks if ``follow``.
+
+        :param start: height of the first block
+        :param end: height of the last block, included
+        :param prefetch: count of blocks fetched ahead, at least 1, use a node with a ``pool_size`` at least as large
+        :param follow: wait for the new blocks once the chain head is reached
+        :param poll_interval: seconds to wait before checking the chain head again when following it
+        :param checkpoint: called with the height of a block after it is processed,
+            store it to resume from the next height after a restart
+        :param verbose_tx: get the transactions of a block in detail, only their ids otherwise
+        :return: a generator of the blocks
+
+        .. code-block:: python
+
+            >>> from asimov import Node
+            >>> node = Node("http://seed.asimov.tech", pool_size=16)
+            >>> for block in node.iter_blocks(load_height() + 1, prefetch=16, follow=True, checkpoint=save_height):
+            ...     index(block)
+        """
+        window = self._block_window(start, _BlockQuery(end, prefetch, follow, poll_interval, checkpoint, verbose_tx))
+        return self._iter_blocks(window)
+
+    def _iter_blocks(self, window: _BlockWindow):
+        executor = ThreadPoolExecutor(window.query.prefetch)
+        try:
+            block = self._run(self._next_block_steps(window), executor)
+            while block is not None:
+                yield block
+                block = self._run(self._next_block_steps(window), executor)
+        finally:
+            window.cancel()
+            executor.shutdown(wait=False)
+
+    def send_many(self, payments: list, tx_fee_type=constant.ASCOIN, coin_selector: CoinSelector = None,
+                  max_size: int = 100000, max_gas: int = None) -> list:
+        """
+        pay to many addresses with as few transactions as possible, every transaction has many outputs
+        and one change output of every asset type.
+        The payments are split into more transactions if one transaction would exceed ``max_size`` or ``max_gas``,
+        :class:`~asimov.error.InvalidParams` is raised if a single payment still exceeds them.
+        The transactions are broadcast one by one, an error stops the rest.
+
+        :param payments: list of (address, asset value, asset type) tuples, asset type can be omitted for asim
+        :param tx_fee_type: transaction fee type
+        :param coin_selector: the coin selection strategy of the transactions, default is the one of the node
+        :param max_size: max signed size in bytes of a transaction
+        :param max_gas: max gas limit of a transaction, not limited if not given
+        :return: list of the :class:`~asimov.data_type.Tx` objects
+
+        .. code-block:: python
+
+            >>> from asimov import Node, constant
+            >>> node = Node("http://seed.asimov.tech", private_key)
+            >>> node.send_many([
+                    ("0x663bc0936166c07431ed04d7dc207eb7694e223ec4", 10),
+                    ("0x66e3054b411051da5492aec7a823b00cb3add772d7", 20, constant.ASCOIN),
+                ])
+            [[id: 91c4645bcf3680c699a591632cd8769abe2973fd2de70081a6752d9781f2801b]]
+        """
+        return self._run(self._send_many_steps(payments, tx_fee_type, coin_selector, max_size, max_gas))
+
+    def consolidate(self, asset=constant.ASCOIN, max_inputs: int = 100, max_amount: int = None,
+                    tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE,
+                    coin_selector: CoinSelector = None, dry_run=False) -> list:
+        """
+        merge the small UTXO of an asset type into one UTXO per ``max_inputs`` of them,
+        from the smallest one. The transactions are broadcast one by one, an error stops the rest.
+        The fee is paid by the merged UTXO, more UTXO of the fee type are selected if they can not pay it.
+
+        :param asset: asset type of the UTXO to merge
+        :param max_inputs: max count of UTXO merged by a transaction
+        :param max_amount: only merge the UTXO not larger than it, all the UTXO if not given
+        :param tx_fee_type: transaction fee type
+        :param gas_price: gas price
+        :param coin_selector: the coin selection strategy of the fee UTXO, default is the one of the node
+        :param dry_run: build the transactions to report their size and fee without broadcasting them
+        :return: list of the :class:`~asimov.data_type.TxSummary` objects
+
+        .. code-block:: python
+
+            >>> from asimov import Node
+            >>> node = Node("http://seed.asimov.tech", private_key)
+            >>> node.consolidate(max_inputs=200, max_amount=10000, dry_run=True)
+            [TxSummary(tx=None, inputs=200, outputs=1, size=32211, gas_limit=726431, fee=72644)]
+        """
+        return self._run(self._consolidate_steps(
+            asset, max_inputs, max_amount, tx_fee_type, gas_price, coin_selector, dry_run))
+
+    def fan_out(self, asset, n: int, amount: int, tx_fee_type=constant.ASCOIN, coin_selector: CoinSelector = None,
+                max_size: int = 100000, dry_run=False) -> list:
+        """
+        split the balance of an asset type into ``n`` UTXO of ``amount`` each, so as many transactions
+        can be sent in parallel without waiting for the change of each other.
+        It is split into more transactions if one would exceed ``max_size``.
+
+        :param asset: asset type to split
+        :param n: count of UTXO to create
+        :param amount: asset value of every UTXO
+        :param tx_fee_type: transaction fee type
+        :param coin_selector: the coin selection strategy of the transactions, default is the one of the node
+        :param max_size: max signed size in bytes of a transaction
+        :param dry_run: build the transactions to report their size and fee without broadcasting them
+        :return: list of the :class:`~asimov.data_type.TxSummary` objects
+
+        .. code-block:: python
+
+            >>> from asimov import Node, constant
+            >>> node = Node("http://seed.asimov.tech", private_key)
+            >>> node.fan_out(constant.ASCOIN, 50, 10000000)
+            [TxSummary(tx=[id: 91c4...], inputs=1, outputs=51, size=2245, gas_limit=97145, fee=9715)]
+        """
+        return self._run(self._fan_out_steps(asset, n, amount, tx_fee_type, coin_selector, max_size, dry_run))
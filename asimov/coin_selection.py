@@ -0,0 +1,215 @@
+import random
+
+from .utxo import UtxoIndex
+
+
+class CoinSelector:
+    """
+    Base class of the coin selection strategies.
+
+    A strategy picks UTXO from a :class:`~asimov.utxo.UtxoIndex` to cover an amount of one asset type.
+    Pass it to :class:`~asimov.node.Node` to use it for every transaction, or to a single
+    :meth:`~asimov.node.Node.send` / :meth:`~asimov.node.Node.call_write_function` call.
+
+    .. code-block:: python
+
+        >>> from asimov import Node
+        >>> from asimov.coin_selection import LargestFirst
+        >>> node = Node("http://seed.asimov.tech", private_key, coin_selector=LargestFirst())
+    """
+
+    def select(self, index: UtxoIndex, amount: int):
+        """
+        select UTXO to cover the amount
+
+        :param index: the available UTXO sorted by amount
+        :param amount: the amount to cover
+        :return: the selected UTXO, or None if the amount can not be covered
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _smallest_covering(index: UtxoIndex, amount: int):
+        """the UTXO with the smallest amount which covers ``amount`` alone"""
+        pos = index.bisect(amount)
+        return index[pos] if pos < len(index) else None
+
+
+class LargestFirst(CoinSelector):
+    """
+    Spend the largest UTXO first, which gives the fewest inputs.
+    """
+
+    def select(self, index: UtxoIndex, amount: int):
+        if index.total < amount:
+            return None
+        utxos = []
+        current_amount = 0
+        for utxo in reversed(index):
+            utxos.append(utxo)
+            current_amount += utxo['amount']
+            if current_amount >= amount:
+                break
+        # the last one picked may be replaced by a smaller UTXO covering the rest,
+        # which is never one of the larger ones picked before
+        if len(utxos) > 1:
+            rest = amount - (current_amount - utxos[-1]['amount'])
+            utxos[-1] = self._smallest_covering(index, rest)
+        return utxos
+
+
+class BranchAndBound(CoinSelector):
+    """
+    Depth first search for a set of UTXO whose sum is between ``amount`` and ``amount + cost_of_change``,
+    so that no change output is needed. Falls back to ``fallback`` if no such set is found in ``max_tries`` steps.
+
+    :param cost_of_change: the amount that may be spent over the target instead of making a change output
+    :param max_tries: the maximum search steps
+    :param fallback: the strategy used when there is no exact match, default is :class:`LargestFirst`
+    """
+
+    def __init__(self, cost_of_change: int = 0, max_tries: int = 100000, fallback: CoinSelector = None):
+        self.cost_of_change = cost_of_change
+        self.max_tries = max_tries
+        self.fallback = fallback if fallback is not None else LargestFirst()
+
+    def select(self, index: UtxoIndex, amount: int):
+        if index.total < amount:
+            return None
+        upper = amount + self.cost_of_change
+        # UTXO larger than the upper bound can not be in a match, sorted from the largest
+        candidates = [index[i] for i in range(index.bisect(upper + 1) - 1, -1, -1)]
+        values = [utxo['amount'] for utxo in candidates]
+        # remaining[i] is the sum of values[i:], used to prune branches which can not reach the target
+        remaining = [0] * (len(values) + 1)
+        for i in range(len(values) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + values[i]
+
+        selected = []
+        current = 0
+        depth = 0
+        for _ in range(self.max_tries):
+            backtrack = False
+            if current + remaining[depth] < amount or current > upper:
+                backtrack = True
+            elif current >= amount:
+                return [candidates[i] for i in selected]
+            elif depth >= len(values):
+                backtrack = True
+
+            if backtrack:
+                if not selected:
+                    break
+                # exclude the last included UTXO and try the branch without it
+                depth = selected.pop()
+                current -= values[depth]
+                depth += 1
+                # skip equivalent UTXO, the branch with the same amount is already explored
+                while depth < len(values) and values[depth] == values[depth - 1]:
+                    depth += 1
+            else:
+                selected.append(depth)
+                current += values[depth]
+                depth += 1
+        return self.fallback.select(index, amount)
+
+
+class Knapsack(CoinSelector):
+    """
+    The stochastic approximation used by bitcoin core before branch and bound.
+
+    Among the UTXO smaller than the amount, random subsets are tried to find the one with the smallest sum covering
+    the amount. The result is compared with the smallest UTXO which covers the amount alone, the closer one is taken.
+
+    :param iterations: the number of random rounds
+    :param max_candidates: only the largest ``max_candidates`` UTXO smaller than the amount take part in the search
+    :param seed: random seed, set it to get reproducible selections
+    """
+
+    def __init__(self, iterations: int = 100, max_candidates: int = 1000, seed=None):
+        self.iterations = iterations
+        self.max_candidates = max_candidates
+        self.random = random.Random(seed)
+
+    def select(self, index: UtxoIndex, amount: int):
+        if index.total < amount:
+            return None
+        pos = index.bisect(amount)
+        if pos < len(index) and index[pos]['amount'] == amount:
+            return [index[pos]]
+        lowest_larger = index[pos] if pos < len(index) else None
+
+        candidates = [index[i] for i in range(pos - 1, max(pos - 1 - self.max_candidates, -1), -1)]
+        values = [utxo['amount'] for utxo in candidates]
+        total_lower = sum(values)
+        if total_lower == amount:
+            return candidates
+        if total_lower < amount:
+            return [lowest_larger] if lowest_larger is not None else LargestFirst().select(index, amount)
+
+        best, best_value = self._approximate_best_subset(values, total_lower, amount)
+        if lowest_larger is not None and (best_value != amount and lowest_larger['amount'] <= best_value):
+            return [lowest_larger]
+        return [candidates[i] for i in range(len(candidates)) if best[i]]
+
+    def _approximate_best_subset(self, values: list, total_lower: int, amount: int):
+        best = [True] * len(values)
+        best_value = total_lower
+        for _ in range(self.iterations):
+            if best_value == amount:
+                break
+            included = [False] * len(values)
+            total = 0
+            reached = False
+            for n_pass in range(2):
+                if reached:
+                    break
+                for i, value in enumerate(values):
+                    # the first pass includes randomly, the second pass includes the rest
+                    if (n_pass == 0 and self.random.random() < 0.5) or (n_pass == 1 and not included[i]):
+                        total += value
+                        included[i] = True
+                        if total >= amount:
+                            reached = True
+                            if total < best_value:
+                                best_value = total
+                                best = included[:]
+                            total -= value
+                            included[i] = False
+        return best, best_value
+
+
+class ConsolidateDust(CoinSelector):
+    """
+    Spend the smallest UTXO first to clean up dust while sending, at most ``max_inputs`` inputs are used.
+    When the smallest ones are not enough, the last input is the smallest UTXO which covers the rest,
+    falls back to :class:`LargestFirst` if the amount can not be covered within ``max_inputs`` inputs.
+
+    :param max_inputs: the maximum count of inputs
+    """
+
+    def __init__(self, max_inputs: int = 100):
+        self.max_inputs = max(max_inputs, 1)
+
+    def select(self, index: UtxoIndex, amount: int):
+        if index.total < amount:
+            return None
+        utxos = []
+        current_amount = 0
+        for utxo in index:
+            if len(utxos) >= self.max_inputs - 1 or current_amount >= amount:
+                break
+            utxos.append(utxo)
+            current_amount += utxo['amount']
+        if current_amount >= amount:
+            return utxos
+
+        # cover the rest with one more UTXO, the picked ones take the first positions of the index.
+        # give back the largest picked one until such a UTXO is found
+        while True:
+            pos = max(index.bisect(amount - current_amount), len(utxos))
+            if pos < len(index):
+                return utxos + [index[pos]]
+            if not utxos:
+                return LargestFirst().select(index, amount)
+            current_amount -= utxos.pop()['amount']
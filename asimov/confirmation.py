@@ -0,0 +1,237 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from typing import Union
+
+from . import error
+from .constant import SUCCESS
+from .data_type import BaseTx, Tx
+
+
+logger = logging.getLogger(__name__)
+
+
+Confirmation = namedtuple("Confirmation", ["tx_id", "confirmations", "status"])
+Confirmation.__doc__ = """
+the result of a tracked transaction, ``status`` is the receipt status of a contract transaction,
+:data:`~asimov.constant.SUCCESS` for a normal transaction
+"""
+
+
+class _Pending:
+    def __init__(self, tx_id: str, is_contract_tx: bool, deadline: float):
+        self.tx_id = tx_id
+        self.is_contract_tx = is_contract_tx
+        self.deadline = deadline
+        self.confirmations = 0
+        self.future = Future()
+
+
+class _PollState:
+    """the tracked transactions by id, the ones not checked yet and the last best block height"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.unchecked = set()
+        self.height = None
+
+
+class ConfirmationTracker:
+    """
+    Wait for the confirmation of many transactions together.
+
+    The tracker polls ``getBestBlock`` and checks the pending transactions only when a new block arrives,
+    ``batch_size`` of them in a batch request, instead of polling every transaction every second
+    like :meth:`~asimov.node.Node.wait_for_confirmation`.
+
+    .. code-block:: python
+
+        >>> from asimov.confirmation import ConfirmationTracker
+        >>> tracker = ConfirmationTracker(node, confirm_num=3)
+        >>> futures = tracker.track_many([node.send(address, 10) for address in addresses])
+        >>> tracker.wait()
+        >>> [f.result().status for f in futures]
+        [1, 1, ...]
+
+    :param node: the :class:`~asimov.node.Node` object
+    :param confirm_num: confirmed block count, default is 1
+    :param poll_interval: seconds between two ``getBestBlock`` calls, default is 1 second
+    :param timeout: default time out length of a transaction, default is 60 seconds
+    :param batch_size: count of transactions checked in a batch request, default is 200
+    """
+    def __init__(self, node, confirm_num=1, poll_interval=1, timeout=60, batch_size=200):
+        self.node = node
+        self.confirm_num = confirm_num
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._state = _PollState()
+        # the background thread and its stop event
+        self._background = None
+
+    def __len__(self):
+        with self._state.lock:
+            return len(self._state.pending)
+
+    def track(self, tx: Union[Tx, str], timeout=None, is_contract_tx=False, callback=None) -> Future:
+        """
+        add a transaction to wait for
+
+        :param tx: the :class:`~asimov.data_type.Tx` object or the transaction id
+        :param timeout: time out length of the transaction, default is the timeout of the tracker
+        :param is_contract_tx: whether to get the receipt status of the transaction, \
+            taken from the Tx object if it is given
+        :param callback: called with the future once the transaction is confirmed or timed out
+        :return: a future of the :class:`Confirmation`,
+            or raising :class:`~asimov.error.ConfirmationTimeout` if it is not confirmed in time
+        """
+        if isinstance(tx, BaseTx):
+            tx_id, is_contract_tx = tx.id, tx.is_contract_tx
+        else:
+            tx_id = tx
+        timeout = self.timeout if timeout is None else timeout
+        state = self._state
+        with state.lock:
+            pending = state.pending.get(tx_id)
+            if pending is None:
+                pending = _Pending(tx_id, is_contract_tx, time.time() + timeout)
+                state.pending[tx_id] = pending
+                state.unchecked.add(tx_id)
+        if callback is not None:
+            pending.future.add_done_callback(callback)
+        return pending.future
+
+    def track_many(self, txs: list, timeout=None, callback=None) -> list:
+        """
+        add transactions to wait for
+
+        :param txs: list of :class:`~asimov.data_type.Tx` objects or transaction ids
+        :return: the futures in the same order as ``txs``
+        """
+        return [self.track(tx, timeout=timeout, callback=callback) for tx in txs]
+
+    def poll(self) -> bool:
+        """
+        check the pending transactions once, the ones tracked since the last call are always checked,
+        the others only if the best block changed
+
+        :return: true if a new block is found
+        """
+        state = self._state
+        with state.lock:
+            if not state.pending:
+                return False
+        height = self.node._get_best_block()['height']
+
+        with state.lock:
+            new_block = height != state.height
+            if new_block:
+                checking = list(state.pending.values())
+            else:
+                checking = [state.pending[tx_id] for tx_id in state.unchecked if tx_id in state.pending]
+            unchecked = set(state.unchecked)
+
+        if checking:
+            self._check(checking)
+        # the block is handled only once the check succeeds, a failed one is checked again at the next poll
+        with state.lock:
+            state.height = height
+            state.unchecked -= unchecked
+        self._expire()
+        return new_block
+
+    def _batch(self, calls: list) -> list:
+        """send the calls in batch requests of at most ``batch_size`` calls"""
+        rst = []
+        for i in range(0, len(calls), self.batch_size):
+            rst += self.node.batch(calls[i:i + self.batch_size])
+        return rst
+
+    def _check(self, checking: list):
+        rst = self._batch([("getRawTransaction", [p.tx_id, True, False]) for p in checking])
+        confirmed = []
+        for pending, raw_tx in zip(checking, rst):
+            # the transaction is not found if it is not broadcast to the node yet
+            if isinstance(raw_tx, error.RPCError) or not raw_tx:
+                continue
+            pending.confirmations = raw_tx.get("confirmations", 0)
+            if pending.confirmations >= self.confirm_num:
+                self.node._on_confirmed(pending.tx_id)
+                confirmed.append(pending)
+
+        contract_txs = [p for p in confirmed if p.is_contract_tx]
+        receipts = self._batch([("getTransactionReceipt", [p.tx_id]) for p in contract_txs])
+        status = {p.tx_id: receipt for p, receipt in zip(contract_txs, receipts)}
+
+        for pending in confirmed:
+            if not pending.is_contract_tx:
+                self._resolve(pending, result=Confirmation(pending.tx_id, pending.confirmations, SUCCESS))
+            elif isinstance(status[pending.tx_id], error.RPCError):
+                self._resolve(pending, exception=status[pending.tx_id])
+            else:
+                receipt_status = int(status[pending.tx_id]['status'], 16)
+                self._resolve(pending, result=Confirmation(pending.tx_id, pending.confirmations, receipt_status))
+
+    def _expire(self):
+        now = time.time()
+        with self._state.lock:
+            expired = [p for p in self._state.pending.values() if p.deadline <= now]
+        for pending in expired:
+            self._resolve(pending, exception=error.ConfirmationTimeout(
+                f"transaction {pending.tx_id} has {pending.confirmations} confirmations, "
+                f"{self.confirm_num} are required"))
+
+    def _resolve(self, pending: _Pending, result=None, exception=None):
+        with self._state.lock:
+            if self._state.pending.pop(pending.tx_id, None) is None:
+                return
+        if exception is not None:
+            pending.future.set_exception(exception)
+        else:
+            pending.future.set_result(result)
+
+    def wait(self, timeout=None) -> bool:
+        """
+        poll in the current thread until all the tracked transactions are resolved
+
+        :param timeout: time out length, default is to wait until the transactions time out
+        :return: true if no transaction is pending
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while len(self) > 0:
+            self.poll()
+            if len(self) == 0 or (end_time is not None and time.time() >= end_time):
+                break
+            time.sleep(self.poll_interval)
+        return len(self) == 0
+
+    def start(self):
+        """poll in a background thread, the transactions can be tracked from other threads meanwhile"""
+        if self._background is not None:
+            return
+        stopped = threading.Event()
+        thread = threading.Thread(target=self._run, args=(stopped,), name="asimov-confirmation", daemon=True)
+        self._background = thread, stopped
+        thread.start()
+
+    def stop(self):
+        """stop the background thread, the pending transactions are kept"""
+        if self._background is None:
+            return
+        thread, stopped = self._background
+        stopped.set()
+        thread.join()
+        self._background = None
+
+    def _run(self, stopped: threading.Event):
+        while not stopped.is_set():
+            try:
+                self.poll()
+            except (error.NetWorkError, error.RPCError):
+                pass
+            except Exception:  # pylint: disable=broad-except
+                # keep polling, the pending transactions would wait until their timeout otherwise
+                logger.exception("failed to poll the confirmations")
+            stopped.wait(self.poll_interval)
@@ -8,6 +8,9 @@ FAILED = 0
 
 RPC_PREFIX = 'asimov_'
 
+# the rpc error code of a transaction rejected because the mempool of the node is full
+RPC_MEMPOOL_FULL = -26
+
 
 # Xin is the smallest asset unit in Asimov, which is the same as satoshi in Bitcoin
 # Coin = 100,000,000 Xin
@@ -1,18 +1,58 @@
 import json
 import random
 import string
-import functools
 
 from eth_utils.hexadecimal import remove_0x_prefix
 
-from .data_type import SmartContract, EvmLogs, Tx
+from .data_type import SmartContract, ContractTemplate, EvmLogs, Tx, AsyncTx
 from .node import Node
 from .constant import ASCOIN, SUCCESS, TxType
-from ._utils.encode import encode_transaction_data as _encode_tx_data
-from .evm_log import EvmLogParser
+from ._utils.encode import FunctionEncoderTable
+from .evm_log import EventDecoder
 
 
-class Contract:
+class BaseContract:
+    """
+    Common base of :class:`Contract` and :class:`AsyncContract`, a contract loaded from its template.
+    """
+
+    def __init__(self, node, address: str, contract_template: ContractTemplate):
+        self.template_name = contract_template.template_name
+        self.address = address
+        self.abi = contract_template.abi
+        self.abi_json_str = json.dumps(self.abi)
+        self.node = node
+        self.encoders = FunctionEncoderTable(self.abi)
+        self.event_decoder = EventDecoder.of(self.abi)
+
+    def __str__(self):
+        return f"[address: {self.address}]"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def encode_tx_data(self, func_name, args=None) -> str:
+        """
+        encode the call data of a function in the contract
+
+        :param func_name: function name, or the function signature such as ``transfer(address,uint256)``
+        :param args: function arguments
+        :return: call data in hex string format with 0x prefix
+        """
+        return self.encoders.encode(func_name, args)
+
+    def _call_output_params(self, func_name, args) -> dict:
+        """the parameters of :meth:`~asimov.node.Node.call_write_function` to call a function in the contract"""
+        encoder = self.encoders.get(func_name, args)
+        return dict(
+            contract_address=self.address,
+            func_name=encoder.name,
+            abi=self.abi,
+            contract_tx_data=remove_0x_prefix(encoder.encode(args)),
+        )
+
+
+class Contract(BaseContract):
     """
     The primary entry point for working with smart contract.
     """
@@ -40,18 +80,7 @@ class Contract:
             address = node._calc_contract_address(tx.transaction.vin, tx.transaction.vout)
             assert tx.broadcast().check() is SUCCESS
 
-        self.template_name = contract_template.template_name
-        self.address = address
-        self.abi = contract_template.abi
-        self.abi_json_str = json.dumps(self.abi)
-        self.node: Node = node
-        self.encode_tx_data = functools.partial(_encode_tx_data, contract_abi=self.abi)
-
-    def __str__(self):
-        return f"[address: {self.address}]"
-
-    def __repr__(self):
-        return self.__str__()
+        super().__init__(node, address, contract_template)
 
     def read(self, func_name, args=None):
         """
@@ -68,11 +97,11 @@ class Contract:
             >>> contract = Contract(node, c=AsimovSolc.compile("/path/to/my/sources/example.sol")['Example'])
             >>> contract.read("readonly function name")
         """
+        encoder = self.encoders.get(func_name, args)
         return self.node._call_readonly_function(
             contract_address=self.address,
-            # pylint: disable=no-value-for-parameter
-            data=remove_0x_prefix(self.encode_tx_data(func_name, args=args)),
-            func_name=func_name,
+            data=remove_0x_prefix(encoder.encode(args)),
+            func_name=encoder.name,
             abi=self.abi_json_str
         )
 
@@ -99,10 +128,7 @@ class Contract:
             >>> tx.check()  # 1 / 0
         """
         return self.node.call_write_function(
-            contract_address=self.address,
-            params=args,
-            func_name=func_name,
-            abi=self.abi,
+            **self._call_output_params(func_name, args),
             asset_value=asset_value,
             asset_type=asset_type,
             tx_fee_type=tx_fee_type,
@@ -129,10 +155,7 @@ class Contract:
             >>> contract.vote("vote", [1]).check()
         """
         return self.node.call_write_function(
-            contract_address=self.address,
-            params=args,
-            func_name=func_name,
-            abi=self.abi,
+            **self._call_output_params(func_name, args),
             asset_type=asset_type,
             asset_value=asset_value,
             call_type=TxType.VOTE,
@@ -147,5 +170,118 @@ class Contract:
         :return: the :class:`~asimov.data_type.EvmLogs` object
         """
         receipt = self.node._get_tx_receipt(tx_id)
-        print(receipt)
-        return EvmLogParser.parse(receipt['logs'], self.abi)
+        return self.event_decoder.decode_logs(receipt['logs'])
+
+
+class AsyncContract(BaseContract):
+    """
+    The asyncio version of :class:`Contract`, working with :class:`~asimov.async_node.AsyncNode`.
+
+    Create it with :meth:`AsyncContract.create`, `read`, `execute`, `vote` and `fetch` are coroutines.
+
+    .. code-block:: python
+
+        >>> from asimov.async_node import AsyncNode
+        >>> from asimov.contract import AsyncContract
+        >>> node = AsyncNode("http://seed.asimov.tech", private_key)
+        >>> contract = await AsyncContract.create(node, "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981")
+        >>> await contract.read("readonly function name")
+    """
+
+    @classmethod
+    async def create(cls, node, address: str = None, c: SmartContract = None,
+                     template_name: str = None, args: list = None) -> 'AsyncContract':
+        """
+        load an existing contract or deploy a new one, the parameters are the same as :class:`Contract`
+
+        :return: the :class:`AsyncContract` object
+        """
+        try:
+            contract_template = await node.get_contract_template(address=address, name=template_name)
+        # pylint: disable=bare-except
+        except:
+            # create template firstly
+            assert c is not None
+            if template_name is None:
+                template_name = ''.join(random.choices(string.ascii_letters + string.digits, k=5))
+            tx_data = node.build_data_of_create_template(1, template_name, c.bytecode, c.abi, c.source)
+            create_template_tx = await (await node.call_write_function(
+                contract_tx_data=tx_data, call_type=TxType.TEMPLATE
+            )).broadcast()
+            assert await create_template_tx.check() is SUCCESS
+            contract_template = await node.get_contract_template(key=create_template_tx.id)
+
+        if address is None:
+            tx_data = node.build_data_of_deploy_contract(contract_template, args if args else [])
+            tx = await node.call_write_function(contract_tx_data=tx_data, call_type=TxType.CREATE)
+            address = await node._calc_contract_address(tx.transaction.vin, tx.transaction.vout)
+            assert await (await tx.broadcast()).check() is SUCCESS
+
+        return cls(node, address, contract_template)
+
+    async def read(self, func_name, args=None):
+        """
+        call a view/pure function in the contract and return the execution result
+
+        :param func_name: function name
+        :param args: function arguments
+        :return: the return value of the readonly function
+        """
+        encoder = self.encoders.get(func_name, args)
+        return await self.node._call_readonly_function(
+            contract_address=self.address,
+            data=remove_0x_prefix(encoder.encode(args)),
+            func_name=encoder.name,
+            abi=self.abi_json_str
+        )
+
+    async def execute(self, func_name, args=None, asset_value=0, asset_type=ASCOIN, tx_fee_type=ASCOIN) -> AsyncTx:
+        """
+        send a transaction to execute a function in the contract and
+        return the transaction object :class:`~asimov.data_type.AsyncTx` in pending status.
+
+        :param func_name: function name
+        :param args: function arguments
+        :param asset_value: the asset value to be send
+        :param asset_type: the asset type to be send
+        :param tx_fee_type: the transaction fee type
+        :return: the :class:`~asimov.data_type.AsyncTx` object
+        """
+        tx = await self.node.call_write_function(
+            **self._call_output_params(func_name, args),
+            asset_value=asset_value,
+            asset_type=asset_type,
+            tx_fee_type=tx_fee_type,
+        )
+        return await tx.broadcast()
+
+    async def vote(self, func_name, args=None, asset_value=0, asset_type=ASCOIN, tx_fee_type=ASCOIN) -> AsyncTx:
+        """
+        send a transaction to vote on a contract and
+        return the transaction object :class:`~asimov.data_type.AsyncTx` in pending status.
+
+        :param func_name: function name
+        :param args: function arguments
+        :param asset_value: the asset value to be send
+        :param asset_type: the asset type to be send
+        :param tx_fee_type: the transaction fee type
+        :return: the :class:`~asimov.data_type.AsyncTx` object
+        """
+        tx = await self.node.call_write_function(
+            **self._call_output_params(func_name, args),
+            asset_type=asset_type,
+            asset_value=asset_value,
+            call_type=TxType.VOTE,
+            tx_fee_type=tx_fee_type
+        )
+        return await tx.broadcast()
+
+    async def fetch(self, tx_id) -> EvmLogs:
+        """
+        fetch the contract execution logs in the transaction
+
+        :param tx_id: contract transaction id
+        :return: the :class:`~asimov.data_type.EvmLogs` object
+        """
+        receipt = await self.node._get_tx_receipt(tx_id)
+        return self.event_decoder.decode_logs(receipt['logs'])
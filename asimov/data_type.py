@@ -1,8 +1,8 @@
+import hashlib
 from collections import namedtuple
 from pprint import pformat
 
 from eth_utils.hexadecimal import remove_0x_prefix
-from .constant import SUCCESS, FAILED
 
 
 def __smart_contract_repr(contract):
@@ -32,15 +32,28 @@ ContractTemplate.source.__doc__ = "template source code"
 ContractTemplate.abi.__doc__ = "template abi"
 ContractTemplate.byte_code.__doc__ = "template bytecode"
 
+TxSummary = namedtuple("TxSummary", ("tx", "inputs", "outputs", "size", "gas_limit", "fee"))
+TxSummary.__doc__ = "size and fee of a transaction built by a maintenance call of the node"
+TxSummary.tx.__doc__ = "the broadcast transaction object, None in a dry run"
+TxSummary.inputs.__doc__ = "count of inputs"
+TxSummary.outputs.__doc__ = "count of outputs"
+TxSummary.size.__doc__ = "signed size in bytes"
+TxSummary.gas_limit.__doc__ = "gas limit"
+TxSummary.fee.__doc__ = "fee value in the fee asset type"
+
 
 class Account:
     """
     Asimov account, consists of private key, public key and address
     """
+    __slots__ = ("private_key", "public_key", "address", "_signing_key")
+
     def __init__(self, private_key=None, address=None, public_key=None):
         self.private_key = private_key
         self.public_key = public_key
         self.address = address
+        # the parsed keys, built when the account signs for the first time
+        self._signing_key = None
 
     def __str__(self):
         return f"[{self.private_key}, {self.address}]"
@@ -49,18 +62,33 @@ class Account:
         return self.__str__()
 
 
-class Tx:
+class BaseTx:
     """
-    The primary entry point for working with transaction object.
+    Common base of :class:`Tx` and :class:`AsyncTx`, a transaction built by a node.
     """
+    __slots__ = ("node", "transaction", "signed", "_id", "is_contract_tx")
 
     def __init__(self, node, transaction, _id=None, is_contract_tx=False):
         self.node = node
         self.transaction = transaction
-        self.signed_hex = transaction.sign().to_hex()
+        self.signed: bytes = transaction.sign().serialize()
         self._id = _id
         self.is_contract_tx = is_contract_tx
 
+    @property
+    def signed_hex(self) -> str:
+        """
+        get the signed transaction in hex string format
+        """
+        return self.signed.hex()
+
+    @property
+    def signed_id(self) -> str:
+        """
+        get the id of the signed transaction, the same as the one given by the node when it is broadcast
+        """
+        return hashlib.sha256(hashlib.sha256(self.signed).digest()).digest()[::-1].hex()
+
     def __repr__(self):
         return f"[id: {self.id}]"
 
@@ -78,22 +106,47 @@ class Tx:
         """
         self._id = _id
 
+
+class Tx(BaseTx):
+    """
+    The primary entry point for working with transaction object.
+    """
+    __slots__ = ()
+
     def check(self) -> int:
         """
         check whether a normal transaction is confirmed on chain, or a contract call is successful or not
         :return: 1 if the transaction is confirmed on chain, or the contract call is successful
         """
-        if self.is_contract_tx:
-            return self.node.check(self.id)
-        return SUCCESS if self.node.wait_for_confirmation(self.id) else FAILED
+        return self.node._tx_status(self)
 
     def broadcast(self):
         """
         broadcast the transaction
         :return:
         """
-        self._id = self.node._send_raw_trx(self.signed_hex)
-        return self
+        return self.node._broadcast(self)
+
+
+class AsyncTx(BaseTx):
+    """
+    The transaction object returned by :class:`~asimov.async_node.AsyncNode`, `check` and `broadcast` are coroutines.
+    """
+    __slots__ = ()
+
+    async def check(self) -> int:
+        """
+        check whether a normal transaction is confirmed on chain, or a contract call is successful or not
+        :return: 1 if the transaction is confirmed on chain, or the contract call is successful
+        """
+        return await self.node._tx_status(self)
+
+    async def broadcast(self):
+        """
+        broadcast the transaction
+        :return:
+        """
+        return await self.node._broadcast(self)
 
 
 class Asset:
@@ -110,6 +163,7 @@ class Asset:
     #. asset_index, 4 bytes long asset index in organization,
     the assigning rule is determined by the organization itself.
     """
+    __slots__ = ("contract", "org_id", "asset_type", "asset_index")
 
     @staticmethod
     def asset_wrapper(asset_type, org_id, asset_index) -> int:
@@ -170,14 +224,16 @@ class Asset:
 
 class EvmLog:
     """
-    contract execution log
+    contract execution log, the data and the topics are kept in bytes
     """
+    __slots__ = ("address", "block_hash", "transaction_hash", "data", "topics")
+
     def __init__(self, raw_log):
         self.address = raw_log['address']
         self.block_hash = raw_log['blockHash']
         self.transaction_hash = raw_log['transactionHash']
-        self.data = raw_log['data']
-        self.topics: [str] = raw_log['topics']
+        self.data = bytes.fromhex(remove_0x_prefix(raw_log['data']))
+        self.topics: [bytes] = [bytes.fromhex(remove_0x_prefix(topic)) for topic in raw_log['topics']]
 
 
 class EvmLogs(list):
@@ -22,7 +22,11 @@ class JsonException(_BaseException):
 
 
 class RPCError(_BaseException):
-    """rpc response error"""
+    """rpc response error, ``code`` is the JSON-RPC error code given by the rpc server"""
+
+    def __init__(self, *args, code: int = None):
+        super().__init__(*args)
+        self.code = code
 
 
 class NoAvailableKey(_BaseException):
@@ -59,3 +63,7 @@ class InvalidParams(_BaseException):
 
 class InvalidTxType(_BaseException):
     """invalid tx type"""
+
+
+class ConfirmationTimeout(_BaseException):
+    """transaction is not confirmed in time"""
@@ -1,10 +1,120 @@
 import json
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Union
 from web3 import Web3
-import eth_abi
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.registry import registry
 from .data_type import EvmLog, EvmLogs
 
 
+def _is_dynamic_type(_type: str) -> bool:
+    return _type in ('string', 'bytes') or _type.endswith(']') or _type.startswith('(')
+
+
+class _EventSpec:
+    """the names and the precompiled decoders of an event"""
+    def __init__(self, event_abi: dict):
+        self.name = event_abi['name']
+        indexed = [e for e in event_abi['inputs'] if e['indexed']]
+        not_indexed = [e for e in event_abi['inputs'] if not e['indexed']]
+        self.names = [e['name'] for e in not_indexed] + [e['name'] for e in indexed]
+        self.data_decoder = TupleDecoder(decoders=[registry.get_decoder(e['type']) for e in not_indexed])
+        # indexed values of dynamic types are stored as their keccak hash in the topic, kept as bytes
+        self.topic_decoders = [None if _is_dynamic_type(e['type']) else registry.get_decoder(e['type'])
+                               for e in indexed]
+
+    def decode(self, topics: list, data: bytes) -> dict:
+        values = list(self.data_decoder(ContextFramesBytesIO(data)))
+        for decoder, topic in zip(self.topic_decoders, topics[1:]):
+            values.append(topic if decoder is None else decoder(ContextFramesBytesIO(topic)))
+        return {
+            "name": self.name,
+            # pylint: disable=unnecessary-comprehension
+            "args": {n: v for n, v in zip(self.names, values)}
+        }
+
+
+class EventDecoder:
+    """
+    Decoder of the contract execution logs of an abi, the event topics and decoders are built once.
+
+    Get it with :meth:`of` to share the decoder of the same abi.
+
+    .. code-block:: python
+
+        >>> from asimov.evm_log import EventDecoder
+        >>> decoder = EventDecoder.of(abi)
+        >>> decoder.decode_logs(receipt['logs'])
+    """
+    _cache_size = 128
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, abi: Union[list, str]):
+        if isinstance(abi, str):
+            abi = json.loads(abi)
+        self._events = {}
+        for event in abi:
+            if event['type'] != 'event':
+                continue
+            signature = Web3.sha3(text=f"{event['name']}({','.join([_input['type'] for _input in event['inputs']])})")
+            self._events[signature.hex()[2:]] = _EventSpec(event)
+
+    @classmethod
+    def of(cls, abi: Union[list, str]) -> 'EventDecoder':
+        """
+        get the decoder of an abi, decoders are cached by the hash of the abi
+
+        :param abi: contract abi object or its json string
+        :return: the :class:`EventDecoder` object
+        """
+        abi_str = abi if isinstance(abi, str) else json.dumps(abi, sort_keys=True)
+        key = hashlib.sha256(abi_str.encode()).digest()
+        with cls._lock:
+            decoder = cls._cache.get(key)
+            if decoder is not None:
+                cls._cache.move_to_end(key)
+                return decoder
+        decoder = cls(abi)
+        with cls._lock:
+            cls._cache[key] = decoder
+            if len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        return decoder
+
+    def decode(self, raw_log: dict):
+        """
+        decode a log
+
+        :param raw_log: contract execution log
+        :return: the event name and arguments, None if the log is not an event in the abi
+        """
+        log = EvmLog(raw_log)
+        if not log.topics:
+            return None
+        spec = self._events.get(log.topics[0].hex())
+        if spec is None:
+            return None
+        return spec.decode(log.topics, log.data)
+
+    def decode_logs(self, raw_logs: list) -> EvmLogs:
+        """
+        decode logs, the logs which are not events in the abi are skipped,
+        e.g. the events of other contracts called in the transaction
+
+        :param raw_logs: contract execution logs
+        :return: parsed log list
+        """
+        logs = EvmLogs()
+        for raw_log in raw_logs:
+            log = self.decode(raw_log)
+            if log is not None:
+                logs.append(log)
+        return logs
+
+
 # https://codeburst.io/deep-dive-into-ethereum-logs-a8d2047c7371
 class EvmLogParser:
     """
@@ -12,40 +122,16 @@ class EvmLogParser:
     """
 
     @classmethod
-    def parse(cls, raw_log: Union[dict, list], abi: Union[dict, str]) -> EvmLogs:
+    def parse(cls, raw_log: Union[dict, list], abi: Union[list, str]) -> EvmLogs:
         """
-        Parse asimov vm execution log
+        Parse asimov vm execution log, the logs which are not events in the abi are skipped
 
         :param raw_log: contract execution log
         :param abi: contract abi object in json format
         :return: parsed log list
         """
-        if isinstance(abi, str):
-            abi = json.loads(abi)
         if isinstance(raw_log, dict):
             raw_logs = [raw_log]
         else:
             raw_logs = raw_log
-
-        events = [e for e in abi if e['type'] == 'event']
-        events_hash = {}
-        for event in events:
-            signature = Web3.sha3(text=f"{event['name']}({','.join([_input['type'] for _input in event['inputs']])})")
-            events_hash[signature.hex()] = event
-        logs = EvmLogs()
-        for _raw_log in raw_logs:
-            log = EvmLog(_raw_log)
-            event_abi = events_hash[log.topics[0]]
-            indexed_types = [e['type'] for e in event_abi['inputs'] if e['indexed']]
-            indexed_names = [e['name'] for e in event_abi['inputs'] if e['indexed']]
-            types = [e['type'] for e in event_abi['inputs'] if not e['indexed']]
-            names = [e['name'] for e in event_abi['inputs'] if not e['indexed']]
-            indexed_values = [
-                eth_abi.decode_single(t, Web3.toBytes(hexstr=v)) for t, v in zip(indexed_types, log.topics[1:])]
-            values = list(eth_abi.decode_abi(types, Web3.toBytes(hexstr=log.data)))
-            logs.append({
-                "name": event_abi['name'],
-                # pylint: disable=unnecessary-comprehension
-                "args": {n: v for n, v in zip(names + indexed_names, values + indexed_values)}
-            })
-        return logs
+        return EventDecoder.of(abi).decode_logs(raw_logs)
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import threading
+from typing import Union
+
+from eth_utils.hexadecimal import remove_0x_prefix
+
+from . import error
+from .data_type import EvmLogs
+from .evm_log import EventDecoder
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    height INTEGER NOT NULL,
+    tx_id TEXT NOT NULL,
+    tx_index INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    contract TEXT NOT NULL,
+    name TEXT NOT NULL,
+    topic0 TEXT,
+    topic1 TEXT,
+    topic2 TEXT,
+    topic3 TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (tx_id, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_contract ON events (contract, name, height);
+CREATE INDEX IF NOT EXISTS events_name ON events (name, height);
+CREATE INDEX IF NOT EXISTS events_height ON events (height);
+CREATE INDEX IF NOT EXISTS events_topic1 ON events (topic1, height);
+CREATE INDEX IF NOT EXISTS events_topic2 ON events (topic2, height);
+CREATE INDEX IF NOT EXISTS events_topic3 ON events (topic3, height);
+CREATE TABLE IF NOT EXISTS contracts (
+    address TEXT PRIMARY KEY,
+    abi TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+_INSERT = "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _encode_arg(value):
+    """bytes values of the event arguments are stored as tagged hex strings"""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": value.hex()}
+    raise TypeError(f"can not store {type(value)} in the event index")
+
+
+def _decode_arg(value: dict):
+    if len(value) == 1 and "__bytes__" in value:
+        return bytes.fromhex(value["__bytes__"])
+    return value
+
+
+def _topic(topic: str) -> str:
+    return remove_0x_prefix(topic).lower()
+
+
+class EventIndex:
+    """
+    A local SQLite index of the events of contracts, decoded with the abi of every contract added to it.
+
+    The events are ingested block by block from a node with :meth:`sync`, which resumes from the last indexed
+    height, or from the receipt logs with :meth:`ingest`. :meth:`query` answers from the database only.
+
+    .. code-block:: python
+
+        >>> from asimov.indexer import EventIndex
+        >>> index = EventIndex("events.db")
+        >>> index.add_contract(contract.address, contract.abi)
+        >>> index.sync(node)
+        >>> index.query(address=contract.address, name="Transfer", from_height=1000, to_height=2000)
+        [{'name': 'Transfer', 'args': {...}, 'address': '0x63...', 'height': 1000, 'tx_id': '...', ...}, ...]
+
+    :param path: the database file, kept in memory if not given
+    """
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._decoders = {address: EventDecoder.of(abi)
+                          for address, abi in self._conn.execute("SELECT address, abi FROM contracts")}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        close the database
+        """
+        with self._lock:
+            self._conn.close()
+
+    def add_contract(self, address: str, abi: Union[list, str]):
+        """
+        decode the events of a contract with its abi from now on, the contracts are stored in the database too
+
+        :param address: contract address
+        :param abi: contract abi object or its json string
+        """
+        abi_str = abi if isinstance(abi, str) else json.dumps(abi, sort_keys=True)
+        address = address.lower()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO contracts VALUES (?, ?)", (address, abi_str))
+        self._decoders[address] = EventDecoder.of(abi_str)
+
+    @property
+    def height(self) -> int:
+        """
+        get the last height synchronized by :meth:`sync`, None if nothing is synchronized yet
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'height'").fetchone()
+        return row[0] if row is not None else None
+
+    def _rows(self, height: int, tx_id: str, tx_index: int, logs: list) -> list:
+        rows = []
+        for log_index, raw_log in enumerate(logs):
+            address = raw_log['address'].lower()
+            decoder = self._decoders.get(address)
+            if decoder is None:
+                continue
+            event = decoder.decode(raw_log)
+            if event is None:
+                continue
+            topics = [_topic(topic) for topic in raw_log['topics'][:4]]
+            topics += [None] * (4 - len(topics))
+            rows.append((height, tx_id, tx_index, log_index, address, event['name'], *topics,
+                         json.dumps(event['args'], default=_encode_arg)))
+        return rows
+
+    def ingest(self, height: int, tx_id: str, logs: list, tx_index: int = 0) -> int:
+        """
+        add the events in the logs of a transaction receipt, the logs of the contracts not added are skipped
+
+        :param height: height of the block of the transaction
+        :param tx_id: transaction id
+        :param logs: the ``logs`` of the transaction receipt
+        :param tx_index: position of the transaction in the block, which orders the events of a block
+        :return: count of the events added
+        """
+        rows = self._rows(height, tx_id, tx_index, logs)
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def sync(self, node, end: int = None, prefetch=8, follow=False, poll_interval=1) -> int:
+        """
+        ingest the blocks from the one after the last synchronized height,
+        see :meth:`~asimov.bulk.BulkMixin.iter_blocks`.
+        The events and the height of a block are committed together, an interrupted sync resumes from the block.
+
+        :param node: the :class:`~asimov.node.Node` object
+        :param end: height of the last block, stop at the chain head if not given
+        :param prefetch: count of blocks fetched ahead
+        :param follow: wait for the new blocks once the chain head is reached
+        :param poll_interval: seconds to wait before checking the chain head again when following it
+        :return: count of the events added
+        """
+        height = self.height
+        count = 0
+        for block in node.iter_blocks(0 if height is None else height + 1, end, prefetch, follow, poll_interval,
+                                      verbose_tx=False):
+            tx_ids = block.get('tx') or []
+            # a transaction which is not a contract call has no receipt, its error is returned in the batch
+            receipts = node.batch([("getTransactionReceipt", [tx_id]) for tx_id in tx_ids]) if tx_ids else []
+            rows = []
+            for tx_index, (tx_id, receipt) in enumerate(zip(tx_ids, receipts)):
+                if isinstance(receipt, dict):
+                    rows.extend(self._rows(block['height'], tx_id, tx_index, receipt.get('logs') or []))
+            with self._lock, self._conn:
+                self._conn.executemany(_INSERT, rows)
+                self._conn.execute("INSERT OR REPLACE INTO state VALUES ('height', ?)", (block['height'],))
+            count += len(rows)
+        return count
+
+    def query(self, address: str = None, name: str = None, from_height: int = None, to_height: int = None,
+              tx_id: str = None, topics: list = None, limit: int = None) -> EvmLogs:
+        """
+        get the indexed events in chain order, all the given conditions are matched
+
+        :param address: contract address
+        :param name: event name
+        :param from_height: the first height, included
+        :param to_height: the last height, included
+        :param tx_id: transaction id
+        :param topics: the indexed arguments as topic values in hex string format, None matches any value.
+            An event has at most 3 indexed arguments
+        :param limit: max count of events
+        :return: the :class:`~asimov.data_type.EvmLogs` of the events, every event has the ``name`` and ``args``
+            like :meth:`~asimov.contract.Contract.fetch`, and its ``address``, ``height``, ``tx_id`` and ``log_index``
+        """
+        if topics is not None and len(topics) > 3:
+            raise error.InvalidParams(f"an event has at most 3 indexed arguments, got {len(topics)} topics")
+        clauses = []
+        params = []
+        for column, op, value in (
+                ("contract", "=", address.lower() if address is not None else None),
+                ("name", "=", name),
+                ("height", ">=", from_height),
+                ("height", "<=", to_height),
+                ("tx_id", "=", tx_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        for idx, topic in enumerate(topics or [], 1):
+            if topic is not None:
+                clauses.append(f"topic{idx} = ?")
+                params.append(_topic(topic))
+        sql = "SELECT name, args, contract, height, tx_id, log_index FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY height, tx_index, log_index"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return EvmLogs({
+            "name": row[0],
+            "args": json.loads(row[1], object_hook=_decode_arg),
+            "address": row[2],
+            "height": row[3],
+            "tx_id": row[4],
+            "log_index": row[5],
+        } for row in rows)
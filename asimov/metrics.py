@@ -0,0 +1,261 @@
+import time
+import socket
+import threading
+import collections
+
+from . import constant
+
+
+# a record handed to the hooks, every attribute is part of what they read
+class RequestInfo:  # pylint: disable=too-many-instance-attributes
+    """
+    A JSON-RPC request sent by a node, given to the hooks of the node before it is sent and after its response.
+
+    :ivar method: the rpc method name, or ``batch`` for a batch request
+    :ivar payload: the JSON-RPC request object, or the list of them for a batch request
+    :ivar provider: the rpc server url of the last attempt
+    :ivar request_bytes: size of the request body
+    :ivar response_bytes: size of the response body, 0 if there is none
+    :ivar retries: count of the attempts sent again after a network failure
+    :ivar elapsed: seconds from the first attempt to the response, including the retries
+    :ivar error: the exception raised to the caller, None if a response is decoded
+    :ivar rpc_errors: count of the error objects in the response, see :class:`~asimov.error.RPCError`
+    """
+    __slots__ = ("method", "payload", "provider", "request_bytes", "response_bytes", "retries", "started",
+                 "elapsed", "error", "rpc_errors")
+
+    def __init__(self, payload, request_bytes: int):
+        if isinstance(payload, list):
+            self.method = "batch"
+        else:
+            self.method = payload['method'][len(constant.RPC_PREFIX):]
+        self.payload = payload
+        self.provider = None
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.retries = 0
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.error = None
+        self.rpc_errors = 0
+
+    def finish(self, json_data=None, error=None):
+        self.elapsed = time.perf_counter() - self.started
+        self.error = error
+        if isinstance(json_data, dict):
+            self.rpc_errors = int("error" in json_data)
+        elif isinstance(json_data, list):
+            self.rpc_errors = sum(1 for item in json_data if "error" in item)
+
+
+class Hook:
+    """
+    The instrumentation interface of :class:`~asimov.node.Node` and :class:`~asimov.async_node.AsyncNode`,
+    override the methods of interest. The hooks run in the thread or the event loop of the call,
+    a node without hooks does not build the :class:`RequestInfo` at all.
+    An exception raised by a hook is logged, it does not change the outcome of the request.
+
+    .. code-block:: python
+
+        >>> class SlowCalls(Hook):
+        ...     def after_response(self, info):
+        ...         if info.elapsed > 1:
+        ...             logging.warning("%s took %.1f seconds", info.method, info.elapsed)
+        >>> node = Node("http://seed.asimov.tech", hooks=[SlowCalls()])
+    """
+    def before_request(self, info: RequestInfo):
+        """
+        called before the first attempt of a request
+
+        :param info: the request
+        """
+
+    def after_response(self, info: RequestInfo):
+        """
+        called once the response of a request is decoded, or the request failed
+
+        :param info: the request with its response
+        """
+
+
+class _MethodStats:
+    __slots__ = ("count", "latency_sum", "latencies", "request_bytes", "response_bytes", "retries", "errors")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latencies = collections.deque(maxlen=window)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.errors = collections.Counter()
+
+
+def _quantile(values: list, q: float) -> float:
+    """the nearest-rank quantile of sorted values"""
+    return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class MetricsCollector(Hook):
+    """
+    A hook collecting the latency, the body sizes, the retries and the errors of the requests by rpc method.
+    The latency quantiles are computed over the last ``window`` requests of a method.
+
+    .. code-block:: python
+
+        >>> from asimov.metrics import MetricsCollector
+        >>> metrics = MetricsCollector()
+        >>> node = Node("http://seed.asimov.tech", hooks=[metrics])
+        >>> node.balance()
+        >>> metrics.snapshot()['getBalance']
+        {'count': 1, 'p50': 0.012, 'p95': 0.012, 'p99': 0.012, 'latency_sum': 0.012, 'request_bytes': 98, ...}
+        >>> print(metrics.prometheus())
+
+    :param window: count of the latest latencies kept for every method
+    """
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def after_response(self, info: RequestInfo):
+        with self._lock:
+            stats = self._methods.get(info.method)
+            if stats is None:
+                stats = self._methods[info.method] = _MethodStats(self.window)
+            stats.count += 1
+            stats.latency_sum += info.elapsed
+            stats.latencies.append(info.elapsed)
+            stats.request_bytes += info.request_bytes
+            stats.response_bytes += info.response_bytes
+            stats.retries += info.retries
+            if info.error is not None:
+                stats.errors[type(info.error).__name__] += 1
+            if info.rpc_errors:
+                stats.errors["RPCError"] += info.rpc_errors
+
+    def reset(self):
+        """
+        drop everything collected
+        """
+        with self._lock:
+            self._methods.clear()
+
+    def snapshot(self) -> dict:
+        """
+        get the metrics collected so far
+
+        :return: the metrics by rpc method, with the ``count`` of requests, the latency quantiles ``p50``, ``p95``
+            and ``p99`` and the ``latency_sum`` in seconds, the ``request_bytes``, ``response_bytes`` and ``retries``
+            summed, and the count of ``errors`` by exception class name
+        """
+        rst = {}
+        with self._lock:
+            for method, stats in self._methods.items():
+                latencies = sorted(stats.latencies)
+                item = {"count": stats.count}
+                for q in self.quantiles:
+                    item[f"p{int(q * 100)}"] = _quantile(latencies, q)
+                item.update({
+                    "latency_sum": stats.latency_sum,
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                    "retries": stats.retries,
+                    "errors": dict(stats.errors),
+                })
+                rst[method] = item
+        return rst
+
+    def prometheus(self, prefix: str = "asimov_rpc") -> str:
+        """
+        export the metrics in the Prometheus text format, to be served on a ``/metrics`` endpoint
+
+        :param prefix: prefix of the metric names
+        :return: the metrics text
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_latency_seconds latency of the rpc requests",
+            f"# TYPE {prefix}_latency_seconds summary",
+        ]
+        for method, item in snapshot.items():
+            method = _label(method)
+            for q in self.quantiles:
+                lines.append(f'{prefix}_latency_seconds{{method="{method}",quantile="{q}"}} {item[f"p{int(q * 100)}"]}')
+            lines.append(f'{prefix}_latency_seconds_sum{{method="{method}"}} {item["latency_sum"]}')
+            lines.append(f'{prefix}_latency_seconds_count{{method="{method}"}} {item["count"]}')
+        for name, key, help_text in (
+                ("request_bytes_total", "request_bytes", "size of the request bodies"),
+                ("response_bytes_total", "response_bytes", "size of the response bodies"),
+                ("retries_total", "retries", "attempts sent again after a network failure"),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for method, item in snapshot.items():
+                lines.append(f'{prefix}_{name}{{method="{_label(method)}"}} {item[key]}')
+        lines.append(f"# HELP {prefix}_errors_total failed requests and error objects in the responses")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for method, item in snapshot.items():
+            for error_name, count in item["errors"].items():
+                lines.append(f'{prefix}_errors_total{{method="{_label(method)}",error="{_label(error_name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class StatsdHook(Hook):
+    """
+    A hook sending the metrics of every request to a StatsD server over UDP, a lost packet is not reported.
+
+    .. code-block:: python
+
+        >>> from asimov.metrics import StatsdHook
+        >>> node = Node("http://seed.asimov.tech", hooks=[StatsdHook("127.0.0.1", 8125)])
+
+    :param host: StatsD server host
+    :param port: StatsD server port
+    :param prefix: prefix of the metric names, followed by the rpc method
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = "asimov.rpc"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def close(self):
+        """
+        close the socket
+        """
+        self._socket.close()
+
+    def packet(self, info: RequestInfo) -> bytes:
+        """
+        get the StatsD lines of a request
+
+        :param info: the request with its response
+        :return: the packet
+        """
+        name = f"{self.prefix}.{info.method}"
+        lines = [
+            f"{name}.latency:{info.elapsed * 1000:.3f}|ms",
+            f"{name}.requests:1|c",
+            f"{name}.request_bytes:{info.request_bytes}|c",
+            f"{name}.response_bytes:{info.response_bytes}|c",
+        ]
+        if info.retries:
+            lines.append(f"{name}.retries:{info.retries}|c")
+        if info.error is not None:
+            lines.append(f"{name}.errors.{type(info.error).__name__}:1|c")
+        if info.rpc_errors:
+            lines.append(f"{name}.errors.RPCError:{info.rpc_errors}|c")
+        return "\n".join(lines).encode()
+
+    def after_response(self, info: RequestInfo):
+        try:
+            self._socket.sendto(self.packet(info), self.address)
+        except OSError:
+            pass
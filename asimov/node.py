@@ -1,36 +1,99 @@
 import json
 import time
+import logging
+import threading
 import copy
 import math
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 import requests
+import requests.adapters
 from eth_utils.address import remove_0x_prefix
 from web3 import Web3
 
-from .data_type import Account, Tx, ContractTemplate
+from .data_type import Account, BaseTx, Tx, ContractTemplate
 from .account import AccountFactory
 from . import error
 from . import constant
 from ._utils.encode import AsimovJsonEncoder, encode_transaction_data, encode_params
 from ._utils.common import dict_add
 from .transactions import Transaction
+from .utxo import UtxoCache, UtxoMixin, _InFlight
+from .coin_selection import CoinSelector
+from .template_cache import TemplateCache
+from .metrics import RequestInfo
+from .bulk import BulkStepsMixin, BulkMixin
+from ._utils.effects import Http, Sleep, Locked, Gather, Spawn
 
 
-bytes_per_input = 148
+logger = logging.getLogger(__name__)
+
 gas_per_byte = 21
 
+# JSON-RPC request ids, unique within the process
+_request_ids = itertools.count(1)
+
+# rpc methods without side effects on the node, they are safe to be sent again after a network failure
+_IDEMPOTENT_PREFIXES = ("get", "calculate", "callReadOnlyFunction", "runTransaction")
+
+# http status codes of a server which is temporarily unavailable
+_RETRY_STATUS = (502, 503, 504)
 
-class Node:
+
+class NodeOptions:
     """
-    A wrapped object for asimov node
+    The rpc servers of a node and how it talks to them, see :class:`Node` for the meaning of the options.
+    They can be changed on ``node.options`` at any time, except ``pool_size`` once the node has connected.
+
+    :ivar providers: the rpc server urls, set them with :meth:`BaseNode.set_rpc_server`
+    :ivar pool_size: max count of the kept-alive connections
+    :ivar connect_timeout: seconds to wait for the connection to a rpc server
+    :ivar read_timeout: seconds to wait for the response of a rpc server
+    :ivar retries: times to retry a read-only rpc call after a network failure
+    :ivar backoff: seconds to wait before the first retry
+    :ivar hooks: the :class:`~asimov.metrics.Hook` objects
+    """
+    __slots__ = ("providers", "pool_size", "connect_timeout", "read_timeout", "retries", "backoff", "hooks")
+
+    def __init__(self, pool_size: int, connect_timeout: float, read_timeout: float, retries: int, backoff: float,
+                 hooks: list = None):
+        self.providers = []
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hooks = list(hooks or [])
+
+
+class BaseNode(UtxoMixin, BulkStepsMixin):
     """
-    def __init__(self, provider: str = None, private_key: str = None):
-        self.session = requests.session()
-        self.session.headers.update({"Content-type": "application/json"})
-        self.provider = provider
+    Common base of :class:`Node` and :class:`~asimov.async_node.AsyncNode`, holds the account and the algorithms.
+
+    An algorithm talking to the rpc server is written once as the steps ``_xxx_steps``, a generator yielding
+    the effects of :mod:`asimov._utils.effects`. The subclasses run the steps by doing the io of the effects,
+    with blocking calls in :class:`Node` and as coroutines in :class:`~asimov.async_node.AsyncNode`.
+    The steps of the UTXO are in :class:`~asimov.utxo.UtxoMixin`, the bulk ones in :class:`~asimov.bulk.BulkStepsMixin`.
+    """
+    # class of the transaction objects returned by the node
+    _tx_class = Tx
+
+    def __init__(self, provider: Union[str, list] = None, private_key: str = None, utxo_cache: UtxoCache = None,
+                 coin_selector: CoinSelector = None, template_cache: TemplateCache = None, pool_size: int = 10,
+                 connect_timeout: float = 10, read_timeout: float = 60, retries: int = 3, backoff: float = 0.5,
+                 hooks: list = None):
+        self.options = NodeOptions(pool_size, connect_timeout, read_timeout, retries, backoff, hooks)
+        # index of the rpc server in use
+        self._provider_idx = 0
+        self.set_rpc_server(provider)
         self.account: Account = AccountFactory.new(private_key)
-        self.tx: Tx = None
+        self.utxo_cache = utxo_cache
+        self.coin_selector = coin_selector
+        self.template_cache = template_cache
+        # outpoints selected for transactions which are not broadcast yet, kept in the UTXO cache if there is one
+        self._in_flight = _InFlight()
 
     def __str__(self):
         return f"node[address:{self.address}]"
@@ -38,21 +101,127 @@ class Node:
     def __repr__(self):
         return self.__str__()
 
-    def set_rpc_server(self, url: str):
+    def set_rpc_server(self, url: Union[str, list]):
         """
         set rpc server url
-        :param url: rpc server url
+        :param url: rpc server url, or a list of urls to fail over to the next one when a server is unreachable
         """
-        self.provider = url
+        if url is None:
+            self.options.providers = []
+        elif isinstance(url, str):
+            self.options.providers = [url]
+        else:
+            self.options.providers = list(url)
+        self._provider_idx = 0
+
+    @property
+    def provider(self) -> str:
+        """
+        the rpc server url in use
+        """
+        providers = self.options.providers
+        return providers[self._provider_idx] if providers else None
+
+    @provider.setter
+    def provider(self, url: Union[str, list]):
+        self.set_rpc_server(url)
+
+    def _failover(self, provider: str):
+        """switch to the next rpc server, unless another request has already switched away from ``provider``"""
+        if len(self.options.providers) > 1 and self.provider == provider:
+            self._provider_idx = (self._provider_idx + 1) % len(self.options.providers)
+
+    def _attempts(self, payload: Union[dict, list]) -> int:
+        """requests which only read from the node are retried, the others are sent only once"""
+        requests_ = payload if isinstance(payload, list) else [payload]
+        methods = [request['method'][len(constant.RPC_PREFIX):] for request in requests_]
+        if all(method.startswith(_IDEMPOTENT_PREFIXES) for method in methods):
+            return 1 + self.options.retries
+        return 1
+
+    def _retry_delay(self, attempt: int) -> float:
+        return self.options.backoff * 2 ** attempt
+
+    def _before_request(self, payload: Union[dict, list], data: str) -> RequestInfo:
+        info = RequestInfo(payload, len(data))
+        for hook in self.options.hooks:
+            try:
+                hook.before_request(info)
+            except Exception:  # pylint: disable=broad-except
+                # a failed hook never changes the outcome of the request
+                logger.exception("hook %r failed before %s", hook, info.method)
+        return info
+
+    def _after_response(self, info: RequestInfo, json_data=None, e: Exception = None):
+        info.finish(json_data, e)
+        for hook in self.options.hooks:
+            try:
+                hook.after_response(info)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("hook %r failed after %s", hook, info.method)
 
     @staticmethod
     def _to_json(method: str, params: list = None):
         if not method.startswith(constant.RPC_PREFIX):
             method = constant.RPC_PREFIX + method
-        data = {"id": int(time.time()), "jsonrpc": "2.0"}
+        data = {"id": next(_request_ids), "jsonrpc": "2.0"}
         data.update({"method": method, "params": params})
         return data
 
+    @staticmethod
+    def _parse_response(json_data: dict):
+        try:
+            if "error" in json_data:
+                raise error.RPCError(json_data['error']['message'], code=json_data['error'].get('code'))
+            return json_data['result']
+        except KeyError as e:
+            raise error.UnknownError(e)
+
+    @staticmethod
+    def _parse_batch_response(payload: list, json_data: Union[dict, list]) -> list:
+        if isinstance(json_data, dict):
+            # the server rejects the batch as a whole
+            if "error" in json_data:
+                raise error.RPCError(json_data['error']['message'], code=json_data['error'].get('code'))
+            raise error.UnknownError(json_data)
+
+        responses = {item.get('id'): item for item in json_data}
+        rst = []
+        for request in payload:
+            item = responses.get(request['id'])
+            if item is None:
+                rst.append(error.RPCError(f"no response for {request['method']}"))
+            elif "error" in item:
+                rst.append(error.RPCError(item['error']['message'], code=item['error'].get('code')))
+            else:
+                rst.append(item.get('result'))
+        return rst
+
+    @staticmethod
+    def _filter_balance(rst: list, asset) -> Union[int, list]:
+        if asset is not None:
+            rst = [e for e in rst if e['asset'] == asset]
+        if not rst:
+            return 0
+        for v in rst:
+            v['value'] = int(v['value'])
+        return rst[0]['value'] if asset is not None else rst
+
+    @staticmethod
+    def _to_contract_template(rst: dict) -> ContractTemplate:
+        return ContractTemplate(rst['template_name'], rst['category'], rst['source'],
+                                json.loads(rst['abi']), rst['byte_code'])
+
+    def _cached_template(self, address: str = None, key: str = None, name: str = None):
+        if self.template_cache is None:
+            return None
+        return self.template_cache.get(address, key, name)
+
+    def _cache_template(self, template: ContractTemplate, address: str = None, key: str = None):
+        if self.template_cache is not None:
+            # the address takes precedence over the key in the lookup, the key is not verified then
+            self.template_cache.put(template, address=address, key=None if address else key)
+
     @property
     def address(self) -> str:
         """
@@ -73,42 +242,6 @@ class Node:
         """
         self.account = AccountFactory.new(private_key)
 
-    def call(self, method: str, args: list = None):
-        """
-        call asimov rpc service
-
-        :param method: rpc function name
-        :param args: rpc function arguments
-        :return: the return value of the rpc function
-
-        .. code-block:: python
-
-            >>> from asimov import Node
-            >>> node = Node("http://seed.asimov.tech")
-            >>> node.call("getBlockChainInfo")
-            {'chain': 'devnet',
-             'blocks': 6841,
-             'bestblockhash': '329a4289a46b5e6e6a7e63744338d63d9065c264a87f17c82bf13853806cc3ef',
-             'mediantime': 1574942764,
-             'pruned': False}
-        """
-        response = None
-        try:
-            if self.provider is None:
-                raise Exception("provider is None")
-            response = self.session.post(
-                url=self.provider, data=json.dumps(self._to_json(method, args), cls=AsimovJsonEncoder))
-            json_data = response.json()
-            if "error" in json_data:
-                raise error.RPCError(json_data['error']['message'])
-            return json_data['result']
-        except json.decoder.JSONDecodeError:
-            if response:
-                raise error.NetWorkError(response.content)
-            raise error.JsonException()
-        except KeyError as e:
-            raise error.UnknownError(e)
-
     @staticmethod
     def create_contract_tx_output(address: str, amount: int, data: str, assets: str = constant.ASCOIN,
                                   contract_type=constant.TxType.CALL) -> dict:
@@ -147,6 +280,495 @@ class Node:
             "assets": assets
         }
 
+    def release(self, tx: Tx):
+        """
+        release the UTXO reserved by a transaction built by this node, call it if the transaction is not going to be
+        broadcast or is dropped by the node after the broadcast, so its inputs can be selected again
+
+        :param tx: the :class:`~asimov.data_type.Tx` object
+        """
+        self._release(tx.transaction.vin)
+
+    @staticmethod
+    def _covers_fee(select_rst: dict, asset_value, asset_type, fee_value: int, fee_type: str) -> bool:
+        """whether the selected UTXO pay both the asset value and the transaction fee"""
+        return select_rst.get(fee_type, 0) >= (asset_value if asset_type == fee_type else 0) + fee_value
+
+    @staticmethod
+    def _calc_transfer_gas(transaction: Transaction, corrected_gas=50000) -> int:
+        """
+        gas of a normal transaction computed from its signed size, without signing it or asking the rpc server
+        """
+        return transaction.serialize_size(estimate_signature=True) * gas_per_byte + corrected_gas
+
+    def _create_call_output(self, func_name, params, abi, contract_address, contract_tx_data,
+                            call_type, asset_value, asset_type) -> dict:
+        """
+        create the contract output of a contract call, encode the call data if not given
+        """
+        if call_type in (constant.TxType.TEMPLATE, constant.TxType.CREATE):
+            assert contract_tx_data is not None
+        if call_type in (constant.TxType.CALL, constant.TxType.VOTE) and contract_tx_data is None:
+            contract_tx_data = remove_0x_prefix(
+                encode_transaction_data(fn_identifier=func_name, contract_abi=abi, args=params)
+            )
+        return self.create_contract_tx_output(
+            address=contract_address,
+            amount=asset_value,
+            data=contract_tx_data,
+            assets=asset_type,
+            contract_type=call_type
+        )
+
+    @staticmethod
+    def _payout_assets(payments: list) -> dict:
+        """the total value of every asset type in the payments"""
+        return dict_add(*[{asset_type: amount} for _, amount, asset_type in payments])
+
+    def _build_payout_outputs(self, payments: list, select_rst: dict, fee_value: int, fee_type: str) -> list:
+        """
+        build the outputs of the payments, the change of every asset type goes back to the current account
+        """
+        needed_assets = dict_add(self._payout_assets(payments), {fee_type: fee_value})
+        outputs = [self.create_tx_output(address, amount, asset_type) for address, amount, asset_type in payments]
+        # 找零 output
+        for _asset_type in select_rst:
+            if select_rst[_asset_type] > needed_assets[_asset_type]:
+                outputs.append(self.create_tx_output(
+                    self.address, select_rst[_asset_type] - needed_assets[_asset_type], _asset_type))
+        return [item for item in outputs if item['amount'] > 0]
+
+    def _build_contract_outputs(self, contract_output: dict, select_rst: dict, asset_value, asset_type,
+                                fee_value: int, fee_type: str) -> list:
+        """
+        build the outputs of a contract call, the change goes back to the current account
+        """
+        outputs = [contract_output]
+        if asset_type == fee_type:
+            outputs.append(self.create_tx_output(
+                self.address, select_rst.get(asset_type, 0) - asset_value - fee_value, asset_type))
+        else:
+            outputs.extend([
+                self.create_tx_output(self.address, select_rst.get(asset_type, 0) - asset_value, asset_type),
+                self.create_tx_output(self.address, select_rst.get(fee_type, 0) - fee_value, fee_type)
+            ])
+        return [item for item in outputs if not (len(item.get("data", "")) == 0 and item['amount'] <= 0)]
+
+    @staticmethod
+    def build_data_of_deploy_contract(contract_template: ContractTemplate, params: list) -> str:
+        """
+        binary data for contract deployment transaction
+
+        :param contract_template: the :class:`~asimov.data_type.ContractTemplate` object
+        :param params: parameters of contract constructor function
+        :return: transaction data
+        """
+        category_hex_str = remove_0x_prefix(hex(contract_template.category)).zfill(4)
+        template_name_hex = bytes(contract_template.template_name, 'utf-8').hex()
+        template_name_length_hex = str(len(contract_template.template_name)).zfill(8)
+
+        params_hex = encode_params(contract_template.abi, None, constant.ContractFunType.CONSTRUCTOR, params)
+        return category_hex_str + template_name_length_hex + template_name_hex + params_hex
+
+    @staticmethod
+    def build_data_of_create_template(category, name, hex_code, abi, source="solidity source code") -> str:
+        """
+        binary data for template creation transaction
+
+        :param category: template category
+        :param name: template name
+        :param hex_code: transaction data in hex type
+        :param abi: template abi
+        :param source: template source code
+        :return: transaction data
+        """
+        MAX = 0xffff
+        if category >= MAX:
+            category = MAX
+        name_bytes: bytes = Web3.toBytes(text=name)
+        bytecode_bytes = Web3.toBytes(hexstr=hex_code)
+        if not isinstance(abi, str):
+            abi = json.dumps(abi)
+        abi_bytes: bytes = Web3.toBytes(text=abi)
+        source_bytes: bytes = Web3.toBytes(text=source)
+        return "".join([
+            category.to_bytes(2, 'big', signed=False).hex(),
+            len(name_bytes).to_bytes(4, 'big', signed=False).hex(),
+            len(bytecode_bytes).to_bytes(4, 'big', signed=False).hex(),
+            len(abi_bytes).to_bytes(4, 'big', signed=False).hex(),
+            len(source_bytes).to_bytes(4, 'big', signed=False).hex(),
+            name_bytes.hex(),
+            hex_code,
+            abi_bytes.hex(),
+            source_bytes.hex()
+        ])
+
+    @staticmethod
+    def _resume(steps, value=None, failure: BaseException = None) -> tuple:
+        """
+        continue the steps with the result of the last effect, or the exception if it failed
+
+        :return: (the next effect, None), or (None, the result of the steps) once they are finished
+        """
+        try:
+            if failure is not None:
+                return steps.throw(failure), None
+            return steps.send(value), None
+        except StopIteration as e:
+            return None, e.value
+
+    def _post_steps(self, payload: Union[dict, list]):
+        """post a JSON-RPC payload to the rpc server and return the decoded response"""
+        if self.provider is None:
+            raise Exception("provider is None")
+        data = json.dumps(payload, cls=AsimovJsonEncoder)
+        if not self.options.hooks:
+            return (yield from self._attempt_steps(payload, data))
+        info = self._before_request(payload, data)
+        try:
+            json_data = yield from self._attempt_steps(payload, data, info)
+        except Exception as e:
+            self._after_response(info, e=e)
+            raise
+        self._after_response(info, json_data)
+        return json_data
+
+    def _attempt_steps(self, payload: Union[dict, list], data: str, info: RequestInfo = None):
+        """send the request, again to the next rpc server after a network failure if it only reads from the node"""
+        attempts = self._attempts(payload)
+        for attempt in range(attempts):
+            provider = self.provider
+            last_attempt = attempt == attempts - 1
+            if info is not None:
+                info.provider, info.retries = provider, attempt
+            try:
+                status, content, decode = yield Http(provider, data)
+            except error.NetWorkError:
+                self._failover(provider)
+                if last_attempt:
+                    raise
+                yield Sleep(self._retry_delay(attempt))
+                continue
+            if status in _RETRY_STATUS and not last_attempt:
+                self._failover(provider)
+                yield Sleep(self._retry_delay(attempt))
+                continue
+            if info is not None:
+                info.response_bytes = len(content)
+            try:
+                return decode()
+            except json.decoder.JSONDecodeError:
+                if content:
+                    raise error.NetWorkError(content)
+                raise error.JsonException()
+
+    def _call_steps(self, method: str, args: list = None):
+        return self._parse_response((yield from self._post_steps(self._to_json(method, args))))
+
+    def _batch_steps(self, calls: list):
+        if not calls:
+            return []
+        payload = [self._to_json(method, args) for method, args in calls]
+        return self._parse_batch_response(payload, (yield from self._post_steps(payload)))
+
+    def _balance_steps(self, address: str, asset):
+        if address is None:
+            address = self.address
+        return self._filter_balance((yield from self._call_steps("getBalance", [address])), asset)
+
+    def _check_steps(self, tx_id: str):
+        assert (yield from self._wait_for_confirmation_steps(tx_id)) is True
+        receipt = yield from self._call_steps("getTransactionReceipt", [tx_id])
+        return int(receipt['status'], 16)
+
+    def _wait_for_confirmation_steps(self, tx_id: str, confirm_num=1, timeout=60):
+        end_time = time.time() + timeout
+        while time.time() < end_time:
+            rst = yield from self._call_steps("getRawTransaction", [tx_id, True, False])
+            if rst.get("confirmations", 0) >= confirm_num:
+                self._on_confirmed(tx_id)
+                return True
+            yield Sleep(1)
+        return False
+
+    def _tx_status_steps(self, tx: BaseTx):
+        """the status of a transaction once it is confirmed, see :meth:`~asimov.data_type.Tx.check`"""
+        if tx.is_contract_tx:
+            return (yield from self._check_steps(tx.id))
+        return constant.SUCCESS if (yield from self._wait_for_confirmation_steps(tx.id)) else constant.FAILED
+
+    def _broadcast_steps(self, tx: BaseTx):
+        try:
+            tx.id = yield from self._call_steps("sendRawTransaction", [tx.signed_hex])
+        except BaseException:
+            self._on_broadcast_failed(tx)
+            raise
+        self._on_broadcast(tx)
+        return tx
+
+    def _current_height_steps(self):
+        return (yield from self._call_steps("getBestBlock"))['height']
+
+    def _calc_contract_address_steps(self, inputs: list, outputs: list):
+        outputs = copy.deepcopy(outputs)
+        for output in outputs:
+            output['amount'] = str(output['amount'])
+        return (yield from self._call_steps("calculateContractAddress", [inputs, outputs]))['0']
+
+    def _get_contract_template_steps(self, address: str = None, key: str = None, name: str = None):
+        if not (address or key or name):
+            raise error.UnknownError()
+        template = self._cached_template(address=address, key=key, name=name)
+        if template is not None:
+            return template
+
+        if address:
+            name = (yield from self._call_steps("getContractTemplate", [address]))['template_name']
+            template = self._cached_template(name=name)
+        if template is None:
+            if key and not address:
+                rst = yield from self._call_steps("getContractTemplateInfoByKey", [key])
+            else:
+                rst = yield from self._call_steps("getContractTemplateInfoByName", [1, name])
+            template = self._to_contract_template(rst)
+        self._cache_template(template, address, key)
+        return template
+
+    def _call_readonly_function_steps(self, contract_address: str, data: str, func_name: str,
+                                      abi: str, caller_address: str = None):
+        if caller_address is None:
+            caller_address = self.address
+        return (yield from self._call_steps(
+            "callReadOnlyFunction", [caller_address, contract_address, data, func_name, abi]))
+
+    def _build_payout_steps(
+            self, payments: list, tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE,
+            coin_selector: CoinSelector = None, corrected_gas=50000, select_rst: dict = None
+    ):
+        """
+        build a transaction paying to many outputs,
+        spending the UTXO in ``select_rst`` selected before while they can pay the fee
+        """
+        assets = self._payout_assets(payments)
+        fee_type_value = assets.get(tx_fee_type, 0)
+        tx_fee_value = 0
+        inputs = select_rst.pop('utxos') if select_rst is not None else None
+        try:
+            while True:
+                # select again only when the UTXO selected before can not pay the fee
+                if select_rst is None or not self._covers_fee(select_rst, fee_type_value, tx_fee_type,
+                                                              tx_fee_value, tx_fee_type):
+                    if inputs is not None:
+                        self._release(inputs)
+                        inputs = None
+                    select_rst = yield from self._select_utxo_steps(
+                        dict_add(assets, {tx_fee_type: tx_fee_value}), coin_selector)
+                    inputs = select_rst.pop('utxos')
+                outputs = self._build_payout_outputs(payments, select_rst, tx_fee_value, tx_fee_type)
+                gas = self._calc_transfer_gas(Transaction(inputs, outputs), corrected_gas)
+                fee_needed = math.ceil(gas * gas_price)
+                if fee_needed <= tx_fee_value:
+                    break
+                tx_fee_value = fee_needed
+        except BaseException:
+            if inputs is not None:
+                self._release(inputs)
+            raise
+        return Transaction(inputs, outputs, gas_limit=gas)
+
+    def _transfer_steps(self, address, asset_value: int, asset_type, tx_fee_type, coin_selector: CoinSelector):
+        if asset_value < 1:
+            raise error.InvalidParams(f"value should be larger than 1, got {asset_value}")
+        transaction = yield from self._build_payout_steps(
+            [(address, asset_value, asset_type)], tx_fee_type, coin_selector=coin_selector)
+        return (yield from self._broadcast_steps(self._tx_class(self, transaction)))
+
+    def _call_write_function_steps(
+            self, func_name: str = None, params: tuple = None, abi=None, contract_address: str = constant.NullAddress,
+            contract_tx_data=None, call_type=constant.TxType.CALL, asset_value=0, asset_type=constant.ASCOIN,
+            tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE, corrected_gas=50000,
+            coin_selector: CoinSelector = None, select_rst: dict = None
+    ):
+        contract_output = self._create_call_output(
+            func_name, params, abi, contract_address, contract_tx_data, call_type, asset_value, asset_type)
+
+        # the gas is estimated by the rpc server once,
+        # then only the gas of the size changed by re-selecting UTXO is added
+        tx_fee_value = 0
+        inputs = select_rst['utxos'] if select_rst is not None else None
+        estimated = None
+        try:
+            while True:
+                if select_rst is None or not self._covers_fee(select_rst, asset_value, asset_type,
+                                                              tx_fee_value, tx_fee_type):
+                    if inputs is not None:
+                        self._release(inputs)
+                        inputs = None
+                    if call_type == constant.TxType.VOTE:
+                        select_rst = yield from self._select_vote_utxo_steps(
+                            0, asset_type, {tx_fee_type: tx_fee_value}, coin_selector)
+                    else:
+                        need_assets = dict_add({asset_type: asset_value}, {tx_fee_type: tx_fee_value})
+                        need_assets[tx_fee_type] = max([need_assets[tx_fee_type], 1])
+                        select_rst = yield from self._select_utxo_steps(need_assets, coin_selector)
+                    inputs = select_rst['utxos']
+                valid_outputs = self._build_contract_outputs(
+                    contract_output, select_rst, asset_value, asset_type, tx_fee_value, tx_fee_type)
+                tx = Transaction(inputs, valid_outputs)
+                size = tx.serialize_size(estimate_signature=True)
+                if estimated is None:
+                    gas_used = yield from self._estimate_gas_steps(tx.sign().to_hex(), inputs, corrected_gas)
+                    estimated = (gas_used, size)
+                gas = estimated[0] + (size - estimated[1]) * gas_per_byte
+                fee_needed = math.ceil(gas * gas_price)
+                if fee_needed <= tx_fee_value:
+                    break
+                tx_fee_value = fee_needed
+        except BaseException:
+            if inputs is not None:
+                self._release(inputs)
+            raise
+        return self._tx_class(self, Transaction(inputs, valid_outputs, gas_limit=gas), is_contract_tx=True)
+
+    def _estimate_gas_steps(self, tx_hex: str, inputs: list, corrected_value=50000):
+        rst = yield from self._call_steps("runTransaction", [tx_hex, inputs])
+        return rst['gasUsed'] + corrected_value
+
+
+class Node(BulkMixin, BaseNode):
+    """
+    A wrapped object for asimov node
+
+    A node can be shared by threads. The UTXO selected for a transaction are reserved until it is confirmed,
+    so transactions sent in parallel never spend the same UTXO. Give the node a :class:`~asimov.utxo.UtxoCache`
+    to also spend the change of the broadcast transactions before they are confirmed.
+    Changing the private key or the rpc server while other threads are using the node is not supported.
+    The bulk queries and payouts, e.g. :meth:`~asimov.bulk.BulkMixin.send_many`, are in :class:`~asimov.bulk.BulkMixin`.
+
+    :param provider: rpc server url
+    :param private_key: private key of the account, a new one is generated if not given
+    :param utxo_cache: an optional :class:`~asimov.utxo.UtxoCache` to keep UTXO between transactions
+    :param coin_selector: an optional :class:`~asimov.coin_selection.CoinSelector` to select UTXO for transactions,
+        UTXO are taken in the order the rpc server returns them if not given
+    :param template_cache: an optional :class:`~asimov.template_cache.TemplateCache` to keep contract templates
+    :param pool_size: max count of the kept-alive connections to a rpc server, raise it for many threads
+        sharing the node
+    :param connect_timeout: seconds to wait for the connection to a rpc server
+    :param read_timeout: seconds to wait for the response of a rpc server
+    :param retries: times to retry a read-only rpc call after a network failure, with the delay
+        ``backoff * 2 ** n`` seconds before the n-th retry. A retry goes to the next rpc server if ``provider``
+        is a list. Calls that change the node, e.g. ``sendRawTransaction``, are never retried.
+    :param backoff: seconds to wait before the first retry
+    :param hooks: :class:`~asimov.metrics.Hook` objects called before every rpc request and after its response,
+        e.g. a :class:`~asimov.metrics.MetricsCollector`
+    """
+    def __init__(self, provider: Union[str, list] = None, private_key: str = None, utxo_cache: UtxoCache = None,
+                 coin_selector: CoinSelector = None, template_cache: TemplateCache = None, pool_size: int = 10,
+                 connect_timeout: float = 10, read_timeout: float = 60, retries: int = 3, backoff: float = 0.5,
+                 hooks: list = None):
+        super().__init__(provider, private_key, utxo_cache, coin_selector, template_cache, pool_size,
+                         connect_timeout, read_timeout, retries, backoff, hooks)
+        # the connection pool is thread safe and shared by the sessions of all the threads
+        self._adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        the http session of the current thread, all of them share one connection pool
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.session()
+            session.headers.update({"Content-type": "application/json"})
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+        return session
+
+    def _run(self, steps, executor: ThreadPoolExecutor = None):
+        """run the steps of an algorithm in the current thread, ``executor`` runs the spawned ones"""
+        effect, rst = self._resume(steps)
+        while effect is not None:
+            effect, rst = self._resume(steps, *self._outcome(effect, executor))
+        return rst
+
+    def _outcome(self, effect, executor: ThreadPoolExecutor = None) -> tuple:
+        """(result, None) of an effect, or (None, exception) if it fails"""
+        try:
+            return self._do(effect, executor), None
+        except BaseException as e:  # pylint: disable=broad-except
+            return None, e
+
+    def _do(self, effect, executor: ThreadPoolExecutor = None):
+        if isinstance(effect, Http):
+            return self._http(effect.provider, effect.data)
+        if isinstance(effect, Sleep):
+            time.sleep(effect.seconds)
+            return None
+        if isinstance(effect, Locked):
+            with self._in_flight.lock:
+                return self._run(effect.steps, executor)
+        if isinstance(effect, Gather):
+            return self._gather(effect.steps, effect.limit)
+        if isinstance(effect, Spawn):
+            return executor.submit(self._run, effect.steps)
+        return effect.handle.result()
+
+    def _http(self, provider: str, data: str) -> tuple:
+        try:
+            response = self.session.post(url=provider, data=data,
+                                         timeout=(self.options.connect_timeout, self.options.read_timeout))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise error.NetWorkError(f"{provider}: {e}")
+        return response.status_code, response.content, response.json
+
+    def _gather(self, steps: list, limit: int) -> list:
+        if len(steps) > 1 and limit > 1:
+            with ThreadPoolExecutor(min(limit, len(steps))) as executor:
+                return list(executor.map(self._run, steps))
+        return [self._run(item) for item in steps]
+
+    def call(self, method: str, args: list = None):
+        """
+        call asimov rpc service
+
+        :param method: rpc function name
+        :param args: rpc function arguments
+        :return: the return value of the rpc function
+
+        .. code-block:: python
+
+            >>> from asimov import Node
+            >>> node = Node("http://seed.asimov.tech")
+            >>> node.call("getBlockChainInfo")
+            {'chain': 'devnet',
+             'blocks': 6841,
+             'bestblockhash': '329a4289a46b5e6e6a7e63744338d63d9065c264a87f17c82bf13853806cc3ef',
+             'mediantime': 1574942764,
+             'pruned': False}
+        """
+        return self._run(self._call_steps(method, args))
+
+    def batch(self, calls: list) -> list:
+        """
+        call multiple asimov rpc services in one JSON-RPC 2.0 batch request
+
+        :param calls: list of (method, args) pairs
+        :return: the return values in the same order as ``calls``,
+            a failed call is returned as an :class:`~asimov.error.RPCError` object instead of raising
+
+        .. code-block:: python
+
+            >>> from asimov import Node
+            >>> node = Node("http://seed.asimov.tech")
+            >>> node.batch([
+                    ("getBalance", ["0x663bc0936166c07431ed04d7dc207eb7694e223ec4"]),
+                    ("getTransactionReceipt", ["22afe58927c8a7d8a25f10297db4a9a936a2beb68bb9a65a1667c2bb918b623a"]),
+                ])
+            [[{'asset': '000000000000000000000000', 'value': '100000000'}], RPCError(...)]
+        """
+        return self._run(self._batch_steps(calls))
+
     def balance(self, address: str = None, asset=constant.ASCOIN) -> Union[int, dict]:
         """
         get the balance of specific address by given asset type
@@ -155,17 +777,7 @@ class Node:
         :param asset: asset type, will return balance for all asset types if none is given
         :return: balance of given asset type, or balance for all asset types
         """
-        if address is None:
-            address = self.address
-
-        rst = self.call("getBalance", [address])
-        if asset is not None:
-            rst = [e for e in rst if e['asset'] == asset]
-        if not rst:
-            return 0
-        for v in rst:
-            v['value'] = int(v['value'])
-        return rst[0]['value'] if asset is not None else rst
+        return self._run(self._balance_steps(address, asset))
 
     def _get_tx_receipt(self, tx_id: str):
         return self.call("getTransactionReceipt", [tx_id])
@@ -190,64 +802,29 @@ class Node:
             # wait tx on chain
             >>> assert tx.check() is constant.SUCCESS
         """
-        assert self.wait_for_confirmation(tx_id) is True
-        receipt = self._get_tx_receipt(tx_id)
-        return int(receipt['status'], 16)
-
-    def _get_utxo_in_page(self, address, asset, _from: int, count):
-        """
-        Get UTXO in page of a given address.
+        return self._run(self._check_steps(tx_id))
 
-        :param address: the address to get UTXO from
-        :param asset: asset type in hex string format
-        :param from: start position of the page
-        :param count: count of UTXO in the page
-        :return: UTXO of specifc address by given asset type in page
-        """
-
-        rst = self.call("getUtxoInPage", [address, asset, _from, count])['utxos']
-        return [item for item in rst if item['spendable'] is True]
+    def _tx_status(self, tx: Tx) -> int:
+        return self._run(self._tx_status_steps(tx))
 
-    def _get_utxo(self, address: str, asset=constant.ASCOIN, amount=1):
+    def _get_utxo(self, address: str, asset=constant.ASCOIN, amount=1, coin_selector: CoinSelector = None):
         """
         Get UTXO with specific asset type and amount of a given address
 
         :param address: the address to get UTXO from
         :param asset: asset type, hex string format, default value is '000000000000'
         :param amount: asset amount, default is 1
+        :param coin_selector: the coin selection strategy, default is the one of the node
         """
-        amount = max([amount, 1])
-        utxos = []
-        utxo_pool = []
-        current_amount = 0
-        idx = 0
-        while current_amount < amount:
-            _utxos = self._get_utxo_in_page(address, asset, idx, 1000)
-            if len(_utxos) == 0:
-                raise error.NotEnoughMoney(utxos)
-            _utxos = [utxo for utxo in _utxos if (utxo['txid'], utxo['vout']) not in utxo_pool]
-            total_amount = sum([utxo['amount'] for utxo in _utxos])
-            if total_amount + current_amount >= amount:
-                for utxo in _utxos:
-                    utxos.append(utxo)
-                    current_amount += utxo['amount']
-                    if current_amount >= amount:
-                        return utxos
-            else:
-                utxos.extend(_utxos)
-                utxo_pool.extend([(utxo['txid'], utxo['vout']) for utxo in _utxos])
-                current_amount += total_amount
-                idx += 1000
+        return self._run(self._get_utxo_steps(address, asset, amount, coin_selector))
 
     def _send_raw_trx(self, signed_tx: str):
         """send signed raw transaction"""
 
         return self.call("sendRawTransaction", [signed_tx])
 
-    def _get_raw_tx(self, tx_id: str, need_detail=False, need_extra=False):
-        """get raw transaction detail by transaction id"""
-
-        return self.call("getRawTransaction", [tx_id, need_detail, need_extra])
+    def _broadcast(self, tx: Tx) -> Tx:
+        return self._run(self._broadcast_steps(tx))
 
     def wait_for_confirmation(self, tx_id, confirm_num=1, timeout=60) -> bool:
         """
@@ -258,13 +835,7 @@ class Node:
         :param timeout: time out length, default is 60 seconds
         :return: true if confirmed, false otherwise
         """
-        end_time = time.time() + timeout
-        while time.time() < end_time:
-            rst = self._get_raw_tx(tx_id, True)
-            if rst.get("confirmations", 0) >= confirm_num:
-                return True
-            time.sleep(1)
-        return False
+        return self._run(self._wait_for_confirmation_steps(tx_id, confirm_num, timeout))
 
     def _get_best_block(self):
         """get the best block"""
@@ -275,7 +846,7 @@ class Node:
         """
         get the current height of chain
         """
-        return self._get_best_block()['height']
+        return self._run(self._current_height_steps())
 
     def _calc_contract_address(self, inputs: list, outputs: list):
         """
@@ -285,10 +856,7 @@ class Node:
         :param outputs: transaction outputs
         :return: contract address
         """
-        outputs = copy.deepcopy(outputs)
-        for output in outputs:
-            output['amount'] = str(output['amount'])
-        return self.call("calculateContractAddress", [inputs, outputs])['0']
+        return self._run(self._calc_contract_address_steps(inputs, outputs))
 
     def get_contract_template(self, address: str = None, key: str = None, name: str = None) -> ContractTemplate:
         """
@@ -299,17 +867,7 @@ class Node:
         :param name: template name
         :return: the :class:`~asimov.data_type.ContractTemplate` object
         """
-        if address:
-            rst = self.call("getContractTemplate", [address])
-            rst = self.call("getContractTemplateInfoByName", [1, rst['template_name']])
-        elif key:
-            rst = self.call("getContractTemplateInfoByKey", [key])
-        elif name:
-            rst = self.call("getContractTemplateInfoByName", [1, name])
-        else:
-            raise error.UnknownError()
-        return ContractTemplate(rst['template_name'], rst['category'], rst['source'],
-                                json.loads(rst['abi']), rst['byte_code'])
+        return self._run(self._get_contract_template_steps(address, key, name))
 
     def _call_readonly_function(self, contract_address: str, data: str, func_name: str,
                                 abi: str, caller_address: str = None):
@@ -322,82 +880,28 @@ class Node:
         :param abi: abi of the contract
         :param caller_address: the address to make the contract call
         """
-        if caller_address is None:
-            caller_address = self.address
-        return self.call("callReadOnlyFunction", [caller_address, contract_address, data, func_name, abi])
+        return self._run(self._call_readonly_function_steps(contract_address, data, func_name, abi, caller_address))
 
-    def _select_utxo(self, assets: dict) -> dict:
+    def _select_utxo(self, assets: dict, coin_selector: CoinSelector = None) -> dict:
         """
-        select UTXO according to given parameters
+        select UTXO according to given parameters, the selected UTXO are reserved
+        until the transaction is broadcast or released
         """
+        return self._run(self._select_utxo_steps(assets, coin_selector))
 
-        rst = dict()
-        utxos = []
-
-        for k, v in assets.items():
-            if v == 0:
-                continue
-            _utxos = self._get_utxo(self.address, k, v)
-            for _utxo in _utxos:
-                _utxo['signed_key'] = self.account
-            rst[k] = sum([_utxo['amount'] for _utxo in _utxos])
-            utxos.extend(_utxos)
-        rst['utxos'] = utxos
-
-        return rst
-
-    def _select_vote_utxo(self, vote_value: int, vote_asset_type: str, fees: dict) -> dict:
-        """select UTXO for vote transaction"""
-        assets = copy.copy(fees)
-        if vote_value == 0:
-            balance_of_vote_asset_type = self.balance(address=self.address, asset=vote_asset_type)
-            if fees.get(vote_asset_type, 0) > balance_of_vote_asset_type:
-                raise error.NotEnoughMoney(
-                    f"need {assets[vote_asset_type]}, but only have {balance_of_vote_asset_type} of {vote_asset_type}")
-            assets[vote_asset_type] = balance_of_vote_asset_type
-        else:
-            assets[vote_asset_type] = assets.get(vote_asset_type, 0) + vote_value
-        return self._select_utxo(assets)
-
-    def _build_transfer(
-            self, address, asset_value, asset_type=constant.ASCOIN,
-            tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE
+    def _build_payout(
+            self, payments: list, tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE,
+            coin_selector: CoinSelector = None, corrected_gas=50000, select_rst: dict = None
     ) -> Transaction:
         """
-        build a transaction
-        """
-        def __build_outputs(_select_rst: dict, _fee_value: int, _fee_type: str) -> list:
-            needed_assets = dict_add({asset_type: asset_value}, {_fee_type: _fee_value})
-            _outputs = [{
-                "address": address,
-                "amount": asset_value,
-                "assets": asset_type
-            }]
-            # 找零 output
-            for _asset_type in _select_rst:
-                if _select_rst[_asset_type] > needed_assets[_asset_type]:
-                    _outputs.append({
-                        "address": self.address,
-                        "amount": _select_rst[_asset_type] - needed_assets[_asset_type],
-                        "assets": _asset_type
-                    })
-            return [item for item in _outputs if item['amount'] > 0]
-
-        tx_fee_value = 0
-        while True:
-            select_rst = self._select_utxo(dict_add({asset_type: asset_value}, {tx_fee_type: tx_fee_value}))
-            inputs = select_rst.pop('utxos')
-            outputs = __build_outputs(select_rst, tx_fee_value, tx_fee_type)
-            tx = Transaction(inputs, outputs)
-            gas = self.estimate_gas(tx.sign().to_hex(), inputs)
-            tx_fee_value = math.ceil(gas * gas_price)
-            if select_rst.get(tx_fee_type, 0) >= (asset_value if asset_type == tx_fee_type else 0) + tx_fee_value:
-                outputs = __build_outputs(select_rst, tx_fee_value, tx_fee_type)
-                break
-            tx_fee_value += math.ceil(bytes_per_input * gas_per_byte * gas_price)
-        return Transaction(inputs, outputs, gas_limit=gas)
+        build a transaction paying to many outputs,
+        spending the UTXO in ``select_rst`` selected before while they can pay the fee
+        """
+        return self._run(self._build_payout_steps(
+            payments, tx_fee_type, gas_price, coin_selector, corrected_gas, select_rst))
 
-    def send(self, address, asset_value: int, asset_type=constant.ASCOIN, tx_fee_type=constant.ASCOIN) -> Tx:
+    def send(self, address, asset_value: int, asset_type=constant.ASCOIN, tx_fee_type=constant.ASCOIN,
+             coin_selector: CoinSelector = None) -> Tx:
         """
         send a normal transaction on asimov chain and return the transaction object :class:`~asimov.data_type.Tx`
 
@@ -405,6 +909,7 @@ class Node:
         :param asset_value: asset value to send
         :param asset_type: asset type to send
         :param tx_fee_type: transaction fee type
+        :param coin_selector: the coin selection strategy of this transaction, default is the one of the node
         :return: the :class:`~asimov.data_type.Tx` object
 
         .. code-block:: python
@@ -421,14 +926,13 @@ class Node:
                 )
             [id: 91c4645bcf3680c699a591632cd8769abe2973fd2de70081a6752d9781f2801b]
         """
-        if asset_value < 1:
-            raise error.InvalidParams(f"value should be larger than 1, got {asset_value}")
-        return Tx(self, self._build_transfer(address, asset_value, asset_type, tx_fee_type)).broadcast()
+        return self._run(self._transfer_steps(address, asset_value, asset_type, tx_fee_type, coin_selector))
 
     def call_write_function(
             self, func_name: str = None, params: tuple = None, abi=None, contract_address: str = constant.NullAddress,
             contract_tx_data=None, call_type=constant.TxType.CALL, asset_value=0, asset_type=constant.ASCOIN,
-            tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE, corrected_gas=50000
+            tx_fee_type=constant.ASCOIN, gas_price=constant.DEFAULT_GAS_PRICE, corrected_gas=50000,
+            coin_selector: CoinSelector = None, select_rst: dict = None
     ) -> Tx:
         """
         send a transaction to execute a method in the contract
@@ -444,68 +948,13 @@ class Node:
         :param tx_fee_type: transaction fee type
         :param gas_price: gas price
         :param corrected_gas: adjusted gas value
+        :param coin_selector: the coin selection strategy of this transaction, default is the one of the node
+        :param select_rst: UTXO selected before by ``_select_utxo``, spent while they can pay the fee
         :return: the :class:`~asimov.data_type.Tx` object
         """
-        if call_type in (constant.TxType.TEMPLATE, constant.TxType.CREATE):
-            assert contract_tx_data is not None
-        if call_type in (constant.TxType.CALL, constant.TxType.VOTE) and contract_tx_data is None:
-            contract_tx_data = remove_0x_prefix(
-                encode_transaction_data(fn_identifier=func_name, contract_abi=abi, args=params)
-            )
-        contract_output = self.create_contract_tx_output(
-            address=contract_address,
-            amount=asset_value,
-            data=contract_tx_data,
-            assets=asset_type,
-            contract_type=call_type
-        )
-
-        # estimate gas
-        tx_fee_value = 0
-        while True:
-            if call_type == constant.TxType.VOTE:
-                select_rst = self._select_vote_utxo(0, asset_type, {tx_fee_type: tx_fee_value})
-            else:
-                need_assets = dict_add({asset_type: asset_value}, {tx_fee_type: tx_fee_value})
-                need_assets[tx_fee_type] = max([need_assets[tx_fee_type], 1])
-                select_rst = self._select_utxo(need_assets)
-            inputs = select_rst['utxos']
-            outputs = [contract_output]
-            if asset_type == tx_fee_type:
-                outputs.append(self.create_tx_output(
-                    self.address,
-                    select_rst.get(asset_type, 0) - asset_value - tx_fee_value,
-                    asset_type
-                ))
-            else:
-                outputs.extend([
-                    self.create_tx_output(self.address, select_rst.get(asset_type, 0) - asset_value, asset_type),
-                    self.create_tx_output(self.address, select_rst.get(tx_fee_type, 0) - tx_fee_value, tx_fee_type)
-                ])
-            valid_outputs = [item for item in outputs if not (len(item.get("data", "")) == 0 and item['amount'] <= 0)]
-            tx = Transaction(inputs, valid_outputs)
-            gas = self.estimate_gas(tx.sign().to_hex(), inputs, corrected_gas)
-            tx_fee_value = math.ceil(gas * gas_price)
-            min_value = tx_fee_value
-            if asset_type == tx_fee_type:
-                min_value += asset_value
-            if select_rst.get(tx_fee_type, 0) >= min_value:
-                break
-            tx_fee_value += math.ceil(bytes_per_input * gas_per_byte * gas_price)
-
-        outputs = [contract_output]
-        if asset_type == tx_fee_type:
-            outputs.append(
-                self.create_tx_output(
-                    self.address, select_rst.get(asset_type, 0) - asset_value - tx_fee_value, asset_type)
-            )
-        else:
-            outputs.extend([
-                self.create_tx_output(self.address, select_rst.get(asset_type, 0) - asset_value, asset_type),
-                self.create_tx_output(self.address, select_rst.get(tx_fee_type, 0) - tx_fee_value, tx_fee_type)
-            ])
-        valid_outputs = [item for item in outputs if not (len(item.get("data", "")) == 0 and item['amount'] <= 0)]
-        return Tx(self, Transaction(select_rst['utxos'], valid_outputs, gas_limit=gas), is_contract_tx=True)
+        return self._run(self._call_write_function_steps(
+            func_name, params, abi, contract_address, contract_tx_data, call_type, asset_value, asset_type,
+            tx_fee_type, gas_price, corrected_gas, coin_selector, select_rst))
 
     def estimate_gas(self, tx_hex: str, inputs: list, corrected_value=50000):
         """
@@ -515,54 +964,4 @@ class Node:
         :param corrected_value: corrected gas value
         :return:
         """
-        rst = self.call("runTransaction", [tx_hex, inputs])
-        return rst['gasUsed'] + corrected_value
-
-    @staticmethod
-    def build_data_of_deploy_contract(contract_template: ContractTemplate, params: list) -> str:
-        """
-        binary data for contract deployment transaction
-
-        :param contract_template: the :class:`~asimov.data_type.ContractTemplate` object
-        :param params: parameters of contract constructor function
-        :return: transaction data
-        """
-        category_hex_str = remove_0x_prefix(hex(contract_template.category)).zfill(4)
-        template_name_hex = bytes(contract_template.template_name, 'utf-8').hex()
-        template_name_length_hex = str(len(contract_template.template_name)).zfill(8)
-
-        params_hex = encode_params(contract_template.abi, None, constant.ContractFunType.CONSTRUCTOR, params)
-        return category_hex_str + template_name_length_hex + template_name_hex + params_hex
-
-    @staticmethod
-    def build_data_of_create_template(category, name, hex_code, abi, source="solidity source code") -> str:
-        """
-        binary data for template creation transaction
-
-        :param category: template category
-        :param name: template name
-        :param hex_code: transaction data in hex type
-        :param abi: template abi
-        :param source: template source code
-        :return: transaction data
-        """
-        MAX = 0xffff
-        if category >= MAX:
-            category = MAX
-        name_bytes: bytes = Web3.toBytes(text=name)
-        bytecode_bytes = Web3.toBytes(hexstr=hex_code)
-        if not isinstance(abi, str):
-            abi = json.dumps(abi)
-        abi_bytes: bytes = Web3.toBytes(text=abi)
-        source_bytes: bytes = Web3.toBytes(text=source)
-        return "".join([
-            category.to_bytes(2, 'big', signed=False).hex(),
-            len(name_bytes).to_bytes(4, 'big', signed=False).hex(),
-            len(bytecode_bytes).to_bytes(4, 'big', signed=False).hex(),
-            len(abi_bytes).to_bytes(4, 'big', signed=False).hex(),
-            len(source_bytes).to_bytes(4, 'big', signed=False).hex(),
-            name_bytes.hex(),
-            hex_code,
-            abi_bytes.hex(),
-            source_bytes.hex()
-        ])
+        return self._run(self._estimate_gas_steps(tx_hex, inputs, corrected_value))
@@ -0,0 +1,102 @@
+import threading
+
+
+class Portfolio:
+    """
+    A snapshot of the balances of many addresses, kept up to date incrementally.
+
+    The first :meth:`refresh` queries every address with :meth:`~asimov.bulk.BulkMixin.balances`. The later ones
+    scan the blocks added since the last refresh and query again only the addresses paying or receiving
+    in their transactions.
+
+    .. code-block:: python
+
+        >>> from asimov import Node, constant
+        >>> from asimov.portfolio import Portfolio
+        >>> portfolio = Portfolio(Node("http://seed.asimov.tech", pool_size=8), addresses, [constant.ASCOIN])
+        >>> portfolio.refresh()
+        >>> portfolio.balances['0x663bc0936166c07431ed04d7dc207eb7694e223ec4']
+        {'000000000000000000000000': 100000000}
+        >>> portfolio.refresh()
+        {'0x663bc0936166c07431ed04d7dc207eb7694e223ec4'}
+
+    :param node: the :class:`~asimov.node.Node` object
+    :param addresses: the addresses
+    :param assets: asset types, the balances of all asset types held are kept if none is given
+    :param batch_size: count of addresses in a batch request
+    :param workers: count of batch requests sent at the same time
+    """
+    def __init__(self, node, addresses, assets=None, batch_size=200, workers=4):
+        self.node = node
+        self.balances = {}
+        self.height = None
+        self._addresses = dict.fromkeys(addresses)
+        # the parameters of Node.balances
+        self._query_params = {
+            "assets": tuple(assets) if assets is not None else None,
+            "batch_size": batch_size,
+            "workers": workers,
+        }
+        self._lock = threading.Lock()
+
+    def _query(self, addresses) -> dict:
+        return self.node.balances(addresses, **self._query_params)
+
+    def add(self, addresses):
+        """
+        keep the balances of more addresses, they are queried at once if the snapshot is taken already
+
+        :param addresses: the addresses
+        """
+        with self._lock:
+            addresses = [address for address in dict.fromkeys(addresses) if address not in self._addresses]
+            self._addresses.update(dict.fromkeys(addresses))
+            if self.height is not None and addresses:
+                self.balances.update(self._query(addresses))
+
+    def _touched(self, block: dict) -> set:
+        """the addresses of the outputs spent and created by the transactions of a verbose block"""
+        touched = set()
+        prev_outs = []
+        for tx in block.get('rawtx') or []:
+            for vout in tx.get('vout') or []:
+                touched.update(vout.get('scriptPubKey', {}).get('addresses') or [])
+            for vin in tx.get('vin') or []:
+                if 'coinbase' in vin:
+                    continue
+                if vin.get('prevOut'):
+                    touched.update(vin['prevOut'].get('addresses') or [])
+                else:
+                    prev_outs.append((vin['txid'], vin['vout']))
+        # the node does not report the spent outputs, look them up in their transactions
+        tx_ids = list(dict.fromkeys(tx_id for tx_id, _ in prev_outs))
+        if tx_ids:
+            txs = dict(zip(tx_ids, self.node.batch([("getRawTransaction", [tx_id, True, False])
+                                                     for tx_id in tx_ids])))
+            for tx_id, n in prev_outs:
+                tx = txs[tx_id]
+                if isinstance(tx, Exception):
+                    raise tx
+                touched.update(tx['vout'][n].get('scriptPubKey', {}).get('addresses') or [])
+        return touched
+
+    def refresh(self, prefetch=8) -> set:
+        """
+        bring the balances up to the chain head
+
+        :param prefetch: count of blocks fetched ahead, see :meth:`~asimov.bulk.BulkMixin.iter_blocks`
+        :return: the addresses queried
+        """
+        with self._lock:
+            # taken before querying, the blocks added meanwhile are scanned again by the next refresh
+            head = self.node.current_height
+            if self.height is None:
+                addresses = set(self._addresses)
+            else:
+                addresses = set()
+                for block in self.node.iter_blocks(self.height + 1, head, prefetch, verbose_tx=True):
+                    addresses.update(self._touched(block))
+                addresses.intersection_update(self._addresses)
+            self.balances.update(self._query(addresses))
+            self.height = head
+        return addresses
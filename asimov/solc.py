@@ -1,12 +1,142 @@
 import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from solc import compile_files
 from .data_type import SmartContract
 
 
+# the path of every import statement, e.g. import "./a.sol"; import {A as B} from "a.sol";
+_IMPORT_RE = re.compile(r'^\s*import\s[^;]*?["\']([^"\']+)["\']', re.MULTILINE)
+
+
+def _resolve_import(path: str, importer: str, remappings: list) -> str:
+    for remapping in remappings:
+        prefix, _, target = remapping.partition('=')
+        if path.startswith(prefix):
+            return target + path[len(prefix):]
+    if path.startswith(('./', '../')):
+        return os.path.join(os.path.dirname(importer), path)
+    return path
+
+
+def _read_sources(source_file: str, remappings: list) -> dict:
+    """read a source file and all the files it imports, keyed by the normalized path"""
+    sources = {}
+    pending = [source_file]
+    while pending:
+        file = os.path.normpath(pending.pop())
+        if file in sources:
+            continue
+        try:
+            with open(file, encoding="utf-8") as f:
+                sources[file] = f.read()
+        except OSError:
+            if not sources:
+                raise
+            # unresolvable here, e.g. an import path the compiler resolves by --allow-paths, the file is not cached
+            sources[file] = None
+            continue
+        pending.extend(_resolve_import(path, file, remappings) for path in _IMPORT_RE.findall(sources[file]))
+    return sources
+
+
+def _compiler_fingerprint() -> str:
+    """identify the compiler binary by its path, size and modification time, without running it"""
+    binary = os.environ.get('SOLC_BINARY', 'solc')
+    path = shutil.which(binary) or binary
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CompileCache:
+    """
+    Content addressed cache of compiled contracts, keyed by the hash of the source file, the files it imports,
+    the compiler binary and the compile arguments, so a changed source is always compiled again.
+
+    Set it with :meth:`AsimovSolc.set_compile_cache`, the compiler is not run at all when the cache hits.
+
+    .. code-block:: python
+
+        >>> from asimov import AsimovSolc
+        >>> from asimov.solc import CompileCache
+        >>> AsimovSolc.set_compile_cache(CompileCache("/tmp/asimov-solc"))
+
+    :param path: an optional directory to persist the compiled contracts in, they are kept in memory only if not given
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(sources: dict, kwargs: dict) -> str:
+        """
+        :param sources: content of the source file and the files it imports, keyed by path
+        :param kwargs: compile arguments
+        :return: the cache key in hex string format, None if the content of an import is unknown
+        """
+        if None in sources.values():
+            return None
+        h = hashlib.sha256()
+        h.update(_compiler_fingerprint().encode())
+        h.update(json.dumps(kwargs, sort_keys=True, default=str).encode())
+        for source in sources.values():
+            h.update(hashlib.sha256(source.encode()).digest())
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """
+        :return: the compiled contract objects keyed by contract name, or None if they are not cached
+        """
+        with self._lock:
+            contracts = self._entries.get(key)
+        if contracts is not None or self.path is None:
+            return contracts
+        try:
+            with open(os.path.join(self.path, key + ".json"), encoding="utf-8") as f:
+                contracts = {name: SmartContract(**c) for name, c in json.load(f).items()}
+        except (OSError, ValueError, TypeError):
+            return None
+        with self._lock:
+            self._entries[key] = contracts
+        return contracts
+
+    def put(self, key: str, contracts: dict):
+        """
+        :param key: the cache key
+        :param contracts: the compiled contract objects keyed by contract name
+        """
+        with self._lock:
+            self._entries[key] = contracts
+        if self.path is None:
+            return
+        # write to a temporary file and rename it, other processes never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding="utf-8") as f:
+                json.dump({name: c._asdict() for name, c in contracts.items()}, f)
+            os.replace(tmp, os.path.join(self.path, key + ".json"))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
 class AsimovSolc:
     """
     The primary entry point for working with solidity compiler.
     """
+    _cache: CompileCache = None
 
     @classmethod
     def set_solidity_compiler(cls, compiler_path: str) -> None:
@@ -24,6 +154,15 @@ class AsimovSolc:
         """
         os.environ['SOLC_BINARY'] = compiler_path
 
+    @classmethod
+    def set_compile_cache(cls, cache: CompileCache = None) -> None:
+        """
+        set the cache of compiled contracts, or disable it if None
+
+        :param cache: the :class:`CompileCache` object
+        """
+        cls._cache = cache
+
     @classmethod
     def compile(cls, source_file: str, **kwargs) -> dict:
         # pylint: disable=line-too-long
@@ -57,14 +196,68 @@ class AsimovSolc:
                 }
             }
         """
-        with open(source_file) as f:
-            source_code = f.read()
-        compiled_objects = compile_files([source_file], output_values=('abi', 'bin', 'ast'), **kwargs)
-        contracts = dict()
-        for key in compiled_objects:
-            contracts[key.split(':')[-1]] = SmartContract(
-                source_code,
-                compiled_objects[key]['abi'],
-                compiled_objects[key]['bin']
-            )
-        return contracts
+        return cls._compile_with_cache([source_file], kwargs)[source_file]
+
+    @classmethod
+    def compile_many(cls, source_files: list, parallel=False, max_workers=None, **kwargs) -> dict:
+        """
+        compile many solidity source files, in one compiler run or in parallel processes
+
+        :param source_files: source file paths
+        :param parallel: compile every file in its own process if true, otherwise all files in one compiler run,
+            the files found in the compile cache are not compiled either way
+        :param max_workers: max count of the processes, default is the cpu count
+        :param kwargs: the same as :meth:`compile`
+        :return: the compiled contract objects of every source file, keyed by the source file path
+
+        .. code-block:: python
+
+            >>> from asimov import AsimovSolc
+            >>> AsimovSolc.compile_many(["a.sol", "b.sol"])['a.sol']['A']
+        """
+        return cls._compile_with_cache(source_files, kwargs, parallel, max_workers)
+
+    @classmethod
+    def _compile_with_cache(cls, source_files: list, kwargs: dict, parallel=False, max_workers=None) -> dict:
+        remappings = kwargs.get('import_remappings') or []
+        rst, missed = {}, {}
+        for source_file in source_files:
+            sources = _read_sources(source_file, remappings)
+            key = cls._cache.key(sources, kwargs) if cls._cache is not None else None
+            contracts = cls._cache.get(key) if key is not None else None
+            if contracts is not None:
+                rst[source_file] = contracts
+            else:
+                missed[source_file] = (key, sources)
+
+        if not missed:
+            return rst
+        if parallel:
+            # only the files missing in the cache are sent to the processes, their results are cached here
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for compiled in executor.map(_compile_missed, [{f: m} for f, m in missed.items()],
+                                             [kwargs] * len(missed)):
+                    rst.update(compiled)
+        else:
+            rst.update(_compile_missed(missed, kwargs))
+        for source_file, (key, _) in missed.items():
+            if key is not None:
+                cls._cache.put(key, rst[source_file])
+        return {source_file: rst[source_file] for source_file in source_files}
+
+
+def _compile_missed(missed: dict, kwargs: dict) -> dict:
+    """compile the source files in one compiler run, ``missed`` maps them to their (cache key, sources)"""
+    compiled_objects = compile_files(list(missed), output_values=('abi', 'bin', 'ast'), **kwargs)
+    rst = {}
+    for source_file, (_, sources) in missed.items():
+        source_code = sources[os.path.normpath(source_file)]
+        contracts = {}
+        for name, compiled in compiled_objects.items():
+            path, _, name = name.rpartition(':')
+            # the contracts of the file and the files it imports, the same as compiling it alone
+            if len(missed) > 1 and os.path.normpath(path) not in sources:
+                continue
+            contracts[name] = SmartContract(source_code, compiled['abi'], compiled['bin'])
+        rst[source_file] = contracts
+    return rst
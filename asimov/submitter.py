@@ -0,0 +1,355 @@
+import time
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import error
+from .constant import ASCOIN, RPC_MEMPOOL_FULL, TxType
+from .data_type import Tx
+from ._utils.common import dict_add
+
+
+SubmitterStats = namedtuple(
+    "SubmitterStats",
+    ["submitted", "broadcast", "failed", "rejected", "pending", "elapsed", "throughput", "latency"]
+)
+SubmitterStats.__doc__ = """
+the counters of a :class:`Submitter`, ``rejected`` counts the broadcast attempts rejected by a full mempool,
+``throughput`` is the broadcast transactions per second since the first submission and
+``latency`` the average seconds from submission to broadcast
+"""
+
+_RetryPolicy = namedtuple("_RetryPolicy", ["retries", "backoff", "max_backoff"])
+
+
+class _Counters:
+    """the counters of a submitter, guarded by its condition"""
+    __slots__ = ("submitted", "broadcast", "failed", "rejected", "holding", "latency", "started")
+
+    def __init__(self):
+        self.submitted = 0
+        self.broadcast = 0
+        self.failed = 0
+        self.rejected = 0
+        # count of the jobs holding reserved UTXO
+        self.holding = 0
+        self.latency = 0
+        self.started = None
+
+    @property
+    def finished(self) -> int:
+        return self.broadcast + self.failed
+
+    @property
+    def pending(self) -> int:
+        return self.submitted - self.finished
+
+    def stats(self) -> SubmitterStats:
+        elapsed = time.monotonic() - self.started if self.started is not None else 0
+        return SubmitterStats(
+            submitted=self.submitted,
+            broadcast=self.broadcast,
+            failed=self.failed,
+            rejected=self.rejected,
+            pending=self.pending,
+            elapsed=elapsed,
+            throughput=self.broadcast / elapsed if elapsed else 0,
+            latency=self.latency / self.broadcast if self.broadcast else 0,
+        )
+
+
+class _Pipeline:
+    """the queues between the stages of a submitter, the pool building the transactions and the stage threads"""
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.planned = queue.Queue()
+        self.built = queue.Queue()
+        self.executor = ThreadPoolExecutor(workers)
+        self.threads = []
+        self.closed = False
+
+    def start(self, *targets):
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=f"asimov-submitter-{name}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+
+class _Job:
+    def __init__(self, kind: str, kwargs: dict, assets: dict = None):
+        self.kind = kind
+        self.kwargs = kwargs
+        # the assets selected up front, None to select them when building
+        self.assets = assets
+        self.holding = False
+        self.build = None
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class Submitter:
+    """
+    Send many transfers and contract calls from the account of one node in a pipeline.
+
+    The UTXO of every transaction are selected and reserved in submission order up front,
+    so the transactions spend disjoint inputs. The gas estimation and signing run on a pool of ``workers`` threads,
+    and one thread broadcasts the signed transactions in submission order.
+    A broadcast rejected because the mempool of the node is full holds the pipeline and is tried again
+    after ``backoff * 2 ** n`` seconds, while :meth:`transfer` and :meth:`execute` block once ``max_pending``
+    transactions are waiting. The other rejections fail the transaction at once.
+    When the broadcast fails on the network, the transaction is looked up on the node before its inputs are released,
+    they stay reserved if the node can not tell whether it got the transaction.
+
+    Give the node a :class:`~asimov.utxo.UtxoCache`, so the change of a broadcast transaction can be spent by the
+    next ones right away. A transaction waits for the ones before it when all the UTXO are reserved.
+
+    .. code-block:: python
+
+        >>> from asimov.submitter import Submitter
+        >>> from asimov.utxo import UtxoCache
+        >>> node = Node("http://seed.asimov.tech", private_key, utxo_cache=UtxoCache())
+        >>> with Submitter(node, workers=8) as submitter:
+        >>>     futures = [submitter.execute(contract, "mint", [i]) for i in range(500)]
+        >>> [f.result().id for f in futures]
+        >>> submitter.stats()
+
+    :param node: the :class:`~asimov.node.Node` object with a private key
+    :param workers: count of threads estimating and signing the transactions, default is 4
+    :param max_pending: max count of the submitted transactions not broadcast yet, default is 100
+    :param fee_budget: the fee value selected up front for every transaction,
+        the UTXO are selected again if the fee turns out larger
+    :param retries: times to broadcast a transaction rejected by a full mempool again, default is 5
+    :param backoff: seconds to wait before the first retry, doubled for every next one
+    :param max_backoff: max seconds to wait before a retry, default is 30
+    :param coin_selector: the coin selection strategy of the transactions, default is the one of the node
+    """
+    def __init__(self, node, workers=4, max_pending=100, fee_budget=100000, retries=5, backoff=1, max_backoff=30,
+                 coin_selector=None):
+        self.node = node
+        self.fee_budget = fee_budget
+        self.coin_selector = coin_selector
+        self._retry = _RetryPolicy(retries, backoff, max_backoff)
+        self._cond = threading.Condition()
+        self._counters = _Counters()
+        self._pipeline = _Pipeline(workers, max_pending)
+        self._pipeline.start(("plan", self._plan), ("broadcast", self._broadcast_in_order))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def transfer(self, address, asset_value: int, asset_type=ASCOIN, tx_fee_type=ASCOIN) -> Future:
+        """
+        submit a normal transaction
+
+        :param address: target address
+        :param asset_value: asset value to send
+        :param asset_type: asset type to send
+        :param tx_fee_type: transaction fee type
+        :return: a future of the broadcast :class:`~asimov.data_type.Tx` object
+        """
+        if asset_value < 1:
+            raise error.InvalidParams(f"value should be larger than 1, got {asset_value}")
+        return self._submit(_Job(
+            "transfer",
+            {"payments": [(address, asset_value, asset_type)], "tx_fee_type": tx_fee_type},
+            dict_add({asset_type: asset_value}, {tx_fee_type: self.fee_budget}),
+        ))
+
+    def execute(self, contract, func_name, args=None, asset_value=0, asset_type=ASCOIN, tx_fee_type=ASCOIN) -> Future:
+        """
+        submit a transaction executing a function in the contract, the same as :meth:`~asimov.contract.Contract.execute`
+
+        :param contract: the :class:`~asimov.contract.Contract` object
+        :param func_name: function name
+        :param args: function arguments
+        :param asset_value: the asset value to be send
+        :param asset_type: the asset type to be send
+        :param tx_fee_type: the transaction fee type
+        :return: a future of the broadcast :class:`~asimov.data_type.Tx` object
+        """
+        return self.call(
+            **contract._call_output_params(func_name, args),
+            asset_value=asset_value,
+            asset_type=asset_type,
+            tx_fee_type=tx_fee_type,
+        )
+
+    def call(self, **kwargs) -> Future:
+        """
+        submit a contract transaction
+
+        :param kwargs: the parameters of :meth:`~asimov.node.Node.call_write_function`
+        :return: a future of the broadcast :class:`~asimov.data_type.Tx` object
+        """
+        assets = None
+        if kwargs.get('call_type', TxType.CALL) != TxType.VOTE:
+            # a vote spends the whole balance of the asset, it is selected when it is built
+            assets = dict_add({kwargs.get('asset_type', ASCOIN): kwargs.get('asset_value', 0)},
+                              {kwargs.get('tx_fee_type', ASCOIN): self.fee_budget})
+        return self._submit(_Job("call", kwargs, assets))
+
+    def stats(self) -> SubmitterStats:
+        """
+        get the throughput counters
+
+        :return: the :class:`SubmitterStats` object
+        """
+        with self._cond:
+            return self._counters.stats()
+
+    def flush(self, timeout=None) -> bool:
+        """
+        wait until all the submitted transactions are broadcast or failed
+
+        :param timeout: max seconds to wait, wait forever if not given
+        :return: False if some transactions are still pending
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._counters.pending == 0, timeout)
+
+    def close(self):
+        """
+        broadcast the submitted transactions and stop the threads, no transaction can be submitted then
+        """
+        pipeline = self._pipeline
+        with self._cond:
+            if pipeline.closed:
+                return
+            pipeline.closed = True
+            # no job is queued after the end of the queue, see _submit
+            pipeline.planned.put(None)
+            self._cond.notify_all()
+        for thread in pipeline.threads:
+            thread.join()
+        pipeline.executor.shutdown()
+
+    def _submit(self, job: _Job) -> Future:
+        pipeline, counters = self._pipeline, self._counters
+        with self._cond:
+            # backpressure, block while too many transactions are not broadcast
+            self._cond.wait_for(lambda: pipeline.closed or counters.pending < pipeline.max_pending)
+            if pipeline.closed:
+                raise RuntimeError("the submitter is closed")
+            if counters.started is None:
+                counters.started = time.monotonic()
+            counters.submitted += 1
+            pipeline.planned.put(job)
+        return job.future
+
+    def _plan(self):
+        pipeline = self._pipeline
+        while True:
+            job = pipeline.planned.get()
+            if job is None:
+                pipeline.built.put(None)
+                return
+            try:
+                select_rst = self._select(job)
+            except BaseException as e:  # pylint: disable=broad-except
+                job.build = Future()
+                job.build.set_exception(e)
+            else:
+                job.build = pipeline.executor.submit(self._build, job, select_rst)
+            pipeline.built.put(job)
+
+    def _select(self, job: _Job):
+        counters = self._counters
+        with self._cond:
+            job.holding = True
+            counters.holding += 1
+        if job.assets is None:
+            return None
+        while True:
+            with self._cond:
+                finished = counters.finished
+            try:
+                return self.node._select_utxo(job.assets, self.coin_selector)
+            except error.NotEnoughMoney:
+                with self._cond:
+                    if counters.holding == 1:
+                        job.holding = False
+                        counters.holding -= 1
+                        raise
+                    # the UTXO are reserved by the transactions before,
+                    # select again once one of them gives its change or its inputs back
+                    self._cond.wait_for(lambda: counters.finished != finished)
+
+    def _build(self, job: _Job, select_rst: dict) -> Tx:
+        if job.kind == "transfer":
+            return Tx(self.node, self.node._build_payout(
+                **job.kwargs, coin_selector=self.coin_selector, select_rst=select_rst))
+        return self.node.call_write_function(**job.kwargs, coin_selector=self.coin_selector, select_rst=select_rst)
+
+    def _broadcast_in_order(self):
+        while True:
+            job = self._pipeline.built.get()
+            if job is None:
+                return
+            try:
+                tx = job.build.result()
+            except BaseException as e:  # pylint: disable=broad-except
+                self._finish(job, exception=e)
+                continue
+            try:
+                self._send(tx)
+            except error.NetWorkError as e:
+                self._resolve(job, tx, e)
+            except BaseException as e:  # pylint: disable=broad-except
+                self.node._on_broadcast_failed(tx)
+                self._finish(job, exception=e)
+            else:
+                self.node._on_broadcast(tx)
+                self._finish(job, tx=tx)
+
+    def _send(self, tx: Tx):
+        attempt = 0
+        while True:
+            try:
+                tx.id = self.node._send_raw_trx(tx.signed_hex)
+                return
+            except error.RPCError as e:
+                if e.code != RPC_MEMPOOL_FULL or attempt >= self._retry.retries:
+                    raise
+                with self._cond:
+                    self._counters.rejected += 1
+                # the inputs stay reserved while the transaction waits to be sent again
+                time.sleep(min(self._retry.backoff * 2 ** attempt, self._retry.max_backoff))
+                attempt += 1
+
+    def _resolve(self, job: _Job, tx: Tx, failure: error.NetWorkError):
+        """the broadcast failed on the network, the node may have got the transaction before the connection broke"""
+        tx_id = tx.signed_id
+        try:
+            self.node.call("getRawTransaction", [tx_id, True, False])
+        except error.RPCError:
+            # the node does not know the transaction, its inputs can be spent again
+            self.node._on_broadcast_failed(tx)
+            self._finish(job, exception=failure)
+        except BaseException:  # pylint: disable=broad-except
+            # still unknown, the inputs stay reserved rather than being spent twice
+            self._finish(job, exception=failure)
+        else:
+            tx.id = tx_id
+            self.node._on_broadcast(tx)
+            self._finish(job, tx=tx)
+
+    def _finish(self, job: _Job, tx: Tx = None, exception: BaseException = None):
+        counters = self._counters
+        with self._cond:
+            if job.holding:
+                counters.holding -= 1
+            if exception is None:
+                counters.broadcast += 1
+                counters.latency += time.monotonic() - job.submitted_at
+            else:
+                counters.failed += 1
+            # wakes the jobs waiting for UTXO and the submissions waiting for a slot
+            self._cond.notify_all()
+        if exception is None:
+            job.future.set_result(tx)
+        else:
+            job.future.set_exception(exception)
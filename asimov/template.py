@@ -1,13 +1,25 @@
+import asyncio
+
 from .node import Node
 from .solc import AsimovSolc
-from .data_type import SmartContract, Tx
+from .data_type import SmartContract, Tx, AsyncTx
 from .constant import ASCOIN, TxType
 
 
-class Template:
+class BaseTemplate:
+    """
+    Common base of :class:`Template` and :class:`AsyncTemplate`.
+    """
     def __init__(self, node: Node):
         self.node = node
 
+    def _build_template_data(self, source, template_name, chosen_contract) -> str:
+        compiled_contract: SmartContract = AsimovSolc.compile(source)[chosen_contract]
+        return self.node.build_data_of_create_template(
+            1, template_name, compiled_contract.bytecode, compiled_contract.abi, compiled_contract.source)
+
+
+class Template(BaseTemplate):
     def submit(self, source, template_name, chosen_contract, tx_fee_type=ASCOIN) -> Tx:
         """
         submit a new template to asimov blockchain and return the transaction object :class:`~asimov.data_type.Tx`
@@ -33,9 +45,7 @@ class Template:
             >>> tx.id
             '8414ceb0d6db9c6418cd62c022168d961e69de80f662f0cdd99669f5954955ae'
         """
-        compiled_contract: SmartContract = AsimovSolc.compile(source)[chosen_contract]
-        tx_data = self.node.build_data_of_create_template(
-            1, template_name, compiled_contract.bytecode, compiled_contract.abi, compiled_contract.source)
+        tx_data = self._build_template_data(source, template_name, chosen_contract)
         return self.node.call_write_function(
             contract_tx_data=tx_data, call_type=TxType.TEMPLATE, tx_fee_type=tx_fee_type
         ).broadcast()
@@ -77,3 +87,52 @@ class Template:
         ).broadcast()
         address = self.node._calc_contract_address(tx.transaction.vin, tx.transaction.vout)
         return tx, address
+
+
+class AsyncTemplate(BaseTemplate):
+    """
+    The asyncio version of :class:`Template`, working with :class:`~asimov.async_node.AsyncNode`.
+    """
+
+    async def submit(self, source, template_name, chosen_contract, tx_fee_type=ASCOIN) -> AsyncTx:
+        """
+        submit a new template to asimov blockchain and return the transaction object :class:`~asimov.data_type.AsyncTx`,
+        the source file is compiled in the default executor so the event loop is not blocked
+
+        :param source: smart contract source file path
+        :param template_name: template name
+        :param chosen_contract: contract name
+        :param tx_fee_type: transaction fee type
+        :return: the transaction object :class:`~asimov.data_type.AsyncTx`
+        """
+        tx_data = await asyncio.get_event_loop().run_in_executor(
+            None, self._build_template_data, source, template_name, chosen_contract)
+        tx = await self.node.call_write_function(
+            contract_tx_data=tx_data, call_type=TxType.TEMPLATE, tx_fee_type=tx_fee_type)
+        return await tx.broadcast()
+
+    async def deploy_contract(self, template_id: str, constructor_arguments=None,
+                              asset_value=0, asset_type=ASCOIN, tx_fee_type=ASCOIN) -> (AsyncTx, str):
+        """
+        deploy a contract based on a given template id and
+        return the address of the newly deployed contract on asimov blockchain and transaction object
+
+        :param template_id: template id
+        :param constructor_arguments: contract constructor arguments
+        :param asset_value: asset value to send
+        :param asset_type: asset type to send
+        :param tx_fee_type: transaction fee type
+        :return: the transaction object :class:`~asimov.data_type.AsyncTx` and the address of new contract
+        """
+        if constructor_arguments is None:
+            constructor_arguments = []
+        contract_template = await self.node.get_contract_template(key=template_id)
+        tx_data = self.node.build_data_of_deploy_contract(contract_template, constructor_arguments)
+        tx = await self.node.call_write_function(
+            contract_tx_data=tx_data, call_type=TxType.CREATE,
+            asset_value=asset_value, asset_type=asset_type,
+            tx_fee_type=tx_fee_type
+        )
+        await tx.broadcast()
+        address = await self.node._calc_contract_address(tx.transaction.vin, tx.transaction.vout)
+        return tx, address
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .data_type import ContractTemplate
+
+
+class TemplateCache:
+    """
+    Local LRU cache of contract templates, shared by the :class:`~asimov.contract.Contract` objects
+    built from a :class:`~asimov.node.Node`.
+
+    Templates are immutable once they are on chain, so the entries never expire, they are only dropped
+    when the cache is full. Templates are cached by the contract address, the template key and the template name,
+    a warm cache builds a contract without talking to the rpc server.
+
+    With ``path`` set, every template is also written to a json file in that directory, processes sharing the
+    directory load the templates from the disk instead of the rpc server.
+
+    .. code-block:: python
+
+        >>> from asimov import Node
+        >>> from asimov.template_cache import TemplateCache
+        >>> node = Node("http://seed.asimov.tech", private_key, template_cache=TemplateCache(path="/tmp/templates"))
+
+    :param maxsize: the maximum count of cached entries in memory
+    :param path: an optional directory to persist the templates in
+    """
+    def __init__(self, maxsize: int = 256, path: str = None):
+        self.maxsize = maxsize
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(address: str = None, key: str = None, name: str = None) -> tuple:
+        if address:
+            return "address", address.lower()
+        if key:
+            return "key", key
+        if name:
+            return "name", name
+        raise ValueError("one of address, key or name is required")
+
+    def _file(self, cache_key: tuple) -> str:
+        digest = hashlib.sha256(':'.join(cache_key).encode()).hexdigest()
+        return os.path.join(self.path, digest + ".json")
+
+    def get(self, address: str = None, key: str = None, name: str = None):
+        """
+        get a cached template according to address, key or name
+
+        :param address: contract address
+        :param key: template key (template id)
+        :param name: template name
+        :return: the :class:`~asimov.data_type.ContractTemplate` object, or None if it is not cached
+        """
+        cache_key = self._key(address, key, name)
+        with self._lock:
+            template = self._entries.get(cache_key)
+            if template is not None:
+                self._entries.move_to_end(cache_key)
+                return template
+        template = self._load(cache_key)
+        if template is not None:
+            self._set(cache_key, template)
+        return template
+
+    def put(self, template: ContractTemplate, address: str = None, key: str = None):
+        """
+        cache a template, it can be looked up by its name and the given address or key afterwards
+
+        :param template: the :class:`~asimov.data_type.ContractTemplate` object
+        :param address: address of a contract built from the template
+        :param key: template key (template id)
+        """
+        cache_keys = [self._key(name=template.template_name)]
+        if address:
+            cache_keys.append(self._key(address=address))
+        if key:
+            cache_keys.append(self._key(key=key))
+        for cache_key in cache_keys:
+            self._set(cache_key, template)
+            self._dump(cache_key, template)
+
+    def clear(self):
+        """drop the templates in memory, the persisted ones are kept"""
+        with self._lock:
+            self._entries.clear()
+
+    def _set(self, cache_key: tuple, template: ContractTemplate):
+        with self._lock:
+            self._entries[cache_key] = template
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _load(self, cache_key: tuple):
+        if self.path is None:
+            return None
+        try:
+            with open(self._file(cache_key), encoding="utf-8") as f:
+                return ContractTemplate(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _dump(self, cache_key: tuple, template: ContractTemplate):
+        if self.path is None:
+            return
+        file = self._file(cache_key)
+        if os.path.exists(file):
+            return
+        # write to a temporary file and rename it, other processes never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding="utf-8") as f:
+                json.dump(template._asdict(), f)
+            os.replace(tmp, file)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
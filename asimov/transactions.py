@@ -1,114 +1,159 @@
+import os
+import math
 import struct
-from copy import deepcopy
+import hashlib
 from io import StringIO, BytesIO
+from concurrent.futures import Executor, ProcessPoolExecutor
 
 from web3 import Web3
 from eth_utils import remove_0x_prefix
+from bitcointx import ChainParams, get_current_chain_params
 from bitcointx.wallet import CBitcoinSecret
-from bitcointx.core import script, b2lx, Hash
-from bitcointx.core.serialize import VarIntSerializer
+from bitcointx.core import script
 
 from .constant import TxType
 from .data_type import Account
-from .account import Address
+from .account import Address, _key_bytes
 
 
 DEFAULT_SEQUENCE = 0xffffffff
+# the largest signature script of a P2PKH input, push opcode + DER signature with the hash type (73 bytes) +
+# push opcode + compressed public key (33 bytes)
+MAX_SIG_SCRIPT_SIZE = 1 + 73 + 1 + 33
 
 
 def var_int_serialize_size(val: int) -> int:
     if val < 0xfd:
         return 1
-    if val <= (1 << 16 - 1):
+    if val <= (1 << 16) - 1:
         return 3
-    if val <= (1 << 32 - 1):
+    if val <= (1 << 32) - 1:
         return 5
     return 9
 
 
+def write_var_int(buf: bytearray, val: int):
+    """append a bitcoin style variable length integer to the buffer"""
+    if val < 0xfd:
+        buf.append(val)
+    elif val <= (1 << 16) - 1:
+        buf.append(0xfd)
+        buf += val.to_bytes(2, 'little')
+    elif val <= (1 << 32) - 1:
+        buf.append(0xfe)
+        buf += val.to_bytes(4, 'little')
+    else:
+        buf.append(0xff)
+        buf += val.to_bytes(8, 'little')
+
+
+def write_var_bytes(buf: bytearray, data: bytes):
+    """append the length of the data as a variable length integer and then the data"""
+    write_var_int(buf, len(data))
+    buf += data
+
+
 class TxInput:
+    __slots__ = ("vout", "sequence", "script_pub_key", "sig_script", "signed_key", "outpoint")
+
     def __init__(self, vin: dict):
-        self.prev_tx_id = vin['txid']
         self.vout = vin['vout']
         self.sequence = DEFAULT_SEQUENCE
-        self.script_pub_key = vin['scriptPubKey']
-        self.sig_script = None
+        self.script_pub_key = bytes.fromhex(vin['scriptPubKey'])
+        self.sig_script: bytes = None
         self.signed_key: Account = vin.get('signed_key')
+        # outpoint hash + outpoint index, never change after the input is created
+        self.outpoint = bytes.fromhex(vin['txid']) + self.vout.to_bytes(4, 'little', signed=False)
+
+    @property
+    def prev_tx_id(self) -> str:
+        return self.outpoint[:32].hex()
+
+    def write_bytes(self, buf: bytearray, sig_script: bytes = None):
+        """
+        append the serialized input to the buffer
+
+        :param buf: the buffer to write
+        :param sig_script: the signature script to write instead of the one of the input
+        """
+        buf += self.outpoint
+        write_var_bytes(buf, (self.sig_script or b'') if sig_script is None else sig_script)
+        buf += self.sequence.to_bytes(4, 'little', signed=False)
+        return buf
 
     def write_buffer(self, buf):
-        buf.write(self.prev_tx_id)
-        buf.write(b2lx((self.vout).to_bytes(4, 'big', signed=False)))
-        if self.sig_script:
-            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.sig_script))).hex())
-            buf.write(self.sig_script)
-        else:
-            buf.write(b'\x00'.hex())
-        buf.write(b2lx((self.sequence).to_bytes(4, 'big', signed=False)))
+        buf.write(self.write_bytes(bytearray()).hex())
         return buf
 
-    def serialize_size(self) -> int:
+    def serialize_size(self, estimate_signature=False) -> int:
         # Outpoint Hash 32 bytes + Outpoint Index 4 bytes + Sequence 4 bytes +
         # serialized varint size for the length of SignatureScript +
         # SignatureScript bytes
-        length = len(self.sig_script) / 2 if self.sig_script else 0
+        if estimate_signature and not self.sig_script:
+            length = MAX_SIG_SCRIPT_SIZE
+        else:
+            length = len(self.sig_script) if self.sig_script else 0
         return 40 + length + var_int_serialize_size(length)
 
 
 class TxOutput:
+    __slots__ = ("address", "amount", "contract_type", "assets", "data", "pk_script")
+
     def __init__(self, output: dict):
         self.address = Address(output['address'])
         self.amount = output['amount']
-        self.assets = output['assets']
         self.contract_type = output.get("contractType")
-        self.data = output.get("data")
-        self.pk_script = None
+        # pk_script, assets and data are kept in bytes
+        self.assets = bytes.fromhex(output['assets']) if output['assets'] else b''
+        self.data = bytes.fromhex(remove_0x_prefix(output['data'])) if output.get("data") else b''
         if self.data:
-            self.data = remove_0x_prefix(self.data)
             if self.contract_type == TxType.CALL:
-                self.pk_script = self.address.to_contract_hash_script()
+                pk_script = self.address.to_contract_hash_script()
             elif self.contract_type == TxType.TEMPLATE:
-                self.pk_script = self.address.to_create_template_hash_script()
+                pk_script = self.address.to_create_template_hash_script()
             elif self.contract_type == TxType.CREATE:
-                self.pk_script = self.address.to_create_contract_hash_script()
+                pk_script = self.address.to_create_contract_hash_script()
             elif self.contract_type == TxType.VOTE:
-                self.pk_script = self.address.to_create_vote_hash_script()
+                pk_script = self.address.to_create_vote_hash_script()
             else:
                 raise TypeError(f"unknown contract type: {self.contract_type}")
         else:
             if self.address.is_pay_to_contract_hash:
-                self.pk_script = self.address.to_contract_hash_script()
+                pk_script = self.address.to_contract_hash_script()
             else:
-                self.pk_script = self.address.to_script_pub_key()
+                pk_script = self.address.to_script_pub_key()
+        self.pk_script = bytes.fromhex(pk_script)
+
+    def write_bytes(self, buf: bytearray):
+        """
+        append the serialized output to the buffer
+        """
+        buf += self.amount.to_bytes(8, 'little', signed=True)
+        write_var_bytes(buf, self.pk_script)
+        write_var_bytes(buf, self.assets)
+        write_var_bytes(buf, self.data)
+        return buf
 
     def write_buffer(self, buf):
-        buf.write(b2lx(struct.pack(">q", self.amount)))
-        buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.pk_script))).hex())
-        buf.write(self.pk_script)
-        if self.assets:
-            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.assets))).hex())
-            buf.write(self.assets)
-        else:
-            buf.write(b'\x00'.hex())
-        if self.data:
-            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.data))).hex())
-            buf.write(self.data)
-        else:
-            buf.write(b'\x00'.hex())
+        buf.write(self.write_bytes(bytearray()).hex())
         return buf
 
     def serialize_size(self) -> int:
-        # Value 8 bytes + Assets 12 byte
+        # Value 8 bytes
         # + serialized varint size for the length of PkScript +
         # PkScript bytes.
+        # + serialized varint size for the length of Assets +
+        # Assets bytes.
         # + serialized varint size for the length of Data +
         # Data bytes.
-        pk_script_length = len(self.pk_script) / 2 if self.pk_script else 0
-        data_length = len(self.data) / 2 if self.data else 0
-        return 20 + var_int_serialize_size(pk_script_length) + pk_script_length + \
-               var_int_serialize_size(data_length) + data_length
+        return 8 + var_int_serialize_size(len(self.pk_script)) + len(self.pk_script) + \
+            var_int_serialize_size(len(self.assets)) + len(self.assets) + \
+            var_int_serialize_size(len(self.data)) + len(self.data)
 
 
 class Transaction:
+    __slots__ = ("vin", "vout", "lock_time", "version", "gas_limit", "inputs", "outputs")
+
     def __init__(self, vin=(), vout=(), nLockTime=0, nVersion=1, gas_limit=0):
         if not 0 <= nLockTime <= 0xffffffff:
             raise ValueError('CTransaction: nLockTime must be in range 0x0 to 0xffffffff; got %x' % nLockTime)
@@ -120,66 +165,188 @@ class Transaction:
         self.inputs = [TxInput(_vin) for _vin in vin]
         self.outputs = [TxOutput(_vout) for _vout in vout]
 
-    def to_buffer_writer(self) -> StringIO:
-        buffer = StringIO()
-        buffer.write(b2lx((self.version).to_bytes(4, 'big', signed=False)))
-        buffer.write(b2lx(VarIntSerializer.serialize(len(self.inputs))))
-        for _input in self.inputs:
-            _input.write_buffer(buffer)
-        buffer.write(b2lx(VarIntSerializer.serialize(len(self.outputs))))
+    def _write_head(self, buf: bytearray):
+        buf += self.version.to_bytes(4, 'little', signed=False)
+        write_var_int(buf, len(self.inputs))
+        return buf
+
+    def _write_tail(self, buf: bytearray):
+        write_var_int(buf, len(self.outputs))
         for _output in self.outputs:
-            _output.write_buffer(buffer)
-        buffer.write(b2lx((self.gas_limit).to_bytes(4, 'big', signed=False)))
-        buffer.write(b2lx((self.lock_time).to_bytes(4, 'big', signed=True)))
-        return buffer
+            _output.write_bytes(buf)
+        buf += self.gas_limit.to_bytes(4, 'little', signed=False)
+        buf += self.lock_time.to_bytes(4, 'little', signed=True)
+        return buf
+
+    def serialize(self) -> bytes:
+        """
+        serialize the transaction
+
+        :return: the serialized transaction
+        """
+        buf = self._write_head(bytearray())
+        for _input in self.inputs:
+            _input.write_bytes(buf)
+        return bytes(self._write_tail(buf))
+
+    def to_buffer_writer(self) -> StringIO:
+        return StringIO(self.to_hex())
 
     def to_hex(self) -> str:
-        return self.to_buffer_writer().getvalue()
+        return self.serialize().hex()
 
-    def sign(self, sig_type=script.SIGHASH_ALL):
+    def sign(self, sig_type=script.SIGHASH_ALL, parallel=False, executor: Executor = None):
+        """
+        sign all the inputs with their ``signed_key``
+
+        :param sig_type: signature hash type
+        :param parallel: sign the inputs in parallel, the result is the same as signing one by one
+        :param executor: the executor to sign in parallel, e.g. a ``ProcessPoolExecutor`` kept by the caller,
+            a temporary ``ProcessPoolExecutor`` is used if not given
+        :return: the transaction itself
+        """
+        hasher = SignatureHasher(self)
+        hashes = []
         for idx, _input in enumerate(self.inputs):
             assert _input.signed_key is not None
-            _input.sig_script = AsimovScript.sign(self, _input.signed_key, idx, _input.script_pub_key, sig_type).hex()
+            hashes.append(hasher.signature_hash(idx, _input.script_pub_key, sig_type))
+        if parallel:
+            keys = [(_input.signed_key.private_key, _input.signed_key.public_key) for _input in self.inputs]
+            sig_scripts = self._sign_in_executor(keys, hashes, sig_type, executor)
+        else:
+            sig_scripts = [_sign_hash(_signing_key(_input.signed_key), hashbuf, sig_type)
+                           for _input, hashbuf in zip(self.inputs, hashes)]
+        for _input, sig_script in zip(self.inputs, sig_scripts):
+            _input.sig_script = sig_script
         return self
 
-    def serialize_size(self) -> int:
+    @staticmethod
+    def _sign_in_executor(keys: list, hashes: list, sig_type, executor: Executor = None) -> list:
+        if executor is None:
+            with ProcessPoolExecutor() as pool:
+                return Transaction._sign_in_executor(keys, hashes, sig_type, pool)
+        # a few large chunks, the keys are parsed once per chunk
+        chunk_size = math.ceil(len(hashes) / ((os.cpu_count() or 1) * 4)) or 1
+        starts = range(0, len(hashes), chunk_size)
+        rst = executor.map(_sign_hashes, [keys[i:i + chunk_size] for i in starts],
+                           [hashes[i:i + chunk_size] for i in starts], [sig_type] * len(starts))
+        return [sig_script for chunk in rst for sig_script in chunk]
+
+    def serialize_size(self, estimate_signature=False) -> int:
+        """
+        :param estimate_signature: count the unsigned inputs as signed ones with the largest signature script,
+            which gives the size of the signed transaction without signing it
+        :return: size of the serialized transaction in bytes
+        """
         # Version 4 bytes + LockTime 4 bytes + TxContract 4 bytes + Serialized varint size for the
         # number of transaction inputs and outputs.
         length = 12 + var_int_serialize_size(len(self.inputs)) + var_int_serialize_size(len(self.outputs))
         for _input in self.inputs:
-            length += _input.serialize_size()
+            length += _input.serialize_size(estimate_signature)
         for _output in self.outputs:
             length += _output.serialize_size()
         return length
 
 
+def _parse_signing_key(private_key: str, public_key: bytes) -> tuple:
+    """the parsed secret key and public key of an account"""
+    # the class dispatchers of bitcointx are context local, they are not active yet in a new thread
+    with ChainParams(get_current_chain_params()):
+        sec_key = CBitcoinSecret.from_bytes(_key_bytes(private_key))
+    return sec_key, Web3.toBytes(hexstr=public_key.decode())
+
+
+def _signing_key(account: Account) -> tuple:
+    """the parsed keys of an account, parsed once and kept in the account for all the inputs it signs"""
+    if account._signing_key is None:
+        account._signing_key = _parse_signing_key(account.private_key, account.public_key)
+    return account._signing_key
+
+
+def _sign_hash(signing_key: tuple, hashbuf: bytes, hash_type) -> bytes:
+    """
+    build the signature script of a signature hash
+
+    :param signing_key: the parsed keys, see :func:`_signing_key`
+    """
+    sec_key, public_key = signing_key
+    sig_script_bytes: bytes = sec_key.sign(hashbuf)
+    sig_script_bytes += bytes([hash_type & 0xff])
+
+    script_buffer = BytesIO()
+    script_buffer.write(bytes([len(sig_script_bytes)]))
+    script_buffer.write(sig_script_bytes)
+    script_buffer.write(bytes([len(public_key)]))
+    script_buffer.write(public_key)
+    return script_buffer.getvalue()
+
+
+def _sign_hashes(keys: list, hashes: list, hash_type) -> list:
+    """
+    sign a chunk of hashes with their (private key, public key) pairs, every distinct key is parsed once.
+    A module level function taking plain values so that it can run in a process pool
+    """
+    parsed = {}
+    sig_scripts = []
+    for key, hashbuf in zip(keys, hashes):
+        if key not in parsed:
+            parsed[key] = _parse_signing_key(*key)
+        sig_scripts.append(_sign_hash(parsed[key], hashbuf, hash_type))
+    return sig_scripts
+
+
+class SignatureHasher:
+    """
+    Compute the signature hashes of the inputs of a transaction.
+
+    The transaction is serialized once with all the signature scripts empty, the hash of an input streams
+    the shared bytes into sha256 and only serializes the input itself with its sub script.
+    """
+    def __init__(self, tx: Transaction):
+        self.tx = tx
+        self._head = hashlib.sha256(tx._write_head(bytearray()))
+        self._inputs = bytearray()
+        # self._inputs[self._offsets[i]:self._offsets[i + 1]] is the i-th input
+        self._offsets = []
+        for _input in tx.inputs:
+            self._offsets.append(len(self._inputs))
+            _input.write_bytes(self._inputs, b'')
+        self._offsets.append(len(self._inputs))
+        self._tail = bytes(tx._write_tail(bytearray()))
+
+    def signature_hash(self, in_idx, sub_script, hash_type=script.SIGHASH_ALL) -> bytes:
+        """
+        :param in_idx: index of the input to sign
+        :param sub_script: the script to put in the input, the script pub key of the spent output
+        :param hash_type: signature hash type
+        :return: the hash to sign
+        """
+        if isinstance(sub_script, str):
+            sub_script = bytes.fromhex(sub_script)
+        inputs = memoryview(self._inputs)
+        hasher = self._head.copy()
+        hasher.update(inputs[:self._offsets[in_idx]])
+        hasher.update(self.tx.inputs[in_idx].write_bytes(bytearray(), sub_script))
+        hasher.update(inputs[self._offsets[in_idx + 1]:])
+        hasher.update(self._tail)
+        hasher.update(struct.pack(b"<i", hash_type))
+        return hashlib.sha256(hasher.digest()).digest()
+
+
 class AsimovScript:
     @classmethod
     def signature_hash(cls, tx: Transaction, in_idx, sub_script, hash_type=script.SIGHASH_ALL) -> bytes:
-        tx = deepcopy(tx)
-        for txin in tx.inputs:
-            txin.sig_script = b''
-        tx.inputs[in_idx].sig_script = sub_script
-        byte_value = Web3.toBytes(hexstr=tx.to_hex())
-        byte_value += struct.pack(b"<i", hash_type)
-        return bytes(Hash(byte_value))
+        return SignatureHasher(tx).signature_hash(in_idx, sub_script, hash_type)
 
     @classmethod
     def _sign(cls, account: Account, hashbuf, hash_type) -> bytes:
-        sec_key = CBitcoinSecret.from_bytes(bytes.fromhex(remove_0x_prefix(account.private_key)))
-        sig_script_bytes: bytes = sec_key.sign(hashbuf)
-        sig_script_bytes += bytes([hash_type & 0xff])
-        public_key = Web3.toBytes(hexstr=account.public_key.decode())
-
-        script_buffer = BytesIO()
-        script_buffer.write(bytes([len(sig_script_bytes)]))
-        script_buffer.write(sig_script_bytes)
-        script_buffer.write(bytes([len(public_key)]))
-        script_buffer.write(public_key)
-        return script_buffer.getvalue()
+        return _sign_hash(_signing_key(account), hashbuf, hash_type)
 
     @classmethod
-    def sign(cls, tx: Transaction, key_pair: Account, in_idx, sub_script, hash_type=script.SIGHASH_ALL) -> bytes:
-        hashbuf = cls.signature_hash(tx, in_idx, sub_script, hash_type)
+    def sign(cls, tx: Transaction, key_pair: Account, in_idx, sub_script, hash_type=script.SIGHASH_ALL,
+             hasher: SignatureHasher = None) -> bytes:
+        if hasher is None:
+            hasher = SignatureHasher(tx)
+        hashbuf = hasher.signature_hash(in_idx, sub_script, hash_type)
         sign_hash = cls._sign(key_pair, hashbuf, hash_type)
         return sign_hash
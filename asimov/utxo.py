@@ -0,0 +1,595 @@
+import copy
+import bisect
+import functools
+import threading
+from collections import OrderedDict
+
+from . import error
+from . import constant
+from .account import Address
+from .data_type import Tx
+from ._utils.effects import Locked
+
+
+class UtxoIndex:
+    """
+    UTXO of one asset type sorted by amount, the input of a :class:`~asimov.coin_selection.CoinSelector`
+    """
+    def __init__(self, utxos: list = ()):
+        self._utxos = {(utxo['txid'], utxo['vout']): utxo for utxo in utxos}
+        self._keys = sorted(self._key(utxo) for utxo in self._utxos.values())
+        self.total = sum(utxo['amount'] for utxo in self._utxos.values())
+
+    @staticmethod
+    def _key(utxo: dict) -> tuple:
+        return utxo['amount'], utxo['txid'], utxo['vout']
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        """iterate the UTXO from the smallest amount to the largest"""
+        return (self._utxos[key[1:]] for key in self._keys)
+
+    def __reversed__(self):
+        """iterate the UTXO from the largest amount to the smallest"""
+        return (self._utxos[key[1:]] for key in reversed(self._keys))
+
+    def __getitem__(self, idx: int) -> dict:
+        return self._utxos[self._keys[idx][1:]]
+
+    def __contains__(self, outpoint: tuple) -> bool:
+        return outpoint in self._utxos
+
+    def add(self, utxo: dict):
+        """
+        add a UTXO, do nothing if the outpoint is already in the index
+        """
+        outpoint = (utxo['txid'], utxo['vout'])
+        if outpoint in self._utxos:
+            return
+        self._utxos[outpoint] = utxo
+        bisect.insort(self._keys, self._key(utxo))
+        self.total += utxo['amount']
+
+    def update(self, utxos: list):
+        """
+        add a batch of UTXO, faster than :meth:`add` one by one for a large batch
+        """
+        keys = []
+        for utxo in utxos:
+            outpoint = (utxo['txid'], utxo['vout'])
+            if outpoint in self._utxos:
+                continue
+            self._utxos[outpoint] = utxo
+            keys.append(self._key(utxo))
+            self.total += utxo['amount']
+        # the two sorted runs are merged in linear time
+        keys.sort()
+        self._keys.extend(keys)
+        self._keys.sort()
+
+    def discard(self, outpoint: tuple):
+        """
+        remove the UTXO of the outpoint if it is in the index
+        """
+        utxo = self._utxos.pop(outpoint, None)
+        if utxo is None:
+            return
+        key = self._key(utxo)
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        self.total -= utxo['amount']
+
+    def bisect(self, amount: int) -> int:
+        """
+        :return: the position of the first UTXO whose amount is not less than ``amount``
+        """
+        return bisect.bisect_left(self._keys, (amount,))
+
+
+def _synchronized(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _InFlight:
+    """
+    The outpoints reserved by a node without a :class:`UtxoCache`, the node leaves them out of the UTXO it selects.
+    The inputs of a broadcast transaction are still listed by ``getUtxoInPage`` until it is confirmed, so they stay
+    reserved until the node sees it confirmed, or a complete scan of the pages from offset 0 no longer lists them.
+    The node holds ``lock`` while it selects and reserves UTXO, with or without a cache
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._outpoints = set()
+        # (address, asset, txid) of the inputs of the broadcast transactions which are not confirmed yet, by outpoint
+        self._spent = {}
+        # (offset of the next page, spent outpoints listed so far) of the scans from offset 0, by (address, asset)
+        self._scans = {}
+
+    def __len__(self):
+        return len(self._outpoints) + len(self._spent)
+
+    def __contains__(self, outpoint: tuple) -> bool:
+        return outpoint in self._outpoints or outpoint in self._spent
+
+    def reserve(self, outpoints):
+        with self.lock:
+            self._outpoints.update(outpoints)
+
+    def release(self, outpoints):
+        with self.lock:
+            for outpoint in outpoints:
+                self._outpoints.discard(outpoint)
+                self._spent.pop(outpoint, None)
+
+    def spend(self, address: str, tx_id: str, inputs: list):
+        """
+        keep the inputs of a broadcast transaction reserved until it is confirmed
+
+        :param address: the address owning the inputs
+        :param tx_id: transaction id
+        :param inputs: transaction inputs, the UTXO dicts
+        """
+        with self.lock:
+            for vin in inputs:
+                outpoint = (vin['txid'], vin['vout'])
+                self._outpoints.discard(outpoint)
+                self._spent[outpoint] = (address, vin.get('assets'), tx_id)
+            # a page fetched before the spend does not tell if the node lists the outpoint
+            self._scans.clear()
+
+    def confirm(self, tx_id: str):
+        """
+        drop the inputs of a confirmed transaction
+
+        :param tx_id: transaction id
+        """
+        with self.lock:
+            for outpoint in [outpoint for outpoint, owner in self._spent.items() if owner[2] == tx_id]:
+                del self._spent[outpoint]
+
+    def scanned(self, address: str, asset: str, offset: int, count: int, utxos: list):
+        """
+        record a page of ``getUtxoInPage``, the spent outpoints missing from a complete scan are confirmed
+
+        :param address: the address owning the UTXO
+        :param asset: asset type in hex string format
+        :param offset: start position of the page
+        :param count: count of UTXO asked for
+        :param utxos: all the UTXO in the page
+        """
+        key = (address, asset)
+        with self.lock:
+            scan = self._scans.pop(key, None)
+            if offset == 0:
+                scan = (0, set())
+            if not self._spent or scan is None or scan[0] != offset:
+                return
+            listed = scan[1]
+            listed.update(outpoint for outpoint in ((utxo['txid'], utxo['vout']) for utxo in utxos)
+                          if outpoint in self._spent)
+            if len(utxos) >= count:
+                self._scans[key] = (offset + count, listed)
+                return
+            for outpoint in [outpoint for outpoint, owner in self._spent.items()
+                             if owner[:2] == key and outpoint not in listed]:
+                del self._spent[outpoint]
+
+
+class _UtxoSet:
+    """UTXO of one address in one asset type"""
+    def __init__(self):
+        self.index = UtxoIndex()
+        self.utxos = OrderedDict()
+        self.offset = 0
+        self.exhausted = False
+        self.refreshing = False
+        self.seen = set()
+        # change outputs of our own transactions, not reported by the node yet
+        self.local = set()
+
+
+class UtxoCache:
+    """
+    Local cache of UTXO, shared by the transactions sent from a :class:`~asimov.node.Node`.
+
+    The cache is filled page by page from ``getUtxoInPage`` and only goes on with the next page when the cached
+    UTXO are not enough. The whole set is fetched again from offset 0 only after all the pages are consumed.
+
+    Inputs of a broadcast transaction are reserved so they will not be selected again before the transaction is
+    confirmed, and its change outputs are spendable right away.
+
+    The cache is thread safe, the node reserves the selected UTXO before releasing its lock, so transactions built
+    in parallel threads never spend the same UTXO.
+
+    .. code-block:: python
+
+        >>> from asimov import Node
+        >>> from asimov.utxo import UtxoCache
+        >>> node = Node("http://seed.asimov.tech", private_key, utxo_cache=UtxoCache())
+    """
+    def __init__(self, page_size: int = 1000):
+        self.page_size = page_size
+        self._sets = {}
+        # outpoints spent by our own transactions which are not confirmed yet
+        self._reserved = set()
+        self._lock = threading.RLock()
+
+    def _get_set(self, address: str, asset: str) -> _UtxoSet:
+        key = (address, asset)
+        if key not in self._sets:
+            self._sets[key] = _UtxoSet()
+        return self._sets[key]
+
+    @_synchronized
+    def available(self, address: str, asset: str) -> list:
+        """
+        get the cached UTXO which are not reserved
+
+        :param address: the address owning the UTXO
+        :param asset: asset type in hex string format
+        :return: UTXO list
+        """
+        return [utxo for outpoint, utxo in self._get_set(address, asset).utxos.items()
+                if outpoint not in self._reserved]
+
+    @_synchronized
+    def index(self, address: str, asset: str) -> UtxoIndex:
+        """
+        get the cached UTXO which are not reserved, sorted by amount
+
+        :param address: the address owning the UTXO
+        :param asset: asset type in hex string format
+        :return: the :class:`UtxoIndex` object, kept up to date by the cache
+        """
+        return self._get_set(address, asset).index
+
+    @_synchronized
+    def pick(self, address: str, asset: str, amount: int):
+        """
+        pick cached UTXO in order until the amount is covered
+
+        :param address: the address owning the UTXO
+        :param asset: asset type in hex string format
+        :param amount: the amount to cover
+        :return: copies of the picked UTXO, or None if the cached UTXO are not enough
+        """
+        utxos = []
+        current_amount = 0
+        for utxo in self.available(address, asset):
+            utxos.append(dict(utxo))
+            current_amount += utxo['amount']
+            if current_amount >= amount:
+                return utxos
+        return None
+
+    @_synchronized
+    def next_offset(self, address: str, asset: str):
+        """
+        :return: the offset of the next page to fetch, None if all the pages are fetched
+        """
+        utxo_set = self._get_set(address, asset)
+        return None if utxo_set.exhausted else utxo_set.offset
+
+    @_synchronized
+    def extend(self, address: str, asset: str, utxos: list):
+        """
+        add a page of UTXO fetched from the node, an empty page means all the pages are fetched
+
+        :param address: the address owning the UTXO
+        :param asset: asset type in hex string format
+        :param utxos: the spendable UTXO in the page
+        """
+        utxo_set = self._get_set(address, asset)
+        for utxo in utxos:
+            outpoint = (utxo['txid'], utxo['vout'])
+            utxo_set.utxos[outpoint] = utxo
+            utxo_set.seen.add(outpoint)
+            utxo_set.local.discard(outpoint)
+        utxo_set.index.update([utxo for utxo in utxos if (utxo['txid'], utxo['vout']) not in self._reserved])
+        utxo_set.offset += self.page_size
+        if not utxos:
+            utxo_set.exhausted = True
+            if utxo_set.refreshing:
+                # an outpoint missing from a full scan has been spent on chain,
+                # unless it is the change of our own transaction which is not confirmed yet
+                spent = {outpoint for outpoint in utxo_set.utxos if outpoint not in utxo_set.seen and (
+                    outpoint not in utxo_set.local or outpoint in self._reserved)}
+                for outpoint in spent:
+                    del utxo_set.utxos[outpoint]
+                    utxo_set.index.discard(outpoint)
+                utxo_set.local -= spent
+                self._reserved -= spent
+                utxo_set.refreshing = False
+
+    @_synchronized
+    def refresh(self, address: str, asset: str):
+        """
+        start fetching the UTXO again from offset 0, the cached UTXO are kept until the scan is done
+        """
+        utxo_set = self._get_set(address, asset)
+        utxo_set.offset = 0
+        utxo_set.exhausted = False
+        utxo_set.refreshing = True
+        utxo_set.seen = set()
+
+    @_synchronized
+    def commit(self, address: str, tx_id: str, inputs: list, outputs: list):
+        """
+        record a broadcast transaction, its inputs are reserved and the change outputs back to ``address``
+        become spendable
+
+        :param address: the address sending the transaction
+        :param tx_id: transaction id
+        :param inputs: transaction inputs, the UTXO dicts
+        :param outputs: transaction outputs, the output dicts
+        """
+        self.reserve(address, [(vin['txid'], vin['vout']) for vin in inputs])
+        for idx, vout in enumerate(outputs):
+            if vout['address'] != address or vout.get('data'):
+                continue
+            utxo_set = self._get_set(address, vout['assets'])
+            utxo_set.local.add((tx_id, idx))
+            utxo = utxo_set.utxos[(tx_id, idx)] = {
+                "txid": tx_id,
+                "vout": idx,
+                "address": address,
+                "amount": vout['amount'],
+                "assets": vout['assets'],
+                "scriptPubKey": Address(address).to_script_pub_key(),
+                "confirmations": 0,
+                "spendable": True,
+            }
+            utxo_set.index.add(utxo)
+
+    @_synchronized
+    def reserve(self, address: str, outpoints: list):
+        """
+        reserve the UTXO selected for a transaction which is not broadcast yet
+
+        :param address: the address owning the UTXO
+        :param outpoints: (txid, vout) pairs
+        """
+        for outpoint in outpoints:
+            self._reserved.add(outpoint)
+            for key, utxo_set in self._sets.items():
+                if key[0] == address:
+                    utxo_set.index.discard(outpoint)
+
+    @_synchronized
+    def release(self, address: str, outpoints: list):
+        """
+        make the reserved UTXO spendable again, e.g. the transaction is not broadcast
+
+        :param address: the address owning the UTXO
+        :param outpoints: (txid, vout) pairs
+        """
+        for outpoint in outpoints:
+            self._reserved.discard(outpoint)
+            for key, utxo_set in self._sets.items():
+                if key[0] == address and outpoint in utxo_set.utxos and outpoint not in utxo_set.index:
+                    utxo_set.index.add(utxo_set.utxos[outpoint])
+
+    @_synchronized
+    def clear(self, address: str = None):
+        """
+        drop the cached UTXO and reservations, e.g. after a broadcast transaction is dropped by the node
+
+        :param address: only drop the UTXO of this address if given
+        """
+        if address is None:
+            self._sets.clear()
+            self._reserved.clear()
+            return
+        for key in [key for key in self._sets if key[0] == address]:
+            self._reserved -= set(self._sets.pop(key).utxos)
+
+
+class UtxoMixin:
+    """
+    The UTXO lookup, selection and reservation of :class:`~asimov.node.BaseNode`, with or without a :class:`UtxoCache`
+    """
+    def _reserve(self, utxos: list):
+        outpoints = [(utxo['txid'], utxo['vout']) for utxo in utxos]
+        with self._in_flight.lock:
+            if self.utxo_cache is not None:
+                self.utxo_cache.reserve(self.address, outpoints)
+            else:
+                self._in_flight.reserve(outpoints)
+
+    def _release(self, utxos: list):
+        outpoints = [(utxo['txid'], utxo['vout']) for utxo in utxos]
+        with self._in_flight.lock:
+            if self.utxo_cache is not None:
+                self.utxo_cache.release(self.address, outpoints)
+            else:
+                self._in_flight.release(outpoints)
+
+    def _on_broadcast(self, tx: Tx):
+        """
+        called after a transaction sent from this node is broadcast
+        """
+        with self._in_flight.lock:
+            if self.utxo_cache is not None:
+                self.utxo_cache.commit(self.address, tx.id, tx.transaction.vin, tx.transaction.vout)
+            else:
+                self._in_flight.spend(self.address, tx.id, tx.transaction.vin)
+
+    def _on_confirmed(self, tx_id: str):
+        """
+        called after a transaction is seen confirmed on chain
+        """
+        if self.utxo_cache is None:
+            self._in_flight.confirm(tx_id)
+
+    def _on_broadcast_failed(self, tx: Tx):
+        """
+        called after a transaction sent from this node fails to be broadcast
+        """
+        self._release(tx.transaction.vin)
+
+    def _spendable(self, address: str, asset: str, _from: int, count: int, utxos: list) -> list:
+        """
+        filter a page of ``getUtxoInPage``, the UTXO reserved by this node are left out
+        """
+        if self.utxo_cache is None:
+            self._in_flight.scanned(address, asset, _from, count, utxos)
+        return [item for item in utxos if item['spendable'] is True and
+                (item['txid'], item['vout']) not in self._in_flight]
+
+    @staticmethod
+    def _select_from_index(coin_selector, index: UtxoIndex, amount: int):
+        """
+        select UTXO from the index by the coin selector
+
+        :return: copies of the selected UTXO, or None if the amount can not be covered
+        """
+        utxos = coin_selector.select(index, amount)
+        if utxos is None:
+            return None
+        return [dict(utxo) for utxo in utxos]
+
+    def _utxo_page_steps(self, address, asset, _from: int, count):
+        """
+        Get UTXO in page of a given address.
+
+        :param address: the address to get UTXO from
+        :param asset: asset type in hex string format
+        :param from: start position of the page
+        :param count: count of UTXO in the page
+        :return: UTXO of specifc address by given asset type in page
+        """
+        rst = (yield from self._call_steps("getUtxoInPage", [address, asset, _from, count]))['utxos']
+        return self._spendable(address, asset, _from, count, rst)
+
+    def _get_utxo_steps(self, address: str, asset=constant.ASCOIN, amount=1, coin_selector=None):
+        """
+        Get UTXO with specific asset type and amount of a given address
+
+        :param address: the address to get UTXO from
+        :param asset: asset type, hex string format, default value is '000000000000'
+        :param amount: asset amount, default is 1
+        :param coin_selector: the coin selection strategy, default is the one of the node
+        """
+        amount = max([amount, 1])
+        coin_selector = coin_selector or self.coin_selector
+        if coin_selector is not None:
+            return (yield from self._selected_utxo_steps(address, asset, amount, coin_selector))
+        if self.utxo_cache is not None:
+            return (yield from self._cached_utxo_steps(address, asset, amount))
+        utxos = []
+        utxo_pool = []
+        current_amount = 0
+        idx = 0
+        while current_amount < amount:
+            _utxos = yield from self._utxo_page_steps(address, asset, idx, 1000)
+            if len(_utxos) == 0:
+                raise error.NotEnoughMoney(utxos)
+            _utxos = [utxo for utxo in _utxos if (utxo['txid'], utxo['vout']) not in utxo_pool]
+            total_amount = sum([utxo['amount'] for utxo in _utxos])
+            if total_amount + current_amount >= amount:
+                for utxo in _utxos:
+                    utxos.append(utxo)
+                    current_amount += utxo['amount']
+                    if current_amount >= amount:
+                        return utxos
+            else:
+                utxos.extend(_utxos)
+                utxo_pool.extend([(utxo['txid'], utxo['vout']) for utxo in _utxos])
+                current_amount += total_amount
+                idx += 1000
+
+    def _cached_utxo_steps(self, address: str, asset: str, amount: int):
+        """
+        Get UTXO from the UTXO cache, fetch more pages from the node only if the cached ones are not enough
+        """
+        cache = self.utxo_cache
+        refreshed = False
+        while True:
+            utxos = cache.pick(address, asset, amount)
+            if utxos is not None:
+                return utxos
+            offset = cache.next_offset(address, asset)
+            if offset is None:
+                if refreshed:
+                    raise error.NotEnoughMoney(cache.available(address, asset))
+                cache.refresh(address, asset)
+                refreshed = True
+                continue
+            cache.extend(address, asset, (yield from self._utxo_page_steps(address, asset, offset, cache.page_size)))
+
+    def _load_utxo_index_steps(self, address: str, asset: str, refresh=False):
+        """
+        Load all the UTXO of a given address into an index sorted by amount,
+        only the pages not cached yet are fetched if there is a UTXO cache
+        """
+        if self.utxo_cache is None:
+            utxos = []
+            offset = 0
+            while True:
+                _utxos = yield from self._utxo_page_steps(address, asset, offset, 1000)
+                if len(_utxos) == 0:
+                    return UtxoIndex(utxos)
+                utxos.extend(_utxos)
+                offset += 1000
+        cache = self.utxo_cache
+        if refresh:
+            cache.refresh(address, asset)
+        offset = cache.next_offset(address, asset)
+        while offset is not None:
+            cache.extend(address, asset, (yield from self._utxo_page_steps(address, asset, offset, cache.page_size)))
+            offset = cache.next_offset(address, asset)
+        return cache.index(address, asset)
+
+    def _selected_utxo_steps(self, address: str, asset: str, amount: int, coin_selector):
+        """
+        Get UTXO chosen by the coin selector, the cached UTXO are fetched again once if they are not enough
+        """
+        index = yield from self._load_utxo_index_steps(address, asset)
+        utxos = self._select_from_index(coin_selector, index, amount)
+        if utxos is None and self.utxo_cache is not None:
+            index = yield from self._load_utxo_index_steps(address, asset, refresh=True)
+            utxos = self._select_from_index(coin_selector, index, amount)
+        if utxos is None:
+            raise error.NotEnoughMoney(f"need {amount}, but only have {index.total} of {asset}")
+        return utxos
+
+    def _select_utxo_steps(self, assets: dict, coin_selector=None):
+        """
+        select UTXO according to given parameters, the selected UTXO are reserved
+        until the transaction is broadcast or released
+        """
+        return (yield Locked(self._select_locked_steps(assets, coin_selector)))
+
+    def _select_locked_steps(self, assets: dict, coin_selector=None):
+        rst = {}
+        utxos = []
+        for k, v in assets.items():
+            if v == 0:
+                continue
+            _utxos = yield from self._get_utxo_steps(self.address, k, v, coin_selector)
+            for _utxo in _utxos:
+                _utxo['signed_key'] = self.account
+            rst[k] = sum(_utxo['amount'] for _utxo in _utxos)
+            utxos.extend(_utxos)
+        self._reserve(utxos)
+        rst['utxos'] = utxos
+        return rst
+
+    def _select_vote_utxo_steps(self, vote_value: int, vote_asset_type: str, fees: dict,
+                                coin_selector=None):
+        """select UTXO for vote transaction"""
+        assets = copy.copy(fees)
+        if vote_value == 0:
+            balance_of_vote_asset_type = yield from self._balance_steps(self.address, vote_asset_type)
+            if fees.get(vote_asset_type, 0) > balance_of_vote_asset_type:
+                raise error.NotEnoughMoney(
+                    f"need {assets[vote_asset_type]}, but only have {balance_of_vote_asset_type} of {vote_asset_type}")
+            assets[vote_asset_type] = balance_of_vote_asset_type
+        else:
+            assets[vote_asset_type] = assets.get(vote_asset_type, 0) + vote_value
+        return (yield from self._select_utxo_steps(assets, coin_selector))
@@ -0,0 +1,50 @@
+"""
+Encoding the call data of contract functions, the cached encoder table of
+:class:`~asimov.contract.Contract` against the web3 ``encode_transaction_data`` path.
+
+    python benchmarks/abi_encode.py
+"""
+import timeit
+
+import asimov  # noqa: F401, patches eth_utils for asimov addresses
+from asimov._utils.encode import FunctionEncoderTable, encode_transaction_data
+
+
+ABI = [
+    {'constant': True, 'name': 'latestPrice', 'outputs': [{'name': '', 'type': 'uint256'}], 'payable': False,
+     'stateMutability': 'view', 'type': 'function', 'inputs': [{'name': 'pair', 'type': 'string'}]},
+    {'constant': False, 'name': 'updatePrice', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable',
+     'type': 'function', 'inputs': [{'name': 'pair', 'type': 'string'}, {'name': 'price', 'type': 'uint256'},
+                                    {'name': 'timestamp', 'type': 'uint64'}]},
+    {'constant': False, 'name': 'transfer', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable',
+     'type': 'function', 'inputs': [{'name': 'to', 'type': 'address'}, {'name': 'value', 'type': 'uint256'}]},
+] + [
+    # the other functions of a contract, searched by web3 on every call
+    {'constant': True, 'name': f'func{idx}', 'outputs': [], 'payable': False, 'stateMutability': 'view',
+     'type': 'function', 'inputs': [{'name': 'value', 'type': 'uint256'}]}
+    for idx in range(30)
+]
+
+CALLS = [
+    ("latestPrice", ["ASIM/USDT"]),
+    ("updatePrice", ["ASIM/USDT", 123456789, 1591000000]),
+    ("transfer", ["0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda", 10 ** 18]),
+]
+
+
+def main():
+    table = FunctionEncoderTable(ABI)
+    for fn_name, args in CALLS:
+        assert table.encode(fn_name, args) == \
+            encode_transaction_data(fn_identifier=fn_name, contract_abi=ABI, args=args)
+        number, web3_time = timeit.Timer(
+            lambda: encode_transaction_data(fn_identifier=fn_name, contract_abi=ABI, args=args)).autorange()
+        web3_rate = number / web3_time
+        number, table_time = timeit.Timer(lambda: table.encode(fn_name, args)).autorange()
+        table_rate = number / table_time
+        print(f"{fn_name:<12} web3 {web3_rate:>10.0f}/s  encoder table {table_rate:>10.0f}/s  "
+              f"x{table_rate / web3_rate:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Accounts and addresses derived per second, one by one and in bulk.
+
+    python benchmarks/addresses.py
+"""
+import time
+
+from asimov import AccountFactory
+
+COUNT = 20000
+
+
+def rate(func) -> float:
+    start = time.perf_counter()
+    func()
+    return COUNT / (time.perf_counter() - start)
+
+
+def main():
+    private_keys = [account.private_key for account in AccountFactory.new_many(COUNT)]
+    for name, func in (
+            ("new", lambda: [AccountFactory.new() for _ in range(COUNT)]),
+            ("new_many", lambda: AccountFactory.new_many(COUNT)),
+            ("new_many parallel", lambda: AccountFactory.new_many(COUNT, parallel=True)),
+            ("generate_address", lambda: [AccountFactory.generate_address(key) for key in private_keys]),
+            ("generate_addresses", lambda: AccountFactory.generate_addresses(private_keys)),
+            ("generate_addresses parallel", lambda: AccountFactory.generate_addresses(private_keys, parallel=True)),
+    ):
+        print(f"{name:<30}{rate(func):>10.0f} addresses per second")
+
+
+if __name__ == '__main__':
+    main()
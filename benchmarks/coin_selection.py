@@ -0,0 +1,71 @@
+"""
+Compare the coin selection strategies on synthetic wallets of 100k UTXO.
+
+    python benchmarks/coin_selection.py
+
+For every wallet and target amount it prints the input count and the selection time of each strategy,
+the "node order" row is the default behaviour of taking UTXO in the order the rpc server returns them.
+"""
+import random
+import time
+
+from asimov.utxo import UtxoIndex
+from asimov.coin_selection import LargestFirst, BranchAndBound, Knapsack, ConsolidateDust
+
+
+WALLET_SIZE = 100000
+
+
+def make_wallet(name, amounts):
+    utxos = [{"txid": f"{i:064x}", "vout": 0, "amount": amount, "spendable": True}
+             for i, amount in enumerate(amounts)]
+    return name, utxos
+
+
+def wallets(rnd):
+    yield make_wallet("dust", [rnd.randint(1000, 10000) for _ in range(WALLET_SIZE)])
+    yield make_wallet("log-uniform", [int(10 ** rnd.uniform(3, 9)) for _ in range(WALLET_SIZE)])
+    yield make_wallet("dust + few large", [rnd.randint(1000, 10000) for _ in range(WALLET_SIZE - 10)] +
+                      [rnd.randint(10 ** 8, 10 ** 9) for _ in range(10)])
+
+
+def node_order(utxos, amount):
+    selected = []
+    current_amount = 0
+    for utxo in utxos:
+        selected.append(utxo)
+        current_amount += utxo['amount']
+        if current_amount >= amount:
+            return selected
+    return None
+
+
+def main():
+    rnd = random.Random(0)
+    strategies = [
+        ("largest first", LargestFirst()),
+        ("branch and bound", BranchAndBound(cost_of_change=1000)),
+        ("knapsack", Knapsack(seed=0)),
+        ("consolidate dust", ConsolidateDust()),
+    ]
+    for name, utxos in wallets(rnd):
+        start = time.perf_counter()
+        index = UtxoIndex(utxos)
+        print(f"\n{name}: {len(index)} UTXO, total {index.total}, index built in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        for amount in (10 ** 6, 10 ** 8):
+            print(f"  amount {amount}")
+            start = time.perf_counter()
+            selected = node_order(utxos, amount)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"    {'node order':<18}{len(selected):>8} inputs {elapsed:>10.2f} ms")
+            for strategy_name, strategy in strategies:
+                start = time.perf_counter()
+                selected = strategy.select(index, amount)
+                elapsed = (time.perf_counter() - start) * 1000
+                count = "-" if selected is None else len(selected)
+                print(f"    {strategy_name:<18}{count:>8} inputs {elapsed:>10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
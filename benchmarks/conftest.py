@@ -0,0 +1,121 @@
+"""
+Fixtures of the pytest-benchmark suite, a local stub of the asimov rpc server and the peak memory of a benchmark.
+"""
+import json
+import hashlib
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+
+from asimov import Node, AccountFactory, constant
+
+# UTXO of every address on the stub node, more than one page of ``getUtxoInPage``
+UTXO_COUNT = 5000
+UTXO_AMOUNT = 100000
+
+_peak_memory = {}
+# count of the transactions broadcast to the stub node, every one spends the oldest UTXO listed and is confirmed
+# at once, the stub lists the UTXO from this index on so an address never runs out of them
+_broadcast = 0
+
+
+def _utxo(address: str, idx: int) -> dict:
+    return {'txid': f"{idx:064x}", 'vout': 0, 'address': address, 'height': 1,
+            'scriptPubKey': '76a91566010e69d32d61872368f250652c70cace6d35db01c5ac',
+            'amount': UTXO_AMOUNT, 'confirmations': 1, 'spendable': True,
+            'assets': constant.ASCOIN, 'locks': None}
+
+
+def _result(method: str, params: list):
+    global _broadcast  # pylint: disable=global-statement
+    if method == "getUtxoInPage":
+        address, _, offset, count = params
+        return {'utxos': [_utxo(address, _broadcast + idx) for idx in range(offset, min(offset + count, UTXO_COUNT))]}
+    if method == "runTransaction":
+        return {"gasUsed": 21000}
+    if method == "sendRawTransaction":
+        _broadcast += 1
+        return hashlib.sha256(params[0].encode()).hexdigest()
+    if method == "getBestBlock":
+        return {"hash": "00" * 32, "height": 9999}
+    raise KeyError(method)
+
+
+def _response(request: dict) -> dict:
+    method = request['method'][len(constant.RPC_PREFIX):]
+    try:
+        return {"jsonrpc": "2.0", "id": request['id'], "result": _result(method, request['params'])}
+    except KeyError:
+        return {"jsonrpc": "2.0", "id": request['id'], "error": {"code": -32601, "message": f"no {method}"}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):  # pylint: disable=invalid-name
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        rst = [_response(item) for item in payload] if isinstance(payload, list) else _response(payload)
+        body = json.dumps(rst).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture(scope="session")
+def stub_url():
+    """url of a local http server answering the rpc methods used to send transactions"""
+    server = _Server(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_utxo() -> tuple:
+    """count and amount of the UTXO of every address on the stub node"""
+    return UTXO_COUNT, UTXO_AMOUNT
+
+
+@pytest.fixture
+def stub_node(stub_url) -> Node:
+    return Node(stub_url, AccountFactory.new().private_key)
+
+
+@pytest.fixture
+def peak_memory(request, benchmark):
+    """
+    run a function once under tracemalloc before it is benchmarked,
+    its peak memory in bytes is kept in the ``extra_info`` of the benchmark and reported at the end
+    """
+    def measure(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info['peak_memory'] = peak
+        _peak_memory[request.node.name] = peak
+        return peak
+    return measure
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _peak_memory:
+        return
+    terminalreporter.write_sep("-", "peak memory")
+    width = max(len(name) for name in _peak_memory)
+    for name, peak in _peak_memory.items():
+        terminalreporter.write_line(f"{name:<{width}} {peak / 1024:>12.1f} KiB")
@@ -0,0 +1,45 @@
+"""
+The overhead of the rpc hooks of :class:`~asimov.node.Node`, a call without hooks, with an empty hook and with
+a :class:`~asimov.metrics.MetricsCollector`. The responses come from an in-process transport, so the rates
+are the cost of the client side of a call only.
+
+    python benchmarks/hooks.py
+"""
+import json
+import timeit
+
+from asimov import Node
+from asimov.metrics import Hook, MetricsCollector
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _Transport:
+    """stands in for the http session of the node, answering every request with the best block"""
+    def post(self, url, data, **kwargs):
+        request = json.loads(data)
+        return _Response(json.dumps({"jsonrpc": "2.0", "id": request['id'],
+                                     "result": {"hash": "00" * 32, "height": 9999}}).encode())
+
+
+def main():
+    baseline = None
+    for name, hooks in (("no hooks", []), ("empty hook", [Hook()]), ("collector", [MetricsCollector()])):
+        node = Node("http://localhost:8545", hooks=hooks)
+        node._local.session = _Transport()
+        number, elapsed = timeit.Timer(lambda: node.call("getBestBlock")).autorange()
+        per_call = elapsed / number * 1e6
+        baseline = baseline or per_call
+        print(f"{name:<12} {per_call:>8.2f} us/call  +{per_call - baseline:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
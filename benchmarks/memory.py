@@ -0,0 +1,54 @@
+"""
+Bytes held per pending transaction, a signed transfer with 1 input and 2 outputs
+and a contract call with 2 inputs and 2 outputs, as kept by the submitter until they are broadcast.
+
+    python benchmarks/memory.py
+"""
+import gc
+import tracemalloc
+
+from asimov import AccountFactory, Transaction, constant
+from asimov.data_type import Tx
+from asimov.account import Address
+
+COUNT = 2000
+
+
+def make_tx(account, idx: int, is_contract_tx: bool) -> Tx:
+    inputs = [{
+        "txid": f"{idx * 2 + n:064x}", "vout": n, "address": account.address, "height": 1,
+        "scriptPubKey": Address(account.address).to_script_pub_key(),
+        "amount": 1000000, "confirmations": 1, "spendable": True,
+        "assets": constant.ASCOIN, "locks": None, "signed_key": account,
+    } for n in range(2 if is_contract_tx else 1)]
+    outputs = [{
+        "amount": 1000, "assets": constant.ASCOIN,
+        "address": "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981",
+    }, {
+        "amount": 900000, "assets": constant.ASCOIN, "address": account.address,
+    }]
+    if is_contract_tx:
+        outputs[0].update(data="a9059cbb" + "00" * 64, contractType=constant.TxType.CALL)
+    return Tx(None, Transaction(inputs, outputs, gas_limit=60000), f"{idx:064x}", is_contract_tx)
+
+
+def measure(is_contract_tx: bool) -> float:
+    account = AccountFactory.new()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    txs = [make_tx(account, idx, is_contract_tx) for idx in range(COUNT)]
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del txs
+    return held / COUNT
+
+
+def main():
+    for name, is_contract_tx in (("transfer", False), ("contract call", True)):
+        print(f"{name:<15}{measure(is_contract_tx):>10.0f} bytes per pending transaction")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Serializations per second of transactions with 1, 100 and 1000 inputs.
+
+    python benchmarks/serialize.py
+"""
+import timeit
+
+from asimov import AccountFactory, Transaction
+
+
+def make_transaction(input_count: int) -> Transaction:
+    account = AccountFactory.new()
+    inputs = [{
+        "scriptPubKey": "76a915662250f9452ac336daaeee722615619d2ba1422793c5ac",
+        "txid": f"{idx:064x}",
+        "vout": idx % 4,
+        "signed_key": account,
+    } for idx in range(input_count)]
+    outputs = [{
+        "amount": 200000000,
+        "assets": '000000000000000000000000',
+        "address": '0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda',
+    }, {
+        "amount": 100000000,
+        "assets": '000000000000000000000000',
+        "address": account.address,
+    }]
+    tx = Transaction(inputs, outputs)
+    # serialize with the signature scripts of a signed transaction
+    for _input in tx.inputs:
+        _input.sig_script = bytes(107)
+    return tx
+
+
+def main():
+    for input_count in (1, 100, 1000):
+        tx = make_transaction(input_count)
+        for name, func in (("serialize", tx.serialize), ("to_hex", tx.to_hex)):
+            number, elapsed = timeit.Timer(func).autorange()
+            print(f"{input_count:>5} inputs {name:<10}{number / elapsed:>12.0f} per second")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+The hot paths of the sdk measured with pytest-benchmark, the node calls go to a local stub of the rpc server.
+
+    pip install py-asimov[benchmark]
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare
+
+The operations per second are in the ``OPS`` column, the peak memory of one run is reported after the table
+and saved in the ``extra_info`` of every benchmark.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from eth_abi import encode_abi  # noqa: E402
+from eth_utils import event_abi_to_log_topic  # noqa: E402
+
+from asimov import AccountFactory, Transaction, EvmLogParser, constant  # noqa: E402
+from asimov.transactions import AsimovScript  # noqa: E402
+from asimov._utils.encode import encode_params, encode_transaction_data  # noqa: E402
+
+
+TO_ADDRESS = '0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda'
+CONTRACT_ADDRESS = "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981"
+TRANSFER_EVENT = {
+    'anonymous': False, 'name': 'Transfer', 'type': 'event',
+    'inputs': [{'indexed': True, 'name': 'from', 'type': 'address'},
+               {'indexed': True, 'name': 'to', 'type': 'address'},
+               {'indexed': False, 'name': 'value', 'type': 'uint256'}],
+}
+ABI = [
+    {'constant': False, 'name': 'transfer', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable',
+     'type': 'function', 'inputs': [{'name': 'to', 'type': 'address'}, {'name': 'value', 'type': 'uint256'}]},
+    {'constant': False, 'name': 'updatePrice', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable',
+     'type': 'function', 'inputs': [{'name': 'pair', 'type': 'string'}, {'name': 'price', 'type': 'uint256'},
+                                    {'name': 'timestamp', 'type': 'uint64'}]},
+    TRANSFER_EVENT,
+]
+
+
+def make_transaction(input_count: int) -> Transaction:
+    account = AccountFactory.new()
+    inputs = [{
+        "scriptPubKey": "76a915662250f9452ac336daaeee722615619d2ba1422793c5ac",
+        "txid": f"{idx:064x}",
+        "vout": idx % 4,
+        "signed_key": account,
+    } for idx in range(input_count)]
+    outputs = [
+        {"amount": 200000000, "assets": constant.ASCOIN, "address": TO_ADDRESS},
+        {"amount": 100000000, "assets": constant.ASCOIN, "address": account.address},
+    ]
+    return Transaction(inputs, outputs)
+
+
+def make_logs(count: int) -> list:
+    topic = "0x" + event_abi_to_log_topic(TRANSFER_EVENT).hex()
+    address_topic = "0x" + TO_ADDRESS[2:].zfill(64)
+    return [{'address': CONTRACT_ADDRESS, 'topics': [topic, address_topic, address_topic],
+             'data': "0x" + encode_abi(['uint256'], [idx]).hex(), 'transactionHash': '', 'blockHash': ''}
+            for idx in range(count)]
+
+
+def test_new_account(benchmark, peak_memory):
+    peak_memory(AccountFactory.new)
+    benchmark(AccountFactory.new)
+
+
+@pytest.mark.parametrize("input_count", [1, 10, 100, 1000])
+def test_to_hex(benchmark, peak_memory, input_count):
+    tx = make_transaction(input_count).sign()
+    peak_memory(tx.to_hex)
+    benchmark(tx.to_hex)
+
+
+@pytest.mark.parametrize("input_count", [1, 10, 100, 1000])
+def test_sign(benchmark, peak_memory, input_count):
+    tx = make_transaction(input_count)
+    peak_memory(tx.sign)
+    benchmark(tx.sign)
+
+
+@pytest.mark.parametrize("input_count", [1, 100])
+def test_signature_hash(benchmark, peak_memory, input_count):
+    tx = make_transaction(input_count)
+    sub_script = tx.inputs[0].script_pub_key
+    peak_memory(AsimovScript.signature_hash, tx, 0, sub_script)
+    benchmark(AsimovScript.signature_hash, tx, 0, sub_script)
+
+
+def test_encode_params(benchmark, peak_memory):
+    args = ["ASIM/USDT", 123456789, 1591000000]
+    peak_memory(encode_params, ABI, "updatePrice", "function", args)
+    benchmark(encode_params, ABI, "updatePrice", "function", args)
+
+
+def test_encode_transaction_data(benchmark, peak_memory):
+    kwargs = dict(fn_identifier="transfer", contract_abi=ABI, args=[TO_ADDRESS, 10 ** 18])
+    peak_memory(encode_transaction_data, **kwargs)
+    benchmark(encode_transaction_data, **kwargs)
+
+
+def test_parse_logs(benchmark, peak_memory):
+    logs = make_logs(10000)
+    assert len(EvmLogParser.parse(logs, ABI)) == 10000
+    peak_memory(EvmLogParser.parse, logs, ABI)
+    benchmark(EvmLogParser.parse, logs, ABI)
+
+
+def test_get_utxo_paging(benchmark, peak_memory, stub_node, stub_utxo):
+    # every page of the UTXO is fetched to cover the amount
+    count, amount = stub_utxo
+    amount *= count - 1
+    assert len(stub_node._get_utxo(stub_node.address, amount=amount)) == count - 1
+    peak_memory(stub_node._get_utxo, stub_node.address, amount=amount)
+    benchmark(stub_node._get_utxo, stub_node.address, amount=amount)
+
+
+def test_send(benchmark, peak_memory, stub_node):
+    peak_memory(stub_node.send, TO_ADDRESS, 10)
+    tx = benchmark(stub_node.send, TO_ADDRESS, 10)
+    assert tx.id is not None
+    # the inputs stay reserved until the node sees the transaction confirmed
+    assert all((vin['txid'], vin['vout']) in stub_node._in_flight for vin in tx.transaction.vin)
+
+
+def test_call_write_function(benchmark, peak_memory, stub_node):
+    def call():
+        return stub_node.call_write_function("transfer", [TO_ADDRESS, 10], ABI, CONTRACT_ADDRESS).broadcast()
+
+    peak_memory(call)
+    tx = benchmark(call)
+    assert tx is not None
+    assert all((vin['txid'], vin['vout']) in stub_node._in_flight for vin in tx.transaction.vin)
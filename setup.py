@@ -11,8 +11,15 @@ extras_require = {
     'test': [
         "pytest>=5.2.2,<6",
         "pytest-cov>=2.8.1,<3",
+        "hypothesis>=5.10.0,<7",
         "tox>=3.15.0,<4",
     ],
+    'async': [
+        "aiohttp>=3.6.2,<4",
+    ],
+    'benchmark': [
+        "pytest-benchmark>=3.2.3,<4",
+    ],
     'lint': [
         "pylint>=2.5.2,<3",
     ],
@@ -32,6 +39,7 @@ extras_require = {
 extras_require['dev'] = (
     extras_require['dev'] +
     extras_require['test'] +
+    extras_require['async'] +
     extras_require['doc']
 )
 
@@ -19,7 +19,8 @@ def complied_contract() -> SmartContract:
     return AsimovSolc.compile("tests/fixtures/Refund.sol")['Refund']
 
 
-@pytest.fixture(scope="session")
+# a node for every test, the inputs it broadcasts stay reserved while the fake node lists them
+@pytest.fixture
 def node() -> Node:
     n = Node(private_key=AccountFactory.new().private_key)
     n.set_rpc_server("xxx")
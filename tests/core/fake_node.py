@@ -0,0 +1,152 @@
+"""
+canned JSON-RPC responses of an asimov node, shared by the tests talking to a fake rpc server
+"""
+import json
+import time
+import hashlib
+from unittest.mock import Mock
+
+import requests
+
+from asimov import constant, AsimovSolc
+from asimov.data_type import ContractTemplate
+
+
+c = AsimovSolc.compile("tests/fixtures/Refund.sol")['Refund']
+ct = ContractTemplate(
+    template_name="test_template",
+    category=1,
+    source=c.source,
+    abi=c.abi,
+    byte_code=c.bytecode
+)
+
+
+def response(post_data):
+    method = post_data['method'].split('_')[1]
+    params = post_data['params']
+    result = {}
+    if method == "getContractTemplate":
+        result = {"template_name": ct.template_name, "template_type": 1}
+    elif method == "getContractTemplateInfoByName":
+        result = {
+            "category": 1,
+            "template_name": ct.template_name,
+            "byte_code": ct.byte_code,
+            "abi": json.dumps(ct.abi),
+            "source": ct.source
+        }
+    elif method == "getContractTemplateInfoByKey":
+        result = {
+            "category": 1,
+            "template_name": ct.template_name,
+            "byte_code": ct.byte_code,
+            "abi": json.dumps(ct.abi),
+            "source": ct.source
+        }
+    elif method == "callReadOnlyFunction":
+        result = 1
+    elif method == "calculateContractAddress":
+        result = {'0': "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981"}
+    elif method == "getUtxoInPage" and params[2] > 0:
+        result = {'utxos': []}
+    elif method == "getUtxoInPage":
+        result = {'utxos': [{
+            'txid': 'f93a2e011cf066877f6dc74c436af6715a8602eba360cd42d715a382fe92b7ed',
+            'vout': 83, 'address': '0x66010e69d32d61872368f250652c70cace6d35db01',
+            'height': 31264, 'scriptPubKey': '76a91566010e69d32d61872368f250652c70cace6d35db01c5ac',
+            'amount': 100000000, 'confirmations': 1386, 'spendable': True,
+            'assets': constant.ASCOIN, 'locks': None}]
+        }
+    elif method == "getBalance":
+        result = [{"asset": constant.ASCOIN, "value": 100000000}]
+    elif method == "runTransaction":
+        result = {"gasUsed": 1}
+    elif method == "sendRawTransaction":
+        result = "ff882e011cf066877f6dc74c436af6715a8602eba360cd42d715a382fe92b7ed"
+    elif method == "getRawTransaction":
+        result = {
+            "txid": "4930275d7d82676d7d2855d300a0e7b990c0f8327d9dae958ac56cabfada6d18",
+            "hash": "4930275d7d82676d7d2855d300a0e7b990c0f8327d9dae958ac56cabfada6d18",
+            "blockhash": "d999b02caa6dd0dd7cea55cd9a1d7bd4bfcbbfcd431fea5d8fb8304b42ec9cc2",
+            "confirmations": 4607
+        }
+    elif method == "getTransactionReceipt":
+        result = {
+            "root": "0xe0faee16c5ff783cadc4ceb5e1e0587415e7b354351121b226d0da303671a892",
+            "status": "0x1",
+            "cumulativeGasUsed": "0x0",
+            "logsBloom": "0x00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000",
+            "logs": [],
+            "transactionHash": "22afe58927c8a7d8a25f10297db4a9a936a2beb68bb9a65a1667c2bb918b623a",
+            "contractAddress": "0x000000000000000000000000000000000000000000",
+            "gasUsed": "0x0"
+        }
+    elif method == "getBestBlock":
+        result = {
+            "hash": "d8dec197ec12aaf38db3739485e5ae517929059e2ddb1d0c6f59b77ded2a93a6",
+            "height": 9999
+        }
+    elif method == "getBlockHash":
+        result = f"{params[0]:064x}"
+    elif method == "getBlock":
+        result = {"hash": params[0], "height": int(params[0], 16), "rawtx": []}
+    elif method == "getNothing":
+        return {"jsonrpc": "2.0", "id": post_data['id'], "error": {"code": -1, "message": "not found"}}
+    return {"jsonrpc": "2.0", "id": post_data['id'], "result": result}
+
+
+def handle(post_data):
+    """answer a single or a batch JSON-RPC request"""
+    if isinstance(post_data, list):
+        return [response(item) for item in post_data]
+    return response(post_data)
+
+
+def post(url, data, **kwargs):
+    """stand-in for :meth:`requests.Session.post`"""
+    mock = Mock()
+    mock.json.return_value = handle(json.loads(data))
+    return mock
+
+
+def utxo_post(address: str, amounts: list, sent: list = None, rejects=0, reject_code=constant.RPC_MEMPOOL_FULL,
+              lost=0, delay=0):
+    """
+    stand-in for :meth:`requests.Session.post` of a node holding UTXO of the given ``amounts`` for ``address``,
+    the first ``rejects`` broadcasts are rejected with ``reject_code``, the connection breaks after the next ``lost``
+    ones are stored and the stored signed transactions are recorded in ``sent``
+    """
+    rejected, stored = [], {}
+
+    def node_post(url, data, **kwargs):
+        time.sleep(delay)
+        request = json.loads(data)
+        mock = Mock()
+        if request['method'] == "asimov_getUtxoInPage":
+            result = {'utxos': [] if request['params'][2] else [{
+                'txid': f"{i:064x}", 'vout': 0, 'address': address, 'height': 1,
+                'scriptPubKey': '76a91566010e69d32d61872368f250652c70cace6d35db01c5ac',
+                'amount': amount, 'confirmations': 1, 'spendable': True,
+                'assets': constant.ASCOIN, 'locks': None} for i, amount in enumerate(amounts)]}
+        elif request['method'] == "asimov_sendRawTransaction":
+            if len(rejected) < rejects:
+                rejected.append(request)
+                mock.json.return_value = {"jsonrpc": "2.0", "id": request['id'],
+                                          "error": {"code": reject_code, "message": "rejected"}}
+                return mock
+            result = hashlib.sha256(hashlib.sha256(bytes.fromhex(request['params'][0])).digest()).digest()[::-1].hex()
+            stored[result] = request['params'][0]
+            if sent is not None:
+                sent.append(request['params'][0])
+            if len(stored) <= lost:
+                raise requests.ConnectionError("connection reset")
+        elif request['method'] == "asimov_getRawTransaction" and request['params'][0] not in stored:
+            mock.json.return_value = {"jsonrpc": "2.0", "id": request['id'],
+                                      "error": {"code": -5, "message": "No information available about transaction"}}
+            return mock
+        else:
+            return post(url, data)
+        mock.json.return_value = {"jsonrpc": "2.0", "id": request['id'], "result": result}
+        return mock
+    return node_post
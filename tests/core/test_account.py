@@ -13,3 +13,31 @@ def test_new_address():
 def test_private2public():
     assert AccountFactory.private2public("0xbba692e559fda550d0157669b101bafddb23e7f57aeeb5cef5494e7a41a1f056") == b'043a68576342553357f042c6ede12bd3ed01cb61ad39848908883cab93f66c76016fb60b2b472d6caf316c699cb38f61d5daef3792402461ddc449a18b0fc8ee32'
 
+
+def test_new_many():
+    accounts = AccountFactory.new_many(20)
+    assert len({account.private_key for account in accounts}) == 20
+    for account in accounts:
+        expected = AccountFactory.new(account.private_key)
+        assert (account.address, account.public_key) == (expected.address, expected.public_key)
+        # the same x coordinate as the uncompressed public key computed by fastecdsa
+        assert account.public_key[2:] == AccountFactory.private2public(account.private_key)[2:66]
+
+
+def test_generate_addresses():
+    keys = ["bba692e559fda550d0157669b101bafddb23e7f57aeeb5cef5494e7a41a1f056"] + \
+        [account.private_key for account in AccountFactory.new_many(3)]
+    addresses = [AccountFactory.generate_address(key) for key in keys]
+    assert AccountFactory.generate_addresses(keys) == addresses
+    assert AccountFactory.generate_addresses(keys, parallel=True) == addresses
+
+
+def test_short_private_key():
+    # keys which are not zero-padded to 64 hex digits
+    expected = AccountFactory.new("00" * 31 + "01")
+    for key in ("0x01", "0x1", "1"):
+        assert AccountFactory.generate_address(key) == expected.address[2:]
+        assert AccountFactory.generate_addresses([key]) == [expected.address[2:]]
+        assert AccountFactory.private2compressed_public(key) == expected.public_key
+        account = AccountFactory.private2account(key)
+        assert (account.address, account.public_key) == (expected.address, expected.public_key)
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from asimov import constant, AccountFactory, error
+
+import fake_node
+
+web = pytest.importorskip("aiohttp.web")
+
+from aiohttp.test_utils import unused_port
+from asimov.async_node import AsyncNode
+from asimov.contract import AsyncContract
+from asimov.template import AsyncTemplate
+from asimov.metrics import MetricsCollector
+
+
+async def handle_rpc(request):
+    return web.json_response(fake_node.handle(await request.json()))
+
+
+def run(coroutine_func):
+    """run ``coroutine_func(node)`` against a local aiohttp server standing in for the asimov node"""
+    async def _run():
+        app = web.Application()
+        app.router.add_post("/", handle_rpc)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        port = unused_port()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        try:
+            async with AsyncNode(f"http://127.0.0.1:{port}/", AccountFactory.new().private_key) as node:
+                return await coroutine_func(node)
+        finally:
+            await runner.cleanup()
+    return asyncio.get_event_loop().run_until_complete(_run())
+
+
+def test_call():
+    async def _test(node):
+        assert await node.current_height() == 9999
+        assert await node.balance() == 100000000
+        with pytest.raises(error.RPCError):
+            await node.call("getNothing")
+    run(_test)
+
+
+def test_concurrent_calls():
+    async def _test(node):
+        heights = await asyncio.gather(*[node.current_height() for _ in range(20)])
+        assert heights == [9999] * 20
+    run(_test)
+
+
+def test_hooks():
+    async def _test(node):
+        node.options.hooks.append(MetricsCollector())
+        await node.current_height()
+        await node.batch([("getBestBlock", None), ("getNothing", None)])
+        snapshot = node.options.hooks[0].snapshot()
+        assert snapshot["getBestBlock"]["count"] == 1 and snapshot["getBestBlock"]["response_bytes"] > 0
+        assert snapshot["batch"]["errors"] == {"RPCError": 1}
+    run(_test)
+
+
+def test_batch():
+    async def _test(node):
+        rst = await node.batch([("getBestBlock", None), ("getNothing", None)])
+        assert rst[0]['height'] == 9999
+        assert isinstance(rst[1], error.RPCError)
+    run(_test)
+
+
+def test_balances():
+    async def _test(node):
+        addresses = [AccountFactory.new().address for _ in range(3)]
+        balances = await node.balances(addresses, [constant.ASCOIN], batch_size=2)
+        assert balances == {address: {constant.ASCOIN: 100000000} for address in addresses}
+    run(_test)
+
+
+def test_send():
+    async def _test(node):
+        tx = await node.send(AccountFactory.new().address, 1)
+        assert tx.id is not None
+        assert await tx.check() is constant.SUCCESS
+    run(_test)
+
+
+def test_fan_out():
+    async def _test(node):
+        [plan] = await node.fan_out(constant.ASCOIN, 3, 1000, dry_run=True)
+        [summary] = await node.fan_out(constant.ASCOIN, 3, 1000)
+        assert plan.tx is None and summary.tx.id is not None
+        assert (summary.inputs, summary.outputs, summary.fee) == (plan.inputs, 4, plan.fee)
+        assert await node.consolidate() == []
+    run(_test)
+
+
+def test_iter_blocks():
+    async def _test(node):
+        heights = []
+        blocks = [block async for block in node.iter_blocks(9995, prefetch=3, checkpoint=heights.append)]
+        assert [block['height'] for block in blocks] == heights == list(range(9995, 10000))
+        with pytest.raises(error.InvalidParams):
+            node.iter_blocks(9995, prefetch=0)
+    run(_test)
+
+
+def test_contract():
+    async def _test(node):
+        contract = await AsyncContract.create(node, "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981")
+        assert await contract.read("dict", (0,)) == 1
+        tx = await contract.execute("withdraw", (1000,))
+        assert await tx.check() is constant.SUCCESS
+        assert await contract.fetch(tx.id) == []
+    run(_test)
+
+
+def test_template():
+    async def _test(node):
+        tx, address = await AsyncTemplate(node).deploy_contract(
+            "43e23d67f6a5a9b4e6be4e808afb54e3e2bc9c549c20610589ecc5154efae172")
+        assert tx.id is not None
+        assert address == "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981"
+    run(_test)
+
+
+def test_failover():
+    async def _test(node):
+        node.options.backoff = 0
+        node.set_rpc_server([f"http://127.0.0.1:{unused_port()}/", node.provider])
+        assert await node.current_height() == 9999
+        assert node.provider == node.options.providers[1]
+    run(_test)
@@ -0,0 +1,99 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from requests import Session
+
+from asimov import Node, AccountFactory, constant, error
+from asimov.utxo import UtxoIndex, UtxoCache
+from asimov.coin_selection import LargestFirst, BranchAndBound, Knapsack, ConsolidateDust
+
+import fake_node
+
+
+def utxo(txid, amount, vout=0):
+    return {"txid": txid, "vout": vout, "amount": amount, "assets": constant.ASCOIN, "spendable": True}
+
+
+def amounts(utxos):
+    return sorted(u['amount'] for u in utxos)
+
+
+@pytest.fixture
+def index():
+    return UtxoIndex([utxo(str(i), amount) for i, amount in enumerate([1, 2, 3, 5, 8, 13, 50, 100])])
+
+
+def test_index_sorted_by_amount():
+    index = UtxoIndex([utxo("a", 5), utxo("b", 1), utxo("c", 3)])
+    index.add(utxo("d", 2))
+    index.update([utxo("e", 4), utxo("a", 5)])
+    assert [u['amount'] for u in index] == [1, 2, 3, 4, 5]
+    assert index.total == 15
+    index.discard(("c", 0))
+    assert [u['txid'] for u in reversed(index)] == ["a", "e", "d", "b"]
+    assert index.bisect(3) == 2 and ("c", 0) not in index
+
+
+def test_largest_first(index):
+    assert amounts(LargestFirst().select(index, 120)) == [50, 100]
+    # the last input is the smallest one covering the rest
+    assert amounts(LargestFirst().select(index, 104)) == [5, 100]
+    assert amounts(LargestFirst().select(index, 150)) == [50, 100]
+    assert LargestFirst().select(index, 183) is None
+
+
+def test_largest_first_equal_amounts():
+    index = UtxoIndex([utxo("a", 5), utxo("b", 5)])
+    selected = LargestFirst().select(index, 7)
+    assert sorted(u['txid'] for u in selected) == ["a", "b"]
+
+
+def test_branch_and_bound(index):
+    # 16 = 13 + 3 is an exact match, largest first would take 100
+    assert amounts(BranchAndBound().select(index, 16)) == [3, 13]
+    assert sum(amounts(BranchAndBound().select(index, 71))) == 71
+    assert amounts(BranchAndBound(cost_of_change=2).select(index, 49)) == [50]
+    assert amounts(BranchAndBound().select(index, 182)) == [1, 2, 3, 5, 8, 13, 50, 100]
+    # no exact match, fall back to largest first
+    assert amounts(BranchAndBound().select(UtxoIndex([utxo("a", 3), utxo("b", 5)]), 4)) == [5]
+    assert amounts(BranchAndBound(max_tries=1).select(index, 16)) == [100]
+
+
+def test_knapsack(index):
+    assert amounts(Knapsack(seed=1).select(index, 50)) == [50]
+    assert sum(amounts(Knapsack(seed=1).select(index, 16))) == 16
+    # the smaller ones can not cover the amount, take the smallest larger one
+    assert amounts(Knapsack(seed=1).select(index, 40)) == [50]
+    assert Knapsack().select(index, 1000) is None
+
+
+def test_consolidate_dust(index):
+    assert amounts(ConsolidateDust().select(index, 10)) == [1, 2, 3, 5]
+    assert amounts(ConsolidateDust(max_inputs=3).select(index, 10)) == [1, 2, 8]
+    assert amounts(ConsolidateDust(max_inputs=2).select(index, 120)) == [50, 100]
+    assert amounts(ConsolidateDust(max_inputs=2).select(index, 160)) == [13, 50, 100]
+
+
+def test_send_with_coin_selector():
+    node = Node("xxx", AccountFactory.new().private_key, coin_selector=LargestFirst())
+    to_address = AccountFactory.new().address
+    with patch.object(Session, "post", side_effect=fake_node.post):
+        tx = node.send(to_address, 1)
+        with pytest.raises(error.NotEnoughMoney):
+            node._get_utxo(node.address, constant.ASCOIN, 100000001)
+    [vin] = tx.transaction.vin
+    assert vin['amount'] == 100000000
+
+
+def test_coin_selector_per_call_with_cache():
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    to_address = AccountFactory.new().address
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        tx1 = node.send(to_address, 1, coin_selector=ConsolidateDust())
+        tx2 = node.send(to_address, 1, coin_selector=ConsolidateDust())
+        methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+    # the first page and the empty page after it
+    assert methods.count("asimov_getUtxoInPage") == 2
+    [vin] = tx2.transaction.vin
+    assert (vin['txid'], vin['vout']) == (tx1.id, 1)
@@ -1,5 +1,77 @@
+from unittest.mock import patch
+
+import pytest
+
 from asimov import AsimovSolc
+from asimov.solc import CompileCache
 
 
 def test_compile():
     AsimovSolc.compile("tests/fixtures/Refund.sol")
+
+
+def fake_compile_files(source_files, output_values=None, **kwargs):
+    # the contracts of the imported files are in the output too
+    paths = set(source_files) | {f.replace("a.sol", "lib.sol") for f in source_files if f.endswith("a.sol")}
+    return {f"{path}:{path.split('/')[-1][:-4].upper()}": {'abi': [], 'bin': '00'} for path in paths}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    (tmp_path / "lib.sol").write_text("contract LIB {}")
+    (tmp_path / "a.sol").write_text('import "./lib.sol";\ncontract A {}')
+    (tmp_path / "b.sol").write_text("contract B {}")
+    yield tmp_path
+    AsimovSolc.set_compile_cache(None)
+
+
+def test_compile_cache(sources):
+    AsimovSolc.set_compile_cache(CompileCache(str(sources / "cache")))
+    a = str(sources / "a.sol")
+    with patch("asimov.solc.compile_files", side_effect=fake_compile_files) as compile_files:
+        contracts = AsimovSolc.compile(a)
+        assert AsimovSolc.compile(a) == contracts
+        assert compile_files.call_count == 1
+        # a changed import is compiled again
+        (sources / "lib.sol").write_text("contract LIB { }")
+        AsimovSolc.compile(a)
+        assert compile_files.call_count == 2
+        # another process sharing the directory
+        AsimovSolc.set_compile_cache(CompileCache(str(sources / "cache")))
+        assert AsimovSolc.compile(a) == contracts
+        assert AsimovSolc.compile(a, optimize=True) == contracts
+        assert compile_files.call_count == 3
+    assert contracts['A'].source == 'import "./lib.sol";\ncontract A {}'
+
+
+def test_unresolved_import(sources):
+    AsimovSolc.set_compile_cache(CompileCache())
+    (sources / "c.sol").write_text('import "lib/missing.sol";\ncontract C {}')
+    c = str(sources / "c.sol")
+    with patch("asimov.solc.compile_files", side_effect=fake_compile_files) as compile_files:
+        AsimovSolc.compile(c)
+        # the content of the import is unknown, the file is never served from the cache
+        AsimovSolc.compile(c)
+        assert compile_files.call_count == 2
+
+
+def test_compile_many(sources):
+    files = [str(sources / "a.sol"), str(sources / "b.sol")]
+    with patch("asimov.solc.compile_files", side_effect=fake_compile_files) as compile_files:
+        rst = AsimovSolc.compile_many(files)
+    compile_files.assert_called_once()
+    assert sorted(rst[files[0]]) == ['A', 'LIB']
+    assert sorted(rst[files[1]]) == ['B']
+
+
+def test_compile_many_parallel(sources):
+    cache = CompileCache()
+    AsimovSolc.set_compile_cache(cache)
+    files = [str(sources / "a.sol"), str(sources / "b.sol")]
+    with patch("asimov.solc.compile_files", side_effect=fake_compile_files):
+        rst = AsimovSolc.compile_many(files, parallel=True, max_workers=2)
+        assert sorted(rst[files[0]]) == ['A', 'LIB']
+        # the results of the processes are cached, no process is started for the hits
+        with patch("asimov.solc.ProcessPoolExecutor") as executor:
+            assert AsimovSolc.compile_many(files, parallel=True) == rst
+        executor.assert_not_called()
@@ -0,0 +1,123 @@
+import json
+from unittest.mock import patch, Mock
+
+import pytest
+from requests import Session
+
+from asimov import Node, AccountFactory, constant, error
+from asimov.confirmation import ConfirmationTracker, Confirmation
+
+import fake_node
+
+
+def methods_of(mock_post):
+    methods = []
+    for c in mock_post.call_args_list:
+        data = json.loads(c[1]['data'])
+        methods.append([e['method'] for e in data] if isinstance(data, list) else data['method'])
+    return methods
+
+
+@pytest.fixture
+def node():
+    return Node("xxx", AccountFactory.new().private_key)
+
+
+def test_track_many(node):
+    tracker = ConfirmationTracker(node, confirm_num=6)
+    called = []
+    futures = tracker.track_many(["a", "b"], callback=called.append)
+    contract_future = tracker.track("c", is_contract_tx=True)
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        assert tracker.wait() is True
+    assert [f.result() for f in futures] == [Confirmation("a", 4607, constant.SUCCESS),
+                                           Confirmation("b", 4607, constant.SUCCESS)]
+    assert contract_future.result().status == constant.SUCCESS
+    assert called == futures
+    # one batch for all the transactions, one for the receipts of contract transactions
+    assert methods_of(mock_post) == [
+        "asimov_getBestBlock",
+        ["asimov_getRawTransaction"] * 3,
+        ["asimov_getTransactionReceipt"],
+    ]
+
+
+def test_check_on_new_block_only(node):
+    tracker = ConfirmationTracker(node, confirm_num=10000, poll_interval=0)
+    future = tracker.track("a")
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        assert tracker.poll() is True
+        assert tracker.poll() is False
+        tracker.track("b", timeout=0)
+        tracker.poll()
+    assert methods_of(mock_post) == [
+        "asimov_getBestBlock",
+        ["asimov_getRawTransaction"],
+        "asimov_getBestBlock",
+        "asimov_getBestBlock",
+        # the newly tracked one is checked before the next block
+        ["asimov_getRawTransaction"],
+    ]
+    assert not future.done() and len(tracker) == 1
+
+
+def test_timeout(node):
+    tracker = ConfirmationTracker(node, confirm_num=10000, timeout=0)
+    future = tracker.track("a")
+    with patch.object(Session, "post", side_effect=fake_node.post):
+        assert tracker.wait() is True
+    with pytest.raises(error.ConfirmationTimeout):
+        future.result()
+
+
+def test_batch_size(node):
+    tracker = ConfirmationTracker(node, confirm_num=6, batch_size=2)
+    tracker.track_many(["a", "b", "c"])
+    for tx_id in ("d", "e", "f"):
+        tracker.track(tx_id, is_contract_tx=True)
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        assert tracker.wait() is True
+    assert methods_of(mock_post) == [
+        "asimov_getBestBlock",
+        ["asimov_getRawTransaction"] * 2,
+        ["asimov_getRawTransaction"] * 2,
+        ["asimov_getRawTransaction"] * 2,
+        ["asimov_getTransactionReceipt"] * 2,
+        ["asimov_getTransactionReceipt"],
+    ]
+
+
+def failing_post(failures: int):
+    """stand-in for :meth:`requests.Session.post` answering the first ``failures`` batch requests with an empty body"""
+    failed = []
+
+    def post(url, data, **kwargs):
+        if isinstance(json.loads(data), list) and len(failed) < failures:
+            failed.append(data)
+            mock = Mock(content=b'')
+            mock.json.side_effect = json.decoder.JSONDecodeError("empty", "", 0)
+            return mock
+        return fake_node.post(url, data)
+    return post
+
+
+def test_check_again_after_failure(node):
+    tracker = ConfirmationTracker(node, confirm_num=6)
+    future = tracker.track("a")
+    with patch.object(Session, "post", side_effect=failing_post(1)):
+        with pytest.raises(error.JsonException):
+            tracker.poll()
+        # the block is not handled yet, the transaction is checked again on the same block
+        assert tracker.poll() is True
+    assert future.result().confirmations == 4607
+
+
+def test_background_survives_failure(node):
+    tracker = ConfirmationTracker(node, confirm_num=6, poll_interval=0.01)
+    future = tracker.track("a")
+    with patch.object(Session, "post", side_effect=failing_post(2)):
+        tracker.start()
+        try:
+            assert future.result(timeout=5).confirmations == 4607
+        finally:
+            tracker.stop()
@@ -0,0 +1,90 @@
+import json
+from unittest.mock import patch, Mock
+
+import pytest
+from requests import Session
+
+from asimov import Node, AccountFactory, AsimovSolc, EvmLogParser, error
+from asimov.indexer import EventIndex
+
+import fake_node
+
+
+CONTRACT = "0x639195a77e67bba57c4dee0eb90fa69c382af32068"
+ABI = AsimovSolc.compile('tests/fixtures/Refund.sol')['Refund'].abi
+RECEIVE_MONEY = '0x969b7dfe904e12379ac05bce497fa9088da9fa8df26ff2a80040a606b4327e77'
+INDEX_RECEIVE_MONEY = '0xfb6314fe8815b6ca7b5804da14bb460b9d07aa5c682d4a46b06e38a5367de2b0'
+LOGS = [
+    {'address': CONTRACT, 'topics': [RECEIVE_MONEY],
+     'data': '0x000000000000000000000066147fa5db10fb56cdf5911304efc2a3e59c39ca68'
+             '000000000000000000000000000000000000000000000000000000003b9aca00'
+             '0000000000000000000000000000000000000000000000000000000000000000',
+     'transactionHash': '', 'blockHash': ''},
+    {'address': CONTRACT,
+     'topics': [INDEX_RECEIVE_MONEY,
+                '0x000000000000000000000066147fa5db10fb56cdf5911304efc2a3e59c39ca68',
+                '0x000000000000000000000000000000000000000000000000000000003b9aca00',
+                '0x0000000000000000000000000000000000000000000000000000000000000000'],
+     'data': '0x', 'transactionHash': '', 'blockHash': ''},
+    # the log of a contract not in the index
+    {'address': "0x63" + "00" * 20, 'topics': [RECEIVE_MONEY], 'data': '0x', 'transactionHash': '', 'blockHash': ''},
+]
+
+
+def test_ingest_and_query(tmp_path):
+    path = str(tmp_path / "events.db")
+    with EventIndex(path) as index:
+        index.add_contract(CONTRACT, ABI)
+        assert index.ingest(10, "aa", LOGS) == 2
+        assert index.ingest(12, "bb", LOGS[:1]) == 1
+
+    # the contracts and the events are read from the file again
+    with EventIndex(path) as index:
+        assert index.ingest(11, "cc", LOGS[:1]) == 1
+        events = index.query(address=CONTRACT.upper().replace("0X", "0x"))
+        assert [(e['height'], e['tx_id'], e['log_index']) for e in events] == [(10, "aa", 0), (10, "aa", 1),
+                                                                             (11, "cc", 0), (12, "bb", 0)]
+        expected = EvmLogParser.parse(LOGS[:2], ABI)
+        assert [(e['name'], e['args']) for e in events[:2]] == [(e['name'], e['args']) for e in expected]
+
+        assert [e['tx_id'] for e in index.query(name="ReceiveMoney", from_height=11, to_height=12)] == ["cc", "bb"]
+        [event] = index.query(topics=["66147fa5db10fb56cdf5911304efc2a3e59c39ca68".zfill(64), None])
+        assert event['name'] == "IndexReceiveMoney"
+        assert len(index.query(limit=2)) == 2
+        assert index.query(tx_id="dd") == []
+        assert index.height is None
+        with pytest.raises(error.InvalidParams):
+            index.query(topics=[None] * 4)
+
+
+def test_sync():
+    node = Node("xxx", AccountFactory.new().private_key)
+
+    def post(url, data, **kwargs):
+        payload = json.loads(data)
+        if isinstance(payload, dict) and payload['method'] == "asimov_getBlock":
+            height = int(payload['params'][0], 16)
+            result = {"hash": payload['params'][0], "height": height, "tx": [f"{height}-0", f"{height}-1"]}
+        elif isinstance(payload, list):
+            # the receipts, the second transaction of a block is not a contract call
+            result = [{"jsonrpc": "2.0", "id": item['id'], "result": {"logs": LOGS}} if item['params'][0][-1] == "0"
+                      else {"jsonrpc": "2.0", "id": item['id'], "error": {"code": -1, "message": "not found"}}
+                      for item in payload]
+            mock = Mock()
+            mock.json.return_value = result
+            return mock
+        else:
+            return fake_node.post(url, data)
+        mock = Mock()
+        mock.json.return_value = {"jsonrpc": "2.0", "id": payload['id'], "result": result}
+        return mock
+
+    index = EventIndex()
+    index.add_contract(CONTRACT, ABI)
+    with patch.object(Session, "post", side_effect=post):
+        assert index.sync(node, end=2) == 6
+        assert index.height == 2
+        # resume from the next height
+        assert index.sync(node, end=3) == 2
+    assert index.height == 3
+    assert [e['height'] for e in index.query(name="ReceiveMoney")] == [0, 1, 2, 3]
@@ -1,4 +1,7 @@
+import json
+
 from asimov import AsimovSolc, EvmLogParser
+from asimov.evm_log import EventDecoder
 
 
 def test_vm_log():
@@ -39,3 +42,22 @@ def test_vm_log():
     assert logs[0]['name'] == 'ReceiveMoney'
     assert logs[1]['name'] == 'IndexReceiveMoney'
     assert logs[2]['name'] == 'PartialIndexReceiveMoney'
+
+
+def test_event_decoder():
+    abi = AsimovSolc.compile('tests/fixtures/Refund.sol')['Refund'].abi
+    decoder = EventDecoder.of(abi)
+    assert EventDecoder.of(json.dumps(abi, sort_keys=True)) is decoder
+    logs = decoder.decode_logs([
+        {'topics': ['0x03b2212fb69fba773f7a7d89e4859394969c7589648cb9306892e07ba680a4dd',
+                    '0x000000000000000000000000000000000000000000000000000000003b9aca00'],
+         'data': '0x000000000000000000000066147fa5db10fb56cdf5911304efc2a3e59c39ca68'
+                 '0000000000000000000000000000000000000000000000000000000000000000',
+         'address': '', 'blockHash': '', 'transactionHash': ''},
+        # an event of another contract and a log without topics are skipped
+        {'topics': ['0x' + '11' * 32], 'data': '0x', 'address': '', 'blockHash': '', 'transactionHash': ''},
+        {'topics': [], 'data': '0x', 'address': '', 'blockHash': '', 'transactionHash': ''},
+    ])
+    assert len(logs) == 1
+    assert logs[0]['name'] == 'PartialIndexReceiveMoney'
+    assert 1000000000 in logs[0]['args'].values()
@@ -0,0 +1,104 @@
+import json
+import socket
+from unittest.mock import patch, Mock
+
+import pytest
+import requests
+from requests import Session
+
+from asimov import Node, AccountFactory, error
+from asimov.metrics import Hook, MetricsCollector, StatsdHook
+
+import fake_node
+
+
+def post(url, data, **kwargs):
+    if url == "http://down":
+        raise requests.ConnectionError("connection reset")
+    json_data = fake_node.handle(json.loads(data))
+    mock = Mock()
+    mock.json.return_value = json_data
+    mock.content = json.dumps(json_data).encode()
+    return mock
+
+
+def test_hooks():
+    calls = []
+
+    class Recorder(Hook):
+        def before_request(self, info):
+            calls.append(("before", info.method, info.elapsed))
+
+        def after_response(self, info):
+            calls.append(("after", info.method, info.error))
+
+    node = Node("xxx", AccountFactory.new().private_key, hooks=[Recorder()])
+    with patch.object(Session, "post", side_effect=post):
+        node.current_height
+        with pytest.raises(error.RPCError):
+            node.call("getNothing")
+    assert calls == [("before", "getBestBlock", None), ("after", "getBestBlock", None),
+                     ("before", "getNothing", None), ("after", "getNothing", None)]
+
+
+def test_failed_hook():
+    class Broken(Hook):
+        def before_request(self, info):
+            raise ValueError("broken")
+
+        def after_response(self, info):
+            raise ValueError("broken")
+
+    metrics = MetricsCollector()
+    node = Node("xxx", AccountFactory.new().private_key, hooks=[Broken(), metrics])
+    with patch.object(Session, "post", side_effect=post):
+        # the broadcast succeeded, its inputs stay spent
+        tx = node.send(AccountFactory.new().address, 1)
+    assert tx.id
+    assert node._in_flight
+    assert metrics.snapshot()["sendRawTransaction"]["count"] == 1
+
+
+def test_collector():
+    metrics = MetricsCollector()
+    node = Node(["http://down", "http://up"], AccountFactory.new().private_key, backoff=0, hooks=[metrics])
+    with patch.object(Session, "post", side_effect=post):
+        for _ in range(3):
+            node.balance()
+        node.batch([("getBestBlock", None), ("getNothing", None)])
+        node.set_rpc_server("http://down")
+        with pytest.raises(error.NetWorkError):
+            node.current_height
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"getBalance", "batch", "getBestBlock"}
+    balance = snapshot["getBalance"]
+    assert balance["count"] == 3
+    assert balance["retries"] == 1
+    assert 0 < balance["p50"] <= balance["p95"] <= balance["p99"]
+    assert balance["request_bytes"] > 0 and balance["response_bytes"] > 0
+    assert snapshot["batch"]["errors"] == {"RPCError": 1}
+    assert snapshot["getBestBlock"]["errors"] == {"NetWorkError": 1}
+    assert snapshot["getBestBlock"]["retries"] == node.options.retries
+
+    text = metrics.prometheus()
+    assert '# TYPE asimov_rpc_latency_seconds summary' in text
+    assert 'asimov_rpc_latency_seconds_count{method="getBalance"} 3' in text
+    assert 'asimov_rpc_errors_total{method="batch",error="RPCError"} 1' in text
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_statsd():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(5)
+    hook = StatsdHook(*server.getsockname())
+    node = Node("xxx", AccountFactory.new().private_key, hooks=[hook])
+    with patch.object(Session, "post", side_effect=post):
+        node.current_height
+    lines = server.recv(4096).decode().split("\n")
+    hook.close()
+    server.close()
+    assert lines[0].startswith("asimov.rpc.getBestBlock.latency:") and lines[0].endswith("|ms")
+    assert "asimov.rpc.getBestBlock.requests:1|c" in lines
@@ -2,91 +2,16 @@ import json
 from unittest.mock import patch, Mock
 
 import pytest
+import requests
 from requests import Session
 
-from asimov import Node, Contract, constant, AsimovSolc, AccountFactory
-from asimov.data_type import ContractTemplate
+from asimov import Node, Contract, Transaction, constant, AccountFactory, error
 
-
-c = AsimovSolc.compile("tests/fixtures/Refund.sol")['Refund']
-ct = ContractTemplate(
-    template_name="test_template",
-    category=1,
-    source=c.source,
-    abi=c.abi,
-    byte_code=c.bytecode
-)
+import fake_node
 
 
 class TestNode:
-    @staticmethod
-    def post(url, data):
-        mock = Mock()
-        post_data = json.loads(data)
-        method = post_data['method'].split('_')[1]
-        params = post_data['params']
-        result = {}
-        if method == "getContractTemplate":
-            result = {"template_name": ct.template_name, "template_type": 1}
-        elif method == "getContractTemplateInfoByName":
-            result = {
-                "category": 1,
-                "template_name": ct.template_name,
-                "byte_code": ct.byte_code,
-                "abi": json.dumps(ct.abi),
-                "source": ct.source
-            }
-        elif method == "getContractTemplateInfoByKey":
-            result = {
-                "category": 1,
-                "template_name": ct.template_name,
-                "byte_code": ct.byte_code,
-                "abi": json.dumps(ct.abi),
-                "source": ct.source
-            }
-        elif method == "callReadOnlyFunction":
-            result = 1
-        elif method == "calculateContractAddress":
-            result = {'0': "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981"}
-        elif method == "getUtxoInPage":
-            result = {'utxos': [{
-                'txid': 'f93a2e011cf066877f6dc74c436af6715a8602eba360cd42d715a382fe92b7ed',
-                'vout': 83, 'address': '0x66010e69d32d61872368f250652c70cace6d35db01',
-                'height': 31264, 'scriptPubKey': '76a91566010e69d32d61872368f250652c70cace6d35db01c5ac',
-                'amount': 100000000, 'confirmations': 1386, 'spendable': True,
-                'assets': constant.ASCOIN, 'locks': None}]
-            }
-        elif method == "getBalance":
-            result = [{"asset": constant.ASCOIN, "value": 100000000}]
-        elif method == "runTransaction":
-            result = {"gasUsed": 1}
-        elif method == "sendRawTransaction":
-            result = "ff882e011cf066877f6dc74c436af6715a8602eba360cd42d715a382fe92b7ed"
-        elif method == "getRawTransaction":
-            result = {
-                "txid": "4930275d7d82676d7d2855d300a0e7b990c0f8327d9dae958ac56cabfada6d18",
-                "hash": "4930275d7d82676d7d2855d300a0e7b990c0f8327d9dae958ac56cabfada6d18",
-                "blockhash": "d999b02caa6dd0dd7cea55cd9a1d7bd4bfcbbfcd431fea5d8fb8304b42ec9cc2",
-                "confirmations": 4607
-            }
-        elif method == "getTransactionReceipt":
-            result = {
-                "root": "0xe0faee16c5ff783cadc4ceb5e1e0587415e7b354351121b226d0da303671a892",
-                "status": "0x1",
-                "cumulativeGasUsed": "0x0",
-                "logsBloom": "0x00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000",
-                "logs": [],
-                "transactionHash": "22afe58927c8a7d8a25f10297db4a9a936a2beb68bb9a65a1667c2bb918b623a",
-                "contractAddress": "0x000000000000000000000000000000000000000000",
-                "gasUsed": "0x0"
-            }
-        elif method == "getBestBlock":
-            result = {
-                "hash": "d8dec197ec12aaf38db3739485e5ae517929059e2ddb1d0c6f59b77ded2a93a6",
-                "height": 9999
-            }
-        mock.json.return_value = {"jsonrpc": "2.0", "id": 1, "result": result}
-        return mock
+    post = staticmethod(fake_node.post)
 
     def test_deploy(self, node: Node, complied_contract):
         with patch.object(Session, "post", side_effect=self.post):
@@ -133,7 +58,180 @@ class TestNode:
         with patch.object(Session, "post", side_effect=self.post):
             assert node.send(to_address, 1).check() is constant.SUCCESS
 
+    def test_send_fee_without_rpc_estimate(self, node: Node):
+        to_address = AccountFactory.new().address
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            tx = node.send(to_address, 1)
+            methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+        assert "asimov_runTransaction" not in methods
+        transaction = tx.transaction
+        assert transaction.gas_limit == Transaction(
+            transaction.vin, transaction.vout).serialize_size(estimate_signature=True) * 21 + 50000
+        fee = sum(vin['amount'] for vin in transaction.vin) - sum(vout['amount'] for vout in transaction.vout)
+        assert fee >= transaction.gas_limit * constant.DEFAULT_GAS_PRICE
+
+    def test_call_estimated_once(self, node: Node):
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            tx = node.call_write_function(
+                "withdraw", (1,), fake_node.ct.abi, "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981", asset_value=100)
+            methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+        # the transaction is not broadcast, give its UTXO back to the shared node
+        node.release(tx)
+        assert methods.count("asimov_runTransaction") == 1
+
     def test_current_height(self, node: Node):
         with patch.object(Session, "post", side_effect=self.post):
             assert node.current_height == 9999
 
+    def test_batch(self, node: Node):
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            rst = node.batch([
+                ("getBestBlock", None),
+                ("getNothing", ["xxx"]),
+                ("getBalance", [node.address]),
+            ])
+            assert mock_post.call_count == 1
+            assert rst[0]['height'] == 9999
+            assert isinstance(rst[1], error.RPCError)
+            assert rst[2] == [{"asset": constant.ASCOIN, "value": 100000000}]
+
+    def test_batch_unique_ids(self, node: Node):
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            node.batch([("getBestBlock", None)] * 3)
+            ids = [item['id'] for item in json.loads(mock_post.call_args[1]['data'])]
+            assert len(set(ids)) == 3
+
+    def test_balances(self, node: Node):
+        addresses = [AccountFactory.new().address for _ in range(5)]
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            balances = node.balances(addresses + addresses[:1], batch_size=2)
+            assert mock_post.call_count == 3
+            assert balances == {address: {constant.ASCOIN: 100000000} for address in addresses}
+            assert node.balances(addresses[:1], ["000000000000000000000001", constant.ASCOIN]) == \
+                {addresses[0]: {"000000000000000000000001": 0, constant.ASCOIN: 100000000}}
+            assert node.balances([]) == {}
+
+    def test_iter_blocks(self, node: Node):
+        heights = []
+        with patch.object(Session, "post", side_effect=self.post):
+            blocks = node.iter_blocks(9990, prefetch=4, checkpoint=heights.append)
+            assert [block['height'] for block in blocks] == list(range(9990, 10000))
+            assert heights == list(range(9990, 10000))
+            assert [block['height'] for block in node.iter_blocks(5, 7)] == [5, 6, 7]
+            # it stops at the chain head without following it
+            assert [block['height'] for block in node.iter_blocks(9998, 10005)] == [9998, 9999]
+        with pytest.raises(error.InvalidParams):
+            node.iter_blocks(9990, prefetch=0)
+
+    def test_iter_blocks_follow(self):
+        node = Node("xxx", AccountFactory.new().private_key)
+        best = iter(range(9999, 20000))
+
+        def post(url, data, **kwargs):
+            # a new block arrives every time the head is checked
+            request = json.loads(data)
+            if request['method'] == "asimov_getBestBlock":
+                mock = Mock()
+                mock.json.return_value = {"jsonrpc": "2.0", "id": request['id'], "result": {"height": next(best)}}
+                return mock
+            return fake_node.post(url, data)
+
+        with patch.object(Session, "post", side_effect=post):
+            blocks = node.iter_blocks(9998, prefetch=2, follow=True, poll_interval=0)
+            assert [next(blocks)['height'] for _ in range(5)] == list(range(9998, 10003))
+            blocks.close()
+
+    def test_failover(self):
+        node = Node(["http://a", "http://b"], AccountFactory.new().private_key, backoff=0)
+
+        def post(url, data, **kwargs):
+            if url == "http://a":
+                raise requests.ConnectionError("connection reset")
+            return fake_node.post(url, data)
+
+        with patch.object(Session, "post", side_effect=post) as mock_post:
+            assert node.current_height == 9999
+            assert [c[1]['url'] for c in mock_post.call_args_list] == ["http://a", "http://b"]
+            assert mock_post.call_args[1]['timeout'] == (10, 60)
+        assert node.provider == "http://b"
+
+    def test_no_retry_for_write(self):
+        node = Node(["http://a", "http://b"], AccountFactory.new().private_key, backoff=0)
+        with patch.object(Session, "post", side_effect=requests.ConnectionError("connection reset")) as mock_post:
+            with pytest.raises(error.NetWorkError):
+                node.call("sendRawTransaction", ["00"])
+            assert mock_post.call_count == 1
+            with pytest.raises(error.NetWorkError):
+                node.call("getBestBlock")
+            assert mock_post.call_count == 1 + 4
+
+    def test_send_many(self, node: Node):
+        addresses = [AccountFactory.new().address for _ in range(3)]
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            [tx] = node.send_many([(addresses[0], 1), (addresses[1], 2, constant.ASCOIN), (addresses[2], 3)])
+            methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+        assert methods.count("asimov_sendRawTransaction") == 1
+        vout = tx.transaction.vout
+        assert [(o['address'], o['amount']) for o in vout[:3]] == list(zip(addresses, [1, 2, 3]))
+        # the change
+        assert vout[3]['address'] == node.address
+        assert sum(o['amount'] for o in vout) + tx.transaction.gas_limit // 10 + 1 >= 100000000
+
+    def test_send_many_split(self, node: Node):
+        payments = [(AccountFactory.new().address, i + 1) for i in range(7)]
+        with patch.object(Session, "post", side_effect=fake_node.utxo_post(node.address, [10 ** 8] * 7)):
+            txs = node.send_many(payments, max_size=400)
+        assert len(txs) > 1
+        # the inputs of the broadcast transactions are not confirmed, every transaction spends other UTXO
+        outpoints = [(vin['txid'], vin['vout']) for tx in txs for vin in tx.transaction.vin]
+        assert len(outpoints) == len(set(outpoints))
+        paid = [(o['address'], o['amount']) for tx in txs for o in tx.transaction.vout if o['address'] != node.address]
+        assert paid == payments
+        assert all(tx.transaction.serialize_size(estimate_signature=True) <= 400 for tx in txs)
+        with pytest.raises(error.InvalidParams):
+            node.send_many([(payments[0][0], 0)])
+
+    def test_send_many_exceeds(self):
+        node = Node("xxx", AccountFactory.new().private_key)
+        with patch.object(Session, "post", side_effect=fake_node.utxo_post(node.address, [10 ** 6] * 10)):
+            # one payment needs all the inputs, it can not be split any further
+            with pytest.raises(error.InvalidParams):
+                node.send_many([(AccountFactory.new().address, 5 * 10 ** 6)], max_size=400)
+            assert not node._in_flight
+            with pytest.raises(error.InvalidParams):
+                node.send_many([(AccountFactory.new().address, 1)], max_gas=1)
+            assert not node._in_flight
+
+    def test_consolidate(self):
+        node = Node("xxx", AccountFactory.new().private_key)
+        with patch.object(Session, "post", side_effect=fake_node.utxo_post(node.address, [1000] * 250 + [10 ** 8])):
+            plan = node.consolidate(max_inputs=100, max_amount=1000, dry_run=True)
+            assert not node._in_flight
+            assert [(s.tx, s.inputs, s.outputs) for s in plan] == [(None, 100, 1), (None, 100, 1), (None, 50, 1)]
+            assert all(s.fee >= s.gas_limit * constant.DEFAULT_GAS_PRICE for s in plan)
+
+            summaries = node.consolidate(max_inputs=100, max_amount=1000)
+        assert [(s.inputs, s.fee) for s in summaries] == [(s.inputs, s.fee) for s in plan]
+        assert all(s.tx.id for s in summaries)
+        assert all(vin['amount'] == 1000 for s in summaries for vin in s.tx.transaction.vin)
+
+    def test_consolidate_dust(self):
+        node = Node("xxx", AccountFactory.new().private_key)
+        with patch.object(Session, "post", side_effect=fake_node.utxo_post(node.address, [1, 1, 10 ** 8])):
+            [summary] = node.consolidate(max_amount=1)
+        # the dust can not pay the fee, a larger UTXO is merged too
+        assert summary.inputs == 3
+        assert summary.outputs == 1
+        with pytest.raises(error.InvalidParams):
+            node.consolidate(max_inputs=1)
+
+    def test_fan_out(self, node: Node):
+        with patch.object(Session, "post", side_effect=self.post) as mock_post:
+            [plan] = node.fan_out(constant.ASCOIN, 5, 1000, dry_run=True)
+            [summary] = node.fan_out(constant.ASCOIN, 5, 1000)
+            methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+        assert methods.count("asimov_sendRawTransaction") == 1
+        assert plan.tx is None
+        assert (summary.inputs, summary.outputs, summary.fee) == (plan.inputs, 6, plan.fee)
+        assert [o['amount'] for o in summary.tx.transaction.vout[:5]] == [1000] * 5
+        assert all(o['address'] == node.address for o in summary.tx.transaction.vout)
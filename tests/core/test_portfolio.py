@@ -0,0 +1,64 @@
+import json
+from unittest.mock import patch, Mock
+
+from requests import Session
+
+from asimov import Node, AccountFactory, constant
+from asimov.portfolio import Portfolio
+
+import fake_node
+
+
+def test_refresh():
+    node = Node("xxx", AccountFactory.new().private_key)
+    alice, bob, carol, dave = [AccountFactory.new().address for _ in range(4)]
+    head = [9999]
+    queried = []
+    # alice pays bob in block 10000 and the prevOut of her input is reported,
+    # carol pays a stranger in block 10001 and her input is looked up in the previous transaction
+    blocks = {
+        10000: [{"vin": [{"coinbase": "00"}], "vout": [{"scriptPubKey": {"addresses": [dave]}}]},
+                {"vin": [{"txid": "aa", "vout": 0, "prevOut": {"addresses": [alice]}}],
+                 "vout": [{"scriptPubKey": {"addresses": [bob]}}]}],
+        10001: [{"vin": [{"txid": "cc", "vout": 1}],
+                 "vout": [{"scriptPubKey": {"addresses": ["0x66" + "00" * 20]}}]}],
+    }
+
+    def response(request):
+        method = request['method'].split('_')[1]
+        if method == "getBestBlock":
+            result = {"height": head[0]}
+        elif method == "getBlock":
+            height = int(request['params'][0], 16)
+            result = {"hash": request['params'][0], "height": height, "rawtx": blocks[height]}
+        elif method == "getRawTransaction":
+            result = {"vout": [{"scriptPubKey": {"addresses": [dave]}}, {"scriptPubKey": {"addresses": [carol]}}]}
+        else:
+            if method == "getBalance":
+                queried.append(request['params'][0])
+            return fake_node.response(request)
+        return {"jsonrpc": "2.0", "id": request['id'], "result": result}
+
+    def post(url, data, **kwargs):
+        payload = json.loads(data)
+        mock = Mock()
+        mock.json.return_value = [response(e) for e in payload] if isinstance(payload, list) else response(payload)
+        return mock
+
+    portfolio = Portfolio(node, [alice, bob, carol], [constant.ASCOIN], batch_size=2)
+    with patch.object(Session, "post", side_effect=post):
+        assert portfolio.refresh() == {alice, bob, carol}
+        assert portfolio.balances == {address: {constant.ASCOIN: 100000000} for address in (alice, bob, carol)}
+        assert portfolio.height == 9999
+
+        head[0] = 10001
+        queried.clear()
+        # dave is not in the portfolio
+        assert portfolio.refresh() == {alice, bob, carol}
+        assert sorted(queried) == sorted([alice, bob, carol])
+        assert portfolio.height == 10001
+        assert portfolio.refresh() == set()
+
+        portfolio.add([carol, dave])
+        assert queried[-1] == dave
+        assert set(portfolio.balances) == {alice, bob, carol, dave}
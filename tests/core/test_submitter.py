@@ -0,0 +1,128 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from requests import Session
+
+from asimov import Node, Contract, AccountFactory, error
+from asimov.submitter import Submitter
+from asimov.utxo import UtxoCache
+
+import fake_node
+
+
+def utxo_post(address: str, utxo_count: int, sent: list, **kwargs):
+    """a node holding ``utxo_count`` UTXO, every call yields the thread"""
+    return fake_node.utxo_post(address, [1000000] * utxo_count, sent, delay=0.001, **kwargs)
+
+
+def test_submit_in_order():
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    to_address = AccountFactory.new().address
+    sent = []
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 10, sent)):
+        contract = Contract(node, "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981")
+        with Submitter(node, workers=4, max_pending=8) as submitter:
+            futures = []
+            for i in range(10):
+                futures.append(submitter.transfer(to_address, i + 1))
+                futures.append(submitter.execute(contract, "withdraw", (i,)))
+        txs = [f.result() for f in futures]
+
+    assert [tx.signed_hex for tx in txs] == sent
+    assert all(tx.is_contract_tx for tx in txs[1::2])
+    outpoints = [(vin['txid'], vin['vout']) for tx in txs for vin in tx.transaction.vin]
+    assert len(outpoints) == len(set(outpoints))
+    stats = submitter.stats()
+    assert (stats.submitted, stats.broadcast, stats.failed, stats.pending) == (20, 20, 0, 0)
+    assert stats.throughput > 0
+
+
+def test_spend_change():
+    # one UTXO only, every transaction waits for the change of the one before
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    sent = []
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 1, sent)):
+        with Submitter(node) as submitter:
+            futures = [submitter.transfer(AccountFactory.new().address, 1) for _ in range(3)]
+        txs = [f.result() for f in futures]
+    for before, after in zip(txs, txs[1:]):
+        assert after.transaction.vin[0]['txid'] == before.id
+
+
+def test_rejected_broadcast():
+    node = Node("xxx", AccountFactory.new().private_key)
+    sent = []
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 2, sent, rejects=2)):
+        with Submitter(node, backoff=0) as submitter:
+            tx = submitter.transfer(AccountFactory.new().address, 1).result()
+            assert sent == [tx.signed_hex]
+            assert submitter.stats().rejected == 2
+
+        with Submitter(node, retries=0) as submitter:
+            future = submitter.transfer(AccountFactory.new().address, 1)
+            with pytest.raises(error.NotEnoughMoney):
+                submitter.transfer(AccountFactory.new().address, 10 ** 9).result()
+        assert future.result().id
+    # both UTXO are spent by transactions which are not confirmed yet
+    assert len(node._in_flight) == 2
+
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 3, sent, rejects=1)):
+        with Submitter(node, retries=0) as submitter:
+            with pytest.raises(error.RPCError):
+                submitter.transfer(AccountFactory.new().address, 1).result()
+            assert submitter.stats().failed == 1
+    assert len(node._in_flight) == 2
+
+
+def test_invalid_broadcast():
+    node = Node("xxx", AccountFactory.new().private_key)
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 1, [], rejects=1, reject_code=-25)):
+        with Submitter(node, backoff=0) as submitter:
+            # only a full mempool is worth waiting for, the other rejections fail at once
+            with pytest.raises(error.RPCError):
+                submitter.transfer(AccountFactory.new().address, 1).result()
+            assert submitter.stats().rejected == 0
+            assert not node._in_flight
+            assert submitter.transfer(AccountFactory.new().address, 1).result().id
+
+
+def test_broadcast_lost_on_network():
+    node = Node("xxx", AccountFactory.new().private_key, retries=0)
+    sent = []
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 2, sent, lost=1)):
+        with Submitter(node, backoff=0) as submitter:
+            # the node stored the transaction before the connection broke, it is not sent again
+            tx = submitter.transfer(AccountFactory.new().address, 1).result()
+            assert sent == [tx.signed_hex]
+            assert tx.id == tx.signed_id
+            assert submitter.stats().broadcast == 1
+            second = submitter.transfer(AccountFactory.new().address, 1).result()
+    assert second.transaction.vin != tx.transaction.vin
+    assert len(node._in_flight) == 2
+
+
+def test_close_while_submitting():
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    to_address = AccountFactory.new().address
+    futures, refused = [], []
+
+    def submit():
+        for _ in range(10):
+            try:
+                futures.append(submitter.transfer(to_address, 1))
+            except RuntimeError:
+                refused.append(None)
+
+    with patch.object(Session, "post", side_effect=utxo_post(node.address, 100, [])):
+        submitter = Submitter(node, max_pending=4)
+        threads = [threading.Thread(target=submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        submitter.close()
+        for thread in threads:
+            thread.join()
+    # the transactions accepted before close are all broadcast, none is left in the queue
+    assert len(futures) + len(refused) == 40
+    assert all(f.done() for f in futures)
+    assert submitter.stats().pending == 0
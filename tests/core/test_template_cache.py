@@ -0,0 +1,53 @@
+import json
+from unittest.mock import patch
+
+from requests import Session
+
+from asimov import Node, AccountFactory
+from asimov.template_cache import TemplateCache
+
+import fake_node
+
+
+ADDRESS = "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981"
+
+
+def methods_of(mock_post):
+    return [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+
+
+def test_warm_cache_skips_rpc():
+    node = Node("xxx", AccountFactory.new().private_key, template_cache=TemplateCache())
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        template = node.get_contract_template(address=ADDRESS)
+        assert node.get_contract_template(address=ADDRESS) is template
+        assert node.get_contract_template(name=fake_node.ct.template_name) is template
+        # another contract of the same template only resolves the template name
+        assert node.get_contract_template(address=ADDRESS.replace('f981', 'f982')) is template
+    assert methods_of(mock_post) == [
+        "asimov_getContractTemplate",
+        "asimov_getContractTemplateInfoByName",
+        "asimov_getContractTemplate",
+    ]
+    assert template.abi == fake_node.ct.abi
+
+
+def test_lru():
+    cache = TemplateCache(maxsize=2)
+    cache.put(fake_node.ct, address=ADDRESS)
+    cache.put(fake_node.ct._replace(template_name="other"), key="k")
+    assert len(cache) == 2
+    assert cache.get(address=ADDRESS) is None
+    assert cache.get(key="k").template_name == "other"
+
+
+def test_persistence(tmp_path):
+    node = Node("xxx", AccountFactory.new().private_key, template_cache=TemplateCache(path=str(tmp_path)))
+    with patch.object(Session, "post", side_effect=fake_node.post):
+        template = node.get_contract_template(key="template_key")
+    # another process sharing the directory
+    node.template_cache = TemplateCache(path=str(tmp_path))
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        assert node.get_contract_template(key="template_key") == template
+        assert node.get_contract_template(name=template.template_name) == template
+    assert not mock_post.called
@@ -0,0 +1,76 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from requests import Session
+
+from asimov import Node, AccountFactory, error
+from asimov.utxo import UtxoCache
+from asimov.coin_selection import LargestFirst
+
+import fake_node
+
+
+THREADS = 8
+SENDS = 5
+
+
+def utxo_post(address: str):
+    """a node holding a UTXO for every send, every call yields the thread"""
+    return fake_node.utxo_post(address, [1000000] * (THREADS * SENDS), delay=0.001)
+
+
+@pytest.mark.parametrize("utxo_cache", [UtxoCache, None])
+@pytest.mark.parametrize("coin_selector", [None, LargestFirst()])
+def test_no_double_spend(utxo_cache, coin_selector):
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=utxo_cache and utxo_cache(),
+                coin_selector=coin_selector)
+    to_address = AccountFactory.new().address
+
+    def send(_):
+        return [node.send(to_address, 1) for _ in range(SENDS)]
+
+    with patch.object(Session, "post", side_effect=utxo_post(node.address)):
+        with ThreadPoolExecutor(THREADS) as executor:
+            txs = [tx for txs in executor.map(send, range(THREADS)) for tx in txs]
+
+    outpoints = [(vin['txid'], vin['vout']) for tx in txs for vin in tx.transaction.vin]
+    assert len(txs) == THREADS * SENDS
+    assert len(outpoints) == len(set(outpoints))
+
+
+def test_release_on_failed_broadcast():
+    node = Node("xxx", AccountFactory.new().private_key)
+    post = utxo_post(node.address)
+
+    def failed_post(url, data, **kwargs):
+        if json.loads(data)['method'] == "asimov_sendRawTransaction":
+            raise ValueError("rejected")
+        return post(url, data)
+
+    with patch.object(Session, "post", side_effect=failed_post):
+        with pytest.raises(ValueError):
+            node.send(AccountFactory.new().address, 1)
+        tx = node.call_write_function("withdraw", (1,), fake_node.ct.abi, "0x6361d0441973eb4457d2f8092bbbe303db5eb0f981")
+        assert node._in_flight
+        node.release(tx)
+    assert not node._in_flight
+
+
+def test_reserved_until_confirmed():
+    node = Node("xxx", AccountFactory.new().private_key)
+    to_address = AccountFactory.new().address
+    with patch.object(Session, "post", side_effect=utxo_post(node.address)):
+        txs = [node.send(to_address, 1) for _ in range(THREADS * SENDS)]
+        # every UTXO is spent by a transaction the node still lists as unconfirmed
+        assert len(node._in_flight) == THREADS * SENDS
+        with pytest.raises(error.NotEnoughMoney):
+            node.send(to_address, 1)
+        assert node.wait_for_confirmation(txs[0].id)
+        assert node.send(to_address, 1).transaction.vin == txs[0].transaction.vin
+
+    # the node no longer lists the spent UTXO once their transactions are confirmed
+    with patch.object(Session, "post", side_effect=fake_node.post):
+        node.send(to_address, 1)
+    assert len(node._in_flight) == 1
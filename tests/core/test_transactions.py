@@ -1,11 +1,22 @@
+import struct
+from io import StringIO
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
 import pytest
+from hypothesis import given, strategies as st
 from web3 import Web3
-from bitcointx.core import b2lx
+from eth_utils import remove_0x_prefix
+from bitcointx.core import b2lx, Hash
+from bitcointx.core.serialize import VarIntSerializer
 from asimov import (
     Transaction,
     AccountFactory
 )
-from asimov.transactions import var_int_serialize_size
+from asimov.constant import TxType
+from asimov.account import Address
+from asimov.transactions import var_int_serialize_size, AsimovScript, SignatureHasher, DEFAULT_SEQUENCE
+from asimov.data_type import Tx
 
 
 def test_encoding():
@@ -43,7 +54,11 @@ def test_sign_trx():
         "address": '0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda',
     }]
     tx = Transaction(inputs, outputs)
+    estimated_size = tx.serialize_size(estimate_signature=True)
+    assert tx.serialize_size() == len(Transaction(inputs, outputs).to_hex()) // 2
     assert tx.sign().to_hex() == sign_hex
+    assert tx.serialize_size() == len(sign_hex) // 2
+    assert tx.serialize_size() <= estimated_size <= tx.serialize_size() + 3
 
 
 def test_pay_to_contract_trx():
@@ -132,7 +147,222 @@ def test_create_template_trx():
     (0xfd, 3),
     (1 << 16 - 1, 3),
     (1 << 32 - 1, 5),
-    (1 << 32, 9)
+    (1 << 32, 9),
+    (0xffff, 3),
+    (0x10000, 5),
+    (0xffffffff, 5),
 ])
 def test_var_int_serialize_size(value, expected):
     assert var_int_serialize_size(value) == expected
+
+
+def test_serialize_many_inputs():
+    inputs = [{
+        "scriptPubKey": "76a915662250f9452ac336daaeee722615619d2ba1422793c5ac",
+        "txid": "5048c6f29585c25c02c9dcf4174234fe798ed0ffefead3a76b1cc76aaf9f5693",
+        "vout": idx
+    } for idx in range(300)]
+    outputs = [{
+        "amount": 200000000,
+        "assets": '000000000000000000000000',
+        "address": '0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda',
+    }]
+    raw = Transaction(inputs, outputs).serialize()
+    # the input count is a little endian variable length integer after the version
+    assert raw[4:7] == b'\xfd\x2c\x01'
+    assert raw[7:39] == bytes.fromhex(inputs[0]["txid"])
+    assert raw[39:43] == (0).to_bytes(4, "little")
+    assert len(raw) == Transaction(inputs, outputs).serialize_size()
+
+
+class BaselineTxInput:
+    """the hex string serialization of an input before the binary one, kept as the oracle of the signature hash"""
+    def __init__(self, vin: dict):
+        self.prev_tx_id = vin['txid']
+        self.vout = vin['vout']
+        self.sequence = DEFAULT_SEQUENCE
+        self.script_pub_key = vin['scriptPubKey']
+        self.sig_script = None
+        self.signed_key = vin.get('signed_key')
+
+    def write_buffer(self, buf):
+        buf.write(self.prev_tx_id)
+        buf.write(b2lx((self.vout).to_bytes(4, 'big', signed=False)))
+        if self.sig_script:
+            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.sig_script))).hex())
+            buf.write(self.sig_script)
+        else:
+            buf.write(b'\x00'.hex())
+        buf.write(b2lx((self.sequence).to_bytes(4, 'big', signed=False)))
+        return buf
+
+
+class BaselineTxOutput:
+    def __init__(self, output: dict):
+        self.address = Address(output['address'])
+        self.amount = output['amount']
+        self.assets = output['assets']
+        self.contract_type = output.get("contractType")
+        self.data = output.get("data")
+        self.pk_script = None
+        if self.data:
+            self.data = remove_0x_prefix(self.data)
+            if self.contract_type == TxType.CALL:
+                self.pk_script = self.address.to_contract_hash_script()
+            elif self.contract_type == TxType.TEMPLATE:
+                self.pk_script = self.address.to_create_template_hash_script()
+            elif self.contract_type == TxType.CREATE:
+                self.pk_script = self.address.to_create_contract_hash_script()
+            elif self.contract_type == TxType.VOTE:
+                self.pk_script = self.address.to_create_vote_hash_script()
+            else:
+                raise TypeError(f"unknown contract type: {self.contract_type}")
+        else:
+            if self.address.is_pay_to_contract_hash:
+                self.pk_script = self.address.to_contract_hash_script()
+            else:
+                self.pk_script = self.address.to_script_pub_key()
+
+    def write_buffer(self, buf):
+        buf.write(b2lx(struct.pack(">q", self.amount)))
+        buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.pk_script))).hex())
+        buf.write(self.pk_script)
+        if self.assets:
+            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.assets))).hex())
+            buf.write(self.assets)
+        else:
+            buf.write(b'\x00'.hex())
+        if self.data:
+            buf.write(VarIntSerializer.serialize(len(Web3.toBytes(hexstr=self.data))).hex())
+            buf.write(self.data)
+        else:
+            buf.write(b'\x00'.hex())
+        return buf
+
+
+class BaselineTransaction:
+    def __init__(self, vin=(), vout=(), nLockTime=0, nVersion=1, gas_limit=0):
+        self.lock_time = nLockTime
+        self.version = nVersion
+        self.gas_limit = gas_limit
+        self.inputs = [BaselineTxInput(_vin) for _vin in vin]
+        self.outputs = [BaselineTxOutput(_vout) for _vout in vout]
+
+    def to_buffer_writer(self) -> StringIO:
+        buffer = StringIO()
+        buffer.write(b2lx((self.version).to_bytes(4, 'big', signed=False)))
+        buffer.write(b2lx(VarIntSerializer.serialize(len(self.inputs))))
+        for _input in self.inputs:
+            _input.write_buffer(buffer)
+        buffer.write(b2lx(VarIntSerializer.serialize(len(self.outputs))))
+        for _output in self.outputs:
+            _output.write_buffer(buffer)
+        buffer.write(b2lx((self.gas_limit).to_bytes(4, 'big', signed=False)))
+        buffer.write(b2lx((self.lock_time).to_bytes(4, 'big', signed=True)))
+        return buffer
+
+    def to_hex(self) -> str:
+        return self.to_buffer_writer().getvalue()
+
+
+def baseline_signature_hash(tx: BaselineTransaction, in_idx, sub_script, hash_type) -> bytes:
+    tx = deepcopy(tx)
+    for txin in tx.inputs:
+        txin.sig_script = b''
+    tx.inputs[in_idx].sig_script = sub_script
+    byte_value = Web3.toBytes(hexstr=tx.to_hex())
+    byte_value += struct.pack(b"<i", hash_type)
+    return bytes(Hash(byte_value))
+
+
+hex_bytes = st.binary(min_size=0, max_size=80).map(bytes.hex)
+tx_inputs = st.lists(st.fixed_dictionaries({
+    "txid": st.binary(min_size=32, max_size=32).map(bytes.hex),
+    "vout": st.integers(0, 0xffffffff),
+    "scriptPubKey": hex_bytes,
+}), min_size=1, max_size=20)
+tx_outputs = st.lists(st.one_of(
+    st.fixed_dictionaries({
+        "amount": st.integers(0, 1 << 62),
+        "assets": st.binary(min_size=12, max_size=12).map(bytes.hex),
+        "address": st.sampled_from([
+            "0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda", "0x6358dab7cae438f9647e7eebea5697d9e6f2e95b81"]),
+    }),
+    st.fixed_dictionaries({
+        "amount": st.integers(0, 1 << 62),
+        "assets": st.binary(min_size=12, max_size=12).map(bytes.hex),
+        "address": st.just("0x6358dab7cae438f9647e7eebea5697d9e6f2e95b81"),
+        "data": st.binary(min_size=1, max_size=300).map(bytes.hex),
+        "contractType": st.sampled_from([TxType.CALL, TxType.CREATE, TxType.TEMPLATE]),
+    }),
+), min_size=1, max_size=5)
+
+
+@given(tx_inputs, tx_outputs, st.integers(0, 0xffffffff), st.integers(0, 0x7fffffff),
+       st.sampled_from([1, 2, 3, 0x81]), st.data())
+def test_signature_hash(inputs, outputs, gas_limit, lock_time, hash_type, data):
+    tx = Transaction(inputs, outputs, nLockTime=lock_time, gas_limit=gas_limit)
+    baseline_tx = BaselineTransaction(inputs, outputs, nLockTime=lock_time, gas_limit=gas_limit)
+    # signature scripts of the inputs are ignored
+    for _input, baseline_input in zip(tx.inputs, baseline_tx.inputs):
+        _input.sig_script = data.draw(st.binary(max_size=110))
+        baseline_input.sig_script = _input.sig_script.hex()
+    hasher = SignatureHasher(tx)
+    for idx, _input in enumerate(tx.inputs):
+        expected = baseline_signature_hash(baseline_tx, idx, inputs[idx]['scriptPubKey'], hash_type)
+        assert hasher.signature_hash(idx, _input.script_pub_key, hash_type) == expected
+        assert AsimovScript.signature_hash(tx, idx, _input.script_pub_key, hash_type) == expected
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_parallel_sign(executor_class):
+    accounts = [AccountFactory.new() for _ in range(3)]
+    inputs = [{
+        "scriptPubKey": Address(accounts[idx % 3].address).to_script_pub_key(),
+        "txid": f"{idx:064x}",
+        "vout": idx,
+        "signed_key": accounts[idx % 3],
+    } for idx in range(30)]
+    outputs = [{
+        "amount": 200000000,
+        "assets": '000000000000000000000000',
+        "address": accounts[0].address,
+    }]
+    sign_hex = Transaction(inputs, outputs).sign().to_hex()
+    with executor_class(max_workers=2) as executor:
+        assert Transaction(inputs, outputs).sign(parallel=True, executor=executor).to_hex() == sign_hex
+
+
+def test_slots():
+    account = AccountFactory.new()
+    inputs = [{
+        "scriptPubKey": Address(account.address).to_script_pub_key(),
+        "txid": f"{1:064x}",
+        "vout": 1,
+        "signed_key": account,
+    }]
+    outputs = [{"amount": 1, "assets": '000000000000000000000000', "address": account.address}]
+    transaction = Transaction(inputs, outputs)
+    tx = Tx(None, transaction)
+    for obj in (account, transaction, transaction.inputs[0], transaction.outputs[0], tx):
+        assert not hasattr(obj, "__dict__")
+    assert transaction.inputs[0].prev_tx_id == inputs[0]['txid']
+    assert tx.signed_hex == transaction.to_hex()
+
+
+def test_signing_key_kept_in_account():
+    account = AccountFactory.new("0x1")
+    padded = AccountFactory.new("00" * 31 + "01")
+
+    def transaction(signed_key):
+        inputs = [{"scriptPubKey": Address(account.address).to_script_pub_key(), "txid": f"{idx:064x}",
+                   "vout": idx, "signed_key": signed_key} for idx in range(2)]
+        return Transaction(inputs, [{"amount": 1, "assets": '000000000000000000000000', "address": account.address}])
+
+    assert account._signing_key is None
+    sign_hex = transaction(account).sign().to_hex()
+    signing_key = account._signing_key
+    assert signing_key is not None
+    assert transaction(account).sign().to_hex() == sign_hex
+    assert account._signing_key is signing_key
+    assert transaction(padded).sign().to_hex() == sign_hex
@@ -2,7 +2,7 @@ import json
 
 import pytest
 from asimov._utils.common import dict_add
-from asimov._utils.encode import AsimovJsonEncoder, find_matching_func
+from asimov._utils.encode import AsimovJsonEncoder, find_matching_func, FunctionEncoderTable, encode_transaction_data
 from asimov.account import AccountFactory
 
 
@@ -42,3 +42,43 @@ def test_find_matching_func(complied_contract, args, expect_rst):
             find_matching_func(complied_contract.abi, *args)
     else:
         assert find_matching_func(complied_contract.abi, *args) == expect_rst
+
+
+TRANSFER_ABI = [{
+    'constant': False, 'name': 'transfer', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable',
+    'type': 'function', 'inputs': [
+        {'name': 'to', 'type': 'address'}, {'name': 'value', 'type': 'uint256'},
+        {'name': 'memo', 'type': 'string'}, {'name': 'tag', 'type': 'bytes32'}, {'name': 'ids', 'type': 'int8[]'}],
+}]
+
+
+@pytest.mark.parametrize("fn_identifier, args", [
+    ("send", None),
+    ("withdraw", [100]),
+    ("withdraw", []),
+    ("initTemplate", [1, "name"]),
+    ("withdraw(uint256)", [100]),
+])
+def test_function_encoder(complied_contract, fn_identifier, args):
+    table = FunctionEncoderTable(complied_contract.abi)
+    fn_name = fn_identifier.split('(')[0]
+    fn_abi = table.get(fn_identifier, args).abi
+    assert table.encode(fn_identifier, args) == \
+        encode_transaction_data(fn_identifier=fn_name, contract_abi=[fn_abi], args=args)
+
+
+def test_function_encoder_normalize():
+    args = ['0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda', 5, '测试', b'x' * 32, [-1, 2]]
+    assert FunctionEncoderTable(TRANSFER_ABI).encode("transfer", args) == \
+        encode_transaction_data(fn_identifier="transfer", contract_abi=TRANSFER_ABI, args=args)
+    with pytest.raises(TypeError):
+        FunctionEncoderTable(TRANSFER_ABI).encode("transfer", args[:-1] + [[1000]])
+    with pytest.raises(ValueError):
+        FunctionEncoderTable(TRANSFER_ABI).encode("transfer2", args)
+
+
+def test_function_encoder_plain_values():
+    abi = [dict(TRANSFER_ABI[0], inputs=TRANSFER_ABI[0]['inputs'][:4])]
+    args = ['0x669eaf74a91b268dfd4717051ab299a1f23c9c5bda', 5, b'\xe6\xb5\x8b', '0x' + '12' * 32]
+    assert FunctionEncoderTable(abi).encode("transfer(address,uint256,string,bytes32)", args) == \
+        encode_transaction_data(fn_identifier="transfer", contract_abi=abi, args=args)
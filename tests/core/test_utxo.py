@@ -0,0 +1,70 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from requests import Session
+
+from asimov import Node, AccountFactory, constant, error
+from asimov.utxo import UtxoCache
+
+import fake_node
+
+
+ADDRESS = "0x66010e69d32d61872368f250652c70cace6d35db01"
+
+
+def utxo(txid, vout, amount):
+    return {"txid": txid, "vout": vout, "amount": amount, "assets": constant.ASCOIN, "spendable": True}
+
+
+def test_pick_in_order():
+    cache = UtxoCache(page_size=2)
+    assert cache.next_offset(ADDRESS, constant.ASCOIN) == 0
+    cache.extend(ADDRESS, constant.ASCOIN, [utxo("a", 0, 10), utxo("b", 0, 20)])
+    assert cache.next_offset(ADDRESS, constant.ASCOIN) == 2
+    assert [u['txid'] for u in cache.pick(ADDRESS, constant.ASCOIN, 15)] == ["a", "b"]
+    assert cache.pick(ADDRESS, constant.ASCOIN, 31) is None
+    cache.extend(ADDRESS, constant.ASCOIN, [])
+    assert cache.next_offset(ADDRESS, constant.ASCOIN) is None
+
+
+def test_commit_reserves_inputs_and_adds_change():
+    cache = UtxoCache()
+    cache.extend(ADDRESS, constant.ASCOIN, [utxo("a", 0, 10), utxo("b", 0, 20)])
+    cache.commit(ADDRESS, "c", [utxo("a", 0, 10)], [
+        {"address": "0x66c17b951f0c85b860c9f7f0d811c77ea78f2d2e3a", "amount": 5, "assets": constant.ASCOIN},
+        {"address": ADDRESS, "amount": 4, "assets": constant.ASCOIN},
+    ])
+    assert [(u['txid'], u['vout']) for u in cache.available(ADDRESS, constant.ASCOIN)] == [("b", 0), ("c", 1)]
+
+
+def test_refresh_drops_spent():
+    cache = UtxoCache()
+    cache.extend(ADDRESS, constant.ASCOIN, [utxo("a", 0, 10), utxo("b", 0, 20)])
+    cache.commit(ADDRESS, "c", [utxo("a", 0, 10)], [{"address": ADDRESS, "amount": 4, "assets": constant.ASCOIN}])
+    cache.extend(ADDRESS, constant.ASCOIN, [])
+    cache.refresh(ADDRESS, constant.ASCOIN)
+    # "a" is spent on chain and "b" by someone else, the unconfirmed change "c" is kept
+    cache.extend(ADDRESS, constant.ASCOIN, [utxo("d", 0, 30)])
+    cache.extend(ADDRESS, constant.ASCOIN, [])
+    assert [u['txid'] for u in cache.available(ADDRESS, constant.ASCOIN)] == ["c", "d"]
+
+
+def test_send_with_cache():
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    to_address = AccountFactory.new().address
+    with patch.object(Session, "post", side_effect=fake_node.post) as mock_post:
+        tx1 = node.send(to_address, 1)
+        tx2 = node.send(to_address, 1)
+        methods = [json.loads(c[1]['data'])['method'] for c in mock_post.call_args_list]
+    assert methods.count("asimov_getUtxoInPage") == 1
+    # the second transaction spends the change of the first one
+    [vin] = tx2.transaction.vin
+    assert (vin['txid'], vin['vout']) == (tx1.id, 1)
+
+
+def test_not_enough_money_with_cache():
+    node = Node("xxx", AccountFactory.new().private_key, utxo_cache=UtxoCache())
+    with patch.object(Session, "post", side_effect=fake_node.post):
+        with pytest.raises(error.NotEnoughMoney):
+            node._get_utxo(node.address, constant.ASCOIN, 100000001)